@@ -1,12 +1,11 @@
 import os
-from typing import cast
 
 import aind_behavior_services.task.distributions as distributions
 import numpy as np
 from aind_behavior_curriculum import Stage, TrainerState
-from scipy.linalg import expm
 
 import aind_behavior_vr_foraging.task_logic as vr_task_logic
+from aind_behavior_vr_foraging.ctmc import replenishment_transition_matrix
 from aind_behavior_vr_foraging.task_logic import (
     AindVrForagingTaskLogic,
     AindVrForagingTaskParameters,
@@ -46,15 +45,7 @@ def compute_cmc_transition_probability(n_states, rep_rate, T=3.5, dt=0.1) -> np.
         matrix of replenishment probabilities (#states * #states)
     """
 
-    q = np.zeros((n_states, n_states))
-    np.fill_diagonal(q, -rep_rate / T)
-    np.fill_diagonal(q[:, 1:], rep_rate / T)
-    q[-1, -1] = 0
-
-    # compute replenishment probability function dependent on replenishment time (here experiment dt)
-    p_t = expm(q * dt)
-    assert p_t.ndim == 2
-    return p_t
+    return np.array(replenishment_transition_matrix(n_states, rep_rate / T, dt))
 
 
 operation_control = vr_task_logic.OperationControl(
@@ -122,10 +113,7 @@ def make_patch(
 
     replenishment = vr_task_logic.OutsideRewardFunction(
         probability=vr_task_logic.CtcmFunction(
-            transition_matrix=cast(
-                list[list[float]],
-                compute_cmc_transition_probability(n_states, rep_rate).tolist(),
-            ),
+            transition_matrix=compute_cmc_transition_probability(n_states, rep_rate).tolist(),
             maximum=p_max,
             minimum=p_min,
             rho=rho,
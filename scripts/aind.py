@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import os
+import tomllib
 from pathlib import Path
 from typing import Any, cast
 from aind_behavior_vr_foraging.data_contract.utils import calculate_consumed_water
@@ -55,14 +58,67 @@ async def _run_curriculum_if_applicable(
         input_trainer_state=input_trainer_state_path.resolve(),
         data_directory=launcher.session_directory,
     )
-    curriculum_app = CurriculumApp(settings=settings)
-    await curriculum_app.run_async()
-    suggestion = curriculum_app.process_suggestion()
+    # Skips the startup of the curriculum cli if a curriculum server is running
+    suggestion = await _request_server_suggestion(settings)
+    if suggestion is None:
+        curriculum_app = CurriculumApp(settings=settings)
+        await curriculum_app.run_async()
+        suggestion = curriculum_app.process_suggestion()
     suggestion_path = _dump_suggestion(suggestion, launcher.session_directory)
     picker.push_new_suggestion(suggestion.trainer_state)
     return suggestion, suggestion_path, settings
 
 
+async def _request_server_suggestion(
+    settings: CurriculumSettings,
+) -> CurriculumSuggestion | None:
+    """Evaluates the curriculum with a running curriculum server, if any.
+
+    Only a server running the version of the curricula project the curriculum cli
+    runs from is used. Returns None if there is none, if the server fails to evaluate
+    the curriculum, or if the curricula are not installed in the launcher environment
+    (e.g. after a plain `uv sync`), so that the curriculum cli is run instead.
+    """
+    try:
+        from aind_behavior_vr_foraging_curricula.server import (
+            CurriculumServerUnavailableError,
+            request_suggestion,
+        )
+    except ImportError:
+        return None
+
+    version = _project_version(settings.project_directory)
+    try:
+        return CurriculumSuggestion.model_validate_json(
+            await asyncio.to_thread(
+                request_suggestion,
+                settings.input_trainer_state,
+                settings.data_directory,
+                settings.curriculum,
+                fallback_to_cli=False,
+                **({"expected_version": version} if version is not None else {}),
+            )
+        )
+    except CurriculumServerUnavailableError as e:
+        logger.info("%s. Running the curriculum cli instead.", e)
+        return None
+    except Exception as e:
+        # The server only saves the startup of the cli, so any of its errors falls back to the cli
+        logger.warning(
+            "Curriculum server failed: %s. Running the curriculum cli instead.", e
+        )
+        return None
+
+
+def _project_version(project_directory: os.PathLike) -> str | None:
+    """Returns the version declared by the project the curriculum cli runs from, if any."""
+    try:
+        with open(Path(project_directory) / "pyproject.toml", "rb") as f:
+            return tomllib.load(f).get("project", {}).get("version")
+    except FileNotFoundError:
+        return None
+
+
 def _confirm_session_info(
     launcher: Launcher, session: Session, trainer_state: TrainerState
 ) -> bool:
@@ -1,4 +1,4 @@
-import random
+import argparse
 import subprocess
 import sys
 from pathlib import Path
@@ -7,20 +7,24 @@ ROOT = Path(__file__).parent.parent
 RANDOM_SEED = 42
 
 
-def main() -> int:
-    cmd = ["uv", "run", "vr-foraging", "regenerate"]
+def main(check: bool = False) -> int:
+    cmd = ["uv", "run", "vr-foraging", "regenerate"] + (["--check"] if check else [])
     print(f"Running: {' '.join(cmd)}")
     result = subprocess.run(cmd, cwd=ROOT)
     if result.returncode != 0:
         return result.returncode
 
     print(f"Running curricula schema generation (seed={RANDOM_SEED})")
-    random.seed(RANDOM_SEED)
     from aind_behavior_vr_foraging_curricula._schema import main as curricula_main  # noqa: PLC0415
 
-    curricula_main()
+    outdated = curricula_main(check=check, seed=RANDOM_SEED)
+    if check and outdated:
+        print(f"Outdated schema files: {[str(path) for path in outdated]}")
+        return 1
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description="Regenerate the schemas and C# extensions")
+    parser.add_argument("--check", action="store_true", help="Only check that the generated outputs are up to date.")
+    sys.exit(main(parser.parse_args().check))
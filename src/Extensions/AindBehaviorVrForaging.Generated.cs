@@ -2280,6 +2280,11 @@ namespace AindVrForagingDataSchema
     ///It expects a transition matrix that takes the current value of the variable
     ///of interest (e.g. Probability), and outputs a new value based on the defined
     ///stochastic process in the transition matrix.
+    ///
+    ///The rows of the transition matrix are scaled to sum to 1 when the model is
+    ///validated, so a serialized model always holds a row-stochastic matrix. Matrices
+    ///that are not square, or that have negative entries or a row summing to 0, are
+    ///rejected.
     /// </summary>
     [System.CodeDom.Compiler.GeneratedCodeAttribute("Bonsai.Sgen", "0.9.0.0 (Newtonsoft.Json v13.0.0.0)")]
     [System.ComponentModel.DescriptionAttribute(@"A patch update function that uses a continuous-time Markov chain (CTMC)
@@ -2287,7 +2292,12 @@ namespace AindVrForagingDataSchema
 
     It expects a transition matrix that takes the current value of the variable
     of interest (e.g. Probability), and outputs a new value based on the defined
-    stochastic process in the transition matrix.")]
+    stochastic process in the transition matrix.
+
+    The rows of the transition matrix are scaled to sum to 1 when the model is
+    validated, so a serialized model always holds a row-stochastic matrix. Matrices
+    that are not square, or that have negative entries or a row summing to 0, are
+    rejected.")]
     [Bonsai.WorkflowElementCategoryAttribute(Bonsai.ElementCategory.Source)]
     [Bonsai.CombinatorAttribute(MethodName="Generate")]
     public partial class CtcmFunction : PatchUpdateFunction
@@ -1,10 +1,13 @@
+import json
+import os
+import sys
 import typing as t
 
 from pydantic import Field, RootModel
-from pydantic_settings import BaseSettings, CliApp, CliSubCommand
+from pydantic_settings import BaseSettings, CliApp, CliImplicitFlag, CliPositionalArg, CliSubCommand
 
 from aind_behavior_vr_foraging import __semver__, regenerate
-from aind_behavior_vr_foraging.data_mappers import DataMapperCli
+from aind_behavior_vr_foraging.data_mappers import DataMapperBatchCli, DataMapperCli
 from aind_behavior_vr_foraging.data_qc import DataQcCli
 
 
@@ -15,19 +18,77 @@ class VersionCli(RootModel):
         print(__semver__)
 
 
-class DslRegenerateCli(RootModel):
-    root: t.Any
+class DslRegenerateCli(BaseSettings, cli_kebab_case=True):
+    check: CliImplicitFlag[bool] = Field(
+        default=False, description="Only check that the generated outputs are up to date, without writing them."
+    )
+
+    def cli_cmd(self) -> None:
+        outdated = regenerate.main(check=self.check)
+        if self.check and outdated:
+            print("Outdated outputs:")
+            for path in outdated:
+                print(f" - {path}")
+            sys.exit(1)
+
+
+class MarkovAnalysisCli(BaseSettings, cli_kebab_case=True):
+    task_logic_path: CliPositionalArg[os.PathLike] = Field(description="Path to the task logic json file.")
+    stop_probability: float = Field(
+        default=1.0, ge=0, le=1, description="Probability of stopping at each operant reward site."
+    )
+    max_sites: int = Field(default=256, ge=1, description="Maximum number of reward sites of a patch visit analyzed.")
+
+    def cli_cmd(self) -> None:
+        """Print the long-run statistics of the Markov environment of each block of a task logic."""
+        from aind_behavior_services.utils import model_from_json_file
+
+        from aind_behavior_vr_foraging.simulation import analyze_task
+        from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+        task = model_from_json_file(self.task_logic_path, AindVrForagingTaskLogic)
+        analyses = analyze_task(task, stop_probability=self.stop_probability, max_sites=self.max_sites)
+        print(json.dumps({f"block_{i}": analysis.summary() for i, analysis in analyses.items()}, indent=2))
+
+
+class SchemaValidationCli(BaseSettings, cli_kebab_case=True):
+    paths: CliPositionalArg[t.List[os.PathLike]] = Field(description="Paths to the json documents to validate.")
+    schema_path: t.Optional[os.PathLike] = Field(
+        default=None, description="Path to the json schema file. Defaults to the schema of the installed models."
+    )
 
     def cli_cmd(self) -> None:
-        regenerate.main()
+        """Validate task logic json documents against their json schema, without constructing the models."""
+        from aind_behavior_vr_foraging.schema_validation import get_validator
+        from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+        validator = get_validator(AindVrForagingTaskLogic, self.schema_path)
+        documents = []
+        for path in self.paths:
+            with open(path, "r", encoding="utf-8") as f:
+                documents.append(f.read())
+        errors = validator.validate_many(documents)
+        for path, error in zip(self.paths, errors):
+            print(f"{path}: {'valid' if error is None else error}")
+        if any(error is not None for error in errors):
+            sys.exit(1)
 
 
 class VrForagingCli(BaseSettings, cli_prog_name="vr-foraging", cli_kebab_case=True):
     data_mapper: CliSubCommand[DataMapperCli] = Field(description="Generate metadata for aind-data-schema.")
+    data_mapper_batch: CliSubCommand[DataMapperBatchCli] = Field(
+        description="Generate metadata for aind-data-schema for many sessions in parallel."
+    )
     data_qc: CliSubCommand[DataQcCli] = Field(description="Run data quality checks.")
     version: CliSubCommand[VersionCli] = Field(
         description="Print the version of the vr-foraging package.",
     )
+    markov_analysis: CliSubCommand[MarkovAnalysisCli] = Field(
+        description="Compute the long-run statistics of the Markov environments of a task logic."
+    )
+    validate_schema: CliSubCommand[SchemaValidationCli] = Field(
+        description="Validate task logic json documents against their json schema."
+    )
     regenerate: CliSubCommand[DslRegenerateCli] = Field(
         description="Regenerate the vr-foraging dsl dependencies.",
     )
@@ -0,0 +1,70 @@
+import math
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+TransitionMatrix = Tuple[Tuple[float, ...], ...]
+
+
+def replenishment_transition_matrix(n_states: int, rate: float, dt: float = 0.1) -> List[List[float]]:
+    """Computes the transition matrix, over `dt`, of a birth-only chain replenishing at `rate`.
+
+    The chain moves from each state to the next at `rate`, and the last state is
+    absorbing. Its transition matrix is `expm(Q * dt)` for the bidiagonal generator
+    `Q`, which for this chain has the closed form of a Poisson distribution over the
+    number of transitions, with the tail probability collected in the last state.
+
+    Matrices are cached by `(n_states, rate, dt)`, so building many patches with the
+    same parameters is cheap.
+
+    Args:
+        n_states: Number of states of the chain.
+        rate: Replenishment rate (1/s).
+        dt: Time step (s) of the transition matrix.
+
+    Returns:
+        A new `n_states` x `n_states` row-stochastic matrix.
+    """
+    return [list(row) for row in _replenishment_transition_matrix(int(n_states), float(rate), float(dt))]
+
+
+def normalize_transition_matrix(matrix: Sequence[Sequence[float]]) -> List[List[float]]:
+    """Validates that `matrix` is a non-empty square matrix with non-negative entries and scales its rows to sum to 1.
+
+    Raises:
+        ValueError: If the matrix is empty, not square, has negative entries or a row summing to 0.
+    """
+    if not matrix:
+        raise ValueError("Transition matrix must not be empty.")
+    if any(len(row) != len(matrix) for row in matrix):
+        raise ValueError("Transition matrix must be square (same number of rows and columns).")
+    normalized = []
+    for i, row in enumerate(matrix):
+        if any(value < 0 for value in row):
+            raise ValueError(f"Transition matrix row {i} has negative entries.")
+        row_sum = math.fsum(row)
+        if row_sum <= 0:
+            raise ValueError(f"Transition matrix row {i} must have a positive sum.")
+        normalized.append([value / row_sum for value in row])
+    return normalized
+
+
+@lru_cache(maxsize=256)
+def _replenishment_transition_matrix(n_states: int, rate: float, dt: float) -> TransitionMatrix:
+    if n_states < 1:
+        raise ValueError("n_states must be at least 1.")
+    if rate < 0 or dt < 0:
+        raise ValueError("rate and dt must be non-negative.")
+    expected_transitions = rate * dt
+    # Probability of k transitions within dt, for k = 0 .. n_states - 2.
+    poisson = [math.exp(-expected_transitions)]
+    for k in range(1, n_states - 1):
+        poisson.append(poisson[-1] * expected_transitions / k)
+
+    matrix = []
+    for i in range(n_states):
+        row = [0.0] * n_states
+        remaining = n_states - 1 - i
+        row[i:-1] = poisson[:remaining]
+        row[-1] = max(0.0, 1.0 - math.fsum(row[:-1]))
+        matrix.append(tuple(row))
+    return tuple(matrix)
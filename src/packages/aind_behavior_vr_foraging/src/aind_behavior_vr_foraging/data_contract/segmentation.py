@@ -0,0 +1,94 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PATCH_VISIT_COLUMNS = (
+    "start_time",
+    "state_index",
+    "duration",
+    "n_sites",
+    "n_choices",
+    "n_rewards",
+    "water",
+    "n_stops",
+    "distance",
+)
+
+
+def segment_patch_visits(
+    active_patch: pd.DataFrame,
+    *,
+    choices: Optional[pd.DataFrame] = None,
+    rewards: Optional[pd.DataFrame] = None,
+    sites: Optional[pd.DataFrame] = None,
+    stops: Optional[pd.DataFrame] = None,
+    end_time: Optional[float] = None,
+) -> pd.DataFrame:
+    """Builds a table with one row per patch visit from the software events of a session.
+
+    A patch visit starts at an `ActivePatch` event and lasts until the next one. Every
+    event is assigned to the visit it happened in with a single `searchsorted` over the
+    visit start times, and events that happened before the first visit are dropped.
+
+    All event frames are indexed by timestamp, as loaded from the `SoftwareEvents` streams.
+    Streams that are not given count as having no events.
+
+    Args:
+        active_patch: `ActivePatch` events, whose data holds the `state_index` of the patch.
+        choices: `ChoiceFeedback` events.
+        rewards: `GiveReward` events, whose data holds the amount of water given (in microliters).
+            Events without an amount, or a null amount, are not counted as rewards.
+        sites: `ActiveSite` events, whose data holds the `label` and `length` of the site.
+        stops: Events emitted when the subject stops.
+        end_time: Time the session ended. The last visit has no duration if not given.
+
+    Returns:
+        A table indexed by visit number with the columns in `PATCH_VISIT_COLUMNS`:
+        the start time, patch state index and duration of each visit, its number of
+        reward sites, choices, rewards and stops, the water given (in microliters) and
+        the distance traveled (summed length of the sites that became active).
+    """
+    start_times = active_patch.index.to_numpy(dtype=float)
+    n_visits = len(start_times)
+    if n_visits == 0:
+        return pd.DataFrame(columns=list(PATCH_VISIT_COLUMNS)).rename_axis("visit")
+    if np.any(np.diff(start_times) < 0):
+        raise ValueError("ActivePatch events must be sorted by timestamp.")
+
+    def assign(events: Optional[pd.DataFrame]) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the visit of each event within a visit, and the mask of those events."""
+        if events is None or len(events) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=bool)
+        visit = np.searchsorted(start_times, events.index.to_numpy(dtype=float), side="right") - 1
+        return visit[visit >= 0], visit >= 0
+
+    def count(events: Optional[pd.DataFrame]) -> np.ndarray:
+        return np.bincount(assign(events)[0], minlength=n_visits)
+
+    reward_visits, reward_mask = assign(rewards)
+    amounts = rewards["data"].to_numpy(dtype=float)[reward_mask] if len(reward_visits) else np.empty(0)
+    given = np.nan_to_num(amounts, nan=0.0)
+
+    site_visits, site_mask = assign(sites)
+    site_data = sites["data"].to_numpy()[site_mask] if len(site_visits) else np.empty(0, dtype=object)
+    lengths = np.fromiter((site.get("length", 0.0) for site in site_data), dtype=float, count=len(site_data))
+    is_reward_site = np.fromiter(
+        (site.get("label") == "RewardSite" for site in site_data), dtype=bool, count=len(site_data)
+    )
+
+    durations = np.append(np.diff(start_times), np.nan if end_time is None else end_time - start_times[-1])
+    return pd.DataFrame(
+        {
+            "start_time": start_times,
+            "state_index": [data["state_index"] for data in active_patch["data"]],
+            "duration": durations,
+            "n_sites": np.bincount(site_visits[is_reward_site], minlength=n_visits),
+            "n_choices": count(choices),
+            "n_rewards": np.bincount(reward_visits[given > 0], minlength=n_visits),
+            "water": np.bincount(reward_visits, weights=given, minlength=n_visits),
+            "n_stops": count(stops),
+            "distance": np.bincount(site_visits, weights=lengths, minlength=n_visits),
+        },
+        columns=list(PATCH_VISIT_COLUMNS),
+    ).rename_axis("visit")
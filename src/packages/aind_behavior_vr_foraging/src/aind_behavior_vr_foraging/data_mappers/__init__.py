@@ -1,10 +1,11 @@
+import json
 import logging
 import os
 import typing as t
 from pathlib import Path
 
 from pydantic import AwareDatetime, Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, CliPositionalArg
 
 logger = logging.getLogger(__name__)
 
@@ -22,35 +23,87 @@ class DataMapperCli(BaseSettings, cli_kebab_case=True):
         default=None,
         description="Path to the curriculum repository. If not provided, will use the repository path.",
     )
-    session_end_time: AwareDatetime = Field(
-        description="End time of the session in ISO format. If not provided, will use the time the data mapping is run."
+    session_end_time: t.Optional[AwareDatetime] = Field(
+        default=None,
+        description="End time of the session in ISO format. If not provided, it is read from the logged software events of the session.",
+    )
+    trainer_state_history: t.Optional[os.PathLike] = Field(
+        default=None,
+        description="Path to a trainer state history store to append the curriculum suggestion to. If not provided, it is not recorded.",
     )
     suffix: t.Optional[str] = Field(default="vrforaging", description="Suffix to append to the output filenames.")
 
     def cli_cmd(self):
         """Generate aind-data-schema metadata for the VR Foraging dataset located at the specified path."""
-        from ._acquisition import AindAcquisitionDataMapper
-        from ._instrument import AindInstrumentDataMapper
+        from ._batch import map_session
 
-        session_mapper = AindAcquisitionDataMapper(
+        map_session(
             data_path=Path(self.data_path),
             repository_path=Path(self.repository_path),
             session_end_time=self.session_end_time,
             curriculum_repository_path=self.curriculum_repository_path,
             curriculum_suggestion=self.curriculum_suggestion,
+            trainer_state_history=self.trainer_state_history,
+            suffix=self.suffix,
         )
-        session_mapper.map()
-
-        rig_mapper = AindInstrumentDataMapper(data_path=Path(self.data_path))
-        rig_mapper.map()
-
-        assert session_mapper.mapped is not None
-        assert rig_mapper.mapped is not None
-
-        session_mapper.mapped.instrument_id = rig_mapper.mapped.instrument_id
-        session_mapper.mapped.write_standard_file(output_directory=Path(self.data_path), filename_suffix=self.suffix)
-        rig_mapper.mapped.write_standard_file(output_directory=Path(self.data_path), filename_suffix=self.suffix)
         logger.info(
             "Mapping completed! Saved acquisition.json and instrument.json to %s",
             self.data_path,
         )
+
+
+class DataMapperBatchCli(BaseSettings, cli_kebab_case=True):
+    data_paths: CliPositionalArg[t.List[os.PathLike]] = Field(description="Paths to the session data directories.")
+    repository_path: os.PathLike = Field(
+        default=Path("."), description="Path to the repository. By default it will use the current directory."
+    )
+    curriculum_repository_path: t.Optional[os.PathLike] = Field(
+        default=None,
+        description="Path to the curriculum repository. If not provided, will use the repository path.",
+    )
+    max_workers: t.Optional[int] = Field(
+        default=None, ge=1, description="Number of worker processes. Defaults to the number of processors."
+    )
+    instrument_cache_dir: t.Optional[Path] = Field(
+        default=None,
+        description="Directory where mapped instruments are cached across runs. If not provided, they are only cached in memory.",
+    )
+    trainer_state_history: t.Optional[os.PathLike] = Field(
+        default=None,
+        description="Path to a trainer state history store to append the curriculum suggestion to. If not provided, it is not recorded.",
+    )
+    summary_path: t.Optional[Path] = Field(
+        default=None, description="Path to save a json summary of the run. If not provided, it is only logged."
+    )
+    suffix: t.Optional[str] = Field(default="vrforaging", description="Suffix to append to the output filenames.")
+
+    def cli_cmd(self):
+        """Generate aind-data-schema metadata for many VR Foraging sessions in parallel.
+
+        The session end time of each session is read from its logged software events.
+        """
+        from ._batch import format_summary, map_sessions
+
+        results = map_sessions(
+            self.data_paths,
+            repository_path=Path(self.repository_path),
+            curriculum_repository_path=self.curriculum_repository_path,
+            instrument_cache_dir=self.instrument_cache_dir,
+            trainer_state_history=self.trainer_state_history,
+            suffix=self.suffix,
+            max_workers=self.max_workers,
+        )
+        logger.info("Batch mapping summary:\n%s", format_summary(results))
+        if self.summary_path is not None:
+            with open(self.summary_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    [
+                        {"data_path": str(r.data_path), "elapsed_seconds": r.elapsed_seconds, "error": r.error}
+                        for r in results
+                    ],
+                    f,
+                    indent=2,
+                )
+        n_failed = sum(not r.succeeded for r in results)
+        if n_failed > 0:
+            raise RuntimeError(f"{n_failed} of {len(results)} sessions failed to map.")
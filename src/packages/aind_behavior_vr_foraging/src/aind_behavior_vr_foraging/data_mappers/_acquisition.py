@@ -13,7 +13,7 @@ import pydantic
 from aind_behavior_curriculum import TrainerState
 from aind_behavior_services.rig import cameras, visual_stimulation
 from aind_behavior_services.session import Session
-from aind_behavior_services.utils import get_fields_of_type, model_from_json_file
+from aind_behavior_services.utils import model_from_json_file
 from aind_data_schema.components import configs
 from aind_data_schema.core import acquisition
 from aind_data_schema_models import units
@@ -28,7 +28,14 @@ from aind_behavior_vr_foraging.data_contract.utils import calculate_consumed_wat
 from aind_behavior_vr_foraging.rig import AindVrForagingRig
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
-from ._utils import TrackedDevices, _get_water_calibration
+from ._repository import (
+    BonsaiEnvironment,
+    RepositoryMetadata,
+    _open_repository,
+    get_bonsai_environment,
+    get_repository_metadata,
+)
+from ._utils import TrackedDevices, _get_water_calibration, get_fields_of_type, load_rig_model
 
 logger = logging.getLogger(__name__)
 
@@ -38,51 +45,72 @@ class AindAcquisitionDataMapper(ads.AindDataSchemaSessionDataMapper):
         self,
         data_path: os.PathLike,
         repository_path: os.PathLike,
-        session_end_time: AwareDatetime,
+        session_end_time: Optional[AwareDatetime] = None,
         curriculum_suggestion: Optional[os.PathLike] | CurriculumSuggestion = None,
         curriculum_repository_path: Optional[os.PathLike] = None,
     ):
         self._data_path = data_path
         self._repository_path = repository_path
         self._curriculum_repository_path = curriculum_repository_path
+        self._curriculum_suggestion_source = curriculum_suggestion
         self.session_end_time = session_end_time
 
-        abs_schemas_path = Path(self._data_path) / "Behavior" / "Logs"
-        self.session_model = model_from_json_file(abs_schemas_path / "session_input.json", Session)
-        self.rig_model = model_from_json_file(abs_schemas_path / "rig_input.json", AindVrForagingRig)
-        self.task_model = model_from_json_file(abs_schemas_path / "tasklogic_input.json", AindVrForagingTaskLogic)
+        self._mapped: Optional[acquisition.Acquisition] = None
+
+    # Inputs and repository metadata are resolved lazily so that constructing a
+    # mapper is cheap, and cached so that each one is only resolved once.
+
+    @cached_property
+    def session_model(self) -> Session:
+        return model_from_json_file(self._schemas_path / "session_input.json", Session)
+
+    @cached_property
+    def rig_model(self) -> AindVrForagingRig:
+        return load_rig_model(self._schemas_path / "rig_input.json")
+
+    @cached_property
+    def task_model(self) -> AindVrForagingTaskLogic:
+        return model_from_json_file(self._schemas_path / "tasklogic_input.json", AindVrForagingTaskLogic)
 
-        self.trainer_state: TrainerState | None = None
+    @cached_property
+    def trainer_state(self) -> Optional[TrainerState]:
         trainer_state_path = Path(self._data_path) / "Behavior" / "trainer_state.json"
-        if trainer_state_path.exists():
-            self.trainer_state = model_from_json_file(
-                trainer_state_path,
-                TrainerState,
-            )
+        if not trainer_state_path.exists():
+            return None
+        return model_from_json_file(trainer_state_path, TrainerState)
 
+    @cached_property
+    def curriculum_suggestion(self) -> Optional[CurriculumSuggestion]:
+        curriculum_suggestion = self._curriculum_suggestion_source
+        if isinstance(curriculum_suggestion, CurriculumSuggestion):
+            return curriculum_suggestion
         if curriculum_suggestion is not None:
-            if isinstance(curriculum_suggestion, CurriculumSuggestion):
-                pass
-            else:
-                curriculum_suggestion = model_from_json_file(Path(curriculum_suggestion), CurriculumSuggestion)
-        else:
-            try:
-                curriculum_suggestion = model_from_json_file(
-                    Path(self._data_path) / "Behavior" / "Logs" / "suggestion.json",
-                    CurriculumSuggestion,
-                )
-            except FileNotFoundError:
-                logger.warning("Curriculum suggestion file not found. Proceeding without it.")
-                curriculum_suggestion = None
-        self.curriculum_suggestion = curriculum_suggestion
-        self.repository = git.Repo(self._repository_path)
-        assert self.repository.working_tree_dir is not None
-        self.bonsai_app = BonsaiApp(
-            executable=Path(self.repository.working_tree_dir) / ".bonsai" / "bonsai.exe",
-            workflow=Path(self.repository.working_tree_dir) / "src" / "main.bonsai",
-        )
+            return model_from_json_file(Path(curriculum_suggestion), CurriculumSuggestion)
+        try:
+            return model_from_json_file(self._schemas_path / "suggestion.json", CurriculumSuggestion)
+        except FileNotFoundError:
+            logger.warning("Curriculum suggestion file not found. Proceeding without it.")
+            return None
 
-        self._mapped: Optional[acquisition.Acquisition] = None
+    @cached_property
+    def repository(self) -> git.Repo:
+        return _open_repository(Path(self._repository_path).resolve())
+
+    @cached_property
+    def repository_metadata(self) -> RepositoryMetadata:
+        return get_repository_metadata(self._repository_path)
+
+    @cached_property
+    def bonsai_environment(self) -> BonsaiEnvironment:
+        return get_bonsai_environment(self._repository_path)
+
+    @cached_property
+    def bonsai_app(self) -> BonsaiApp:
+        return BonsaiApp(executable=self.bonsai_environment.executable, workflow=self.bonsai_environment.workflow)
+
+    @property
+    def _schemas_path(self) -> Path:
+        return Path(self._data_path) / "Behavior" / "Logs"
 
     def session_schema(self):
         return self.mapped
@@ -118,7 +146,7 @@ class AindAcquisitionDataMapper(ads.AindDataSchemaSessionDataMapper):
             subject_id=self.session_model.subject,
             subject_details=self._get_subject_details(),
             instrument_id=self.rig_model.rig_name,
-            acquisition_end_time=self.session_end_time,
+            acquisition_end_time=self.session_end_time or self._stream_bound_times[1],
             acquisition_start_time=self.session_model.date,
             experimenters=self.session_model.experimenter,
             acquisition_type=self.task_model.name,
@@ -384,33 +412,30 @@ class AindAcquisitionDataMapper(ads.AindDataSchemaSessionDataMapper):
         return list(map(_map_camera, _cameras.keys(), _cameras.values()))
 
     def _get_bonsai_as_code(self) -> acquisition.Code:
-        bonsai_folder = Path(self.bonsai_app.executable).parent
-        bonsai_env = data_mapper_helpers.snapshot_bonsai_environment(bonsai_folder / "bonsai.config")
-        bonsai_version = bonsai_env.get("Bonsai", "unknown")
-        assert isinstance(self.repository, git.Repo)
-
+        repository = self.repository_metadata
+        bonsai = self.bonsai_environment
         return acquisition.Code(
-            url=self.repository.remote().url,
+            url=repository.remote_url,
             name="Aind.Behavior.VrForaging",
             version=__semver__,
-            commit_hash=self.repository.head.commit.hexsha,
+            commit_hash=repository.commit_hash,
             language="Bonsai",
-            language_version=bonsai_version,
-            run_script=Path(self.bonsai_app.workflow),
+            language_version=bonsai.version,
+            run_script=bonsai.workflow,
         )
 
     def _get_python_as_code(self) -> acquisition.Code:
-        assert isinstance(self.repository, git.Repo)
+        repository = self.repository_metadata
         # python_env = data_mapper_helpers.snapshot_python_environment()
         v = sys.version_info
         semver = f"{v.major}.{v.minor}.{v.micro}"
         if v.releaselevel != "final":
             semver += f"-{v.releaselevel}.{v.serial}"
         return acquisition.Code(
-            url=self.repository.remote().url,
+            url=repository.remote_url,
             name="aind-behavior-vr-foraging",
             version=__semver__,
-            commit_hash=self.repository.head.commit.hexsha,
+            commit_hash=repository.commit_hash,
             language="Python",
             language_version=semver,
         )
@@ -423,10 +448,10 @@ class AindAcquisitionDataMapper(ads.AindDataSchemaSessionDataMapper):
             or self.curriculum_suggestion.trainer_state.curriculum is None
         ):
             raise ValueError("Trainer state or curriculum is not set in the curriculum suggestion.")
-        repository = git.Repo(self._curriculum_repository_path or self._repository_path)
+        repository = get_repository_metadata(self._curriculum_repository_path or self._repository_path)
         return acquisition.Code(
-            url=repository.remote().url,
-            commit_hash=repository.head.commit.hexsha,
+            url=repository.remote_url,
+            commit_hash=repository.commit_hash,
             name=self.curriculum_suggestion.trainer_state.curriculum.pkg_location,
             version=self.curriculum_suggestion.trainer_state.curriculum.version,
             language="aind-behavior-curriculum",
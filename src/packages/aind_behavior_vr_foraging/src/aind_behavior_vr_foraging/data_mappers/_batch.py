@@ -0,0 +1,161 @@
+import dataclasses
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Optional
+
+from clabe.apps import CurriculumSuggestion
+from pydantic import AwareDatetime
+
+from aind_behavior_vr_foraging.trainer_history import TrainerStateHistory, TrainerStateRecord
+
+from ._acquisition import AindAcquisitionDataMapper
+from ._instrument import AindInstrumentDataMapper
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionMappingResult:
+    """Outcome of mapping a single session."""
+
+    data_path: Path
+    elapsed_seconds: float
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def map_session(
+    data_path: os.PathLike,
+    repository_path: os.PathLike,
+    *,
+    session_end_time: Optional[AwareDatetime] = None,
+    curriculum_suggestion: Optional[os.PathLike] | CurriculumSuggestion = None,
+    curriculum_repository_path: Optional[os.PathLike] = None,
+    instrument_cache_dir: Optional[os.PathLike] = None,
+    trainer_state_history: Optional[os.PathLike] = None,
+    suffix: Optional[str] = "vrforaging",
+) -> None:
+    """Maps a session to aind-data-schema and writes acquisition.json and instrument.json to `data_path`.
+
+    If `trainer_state_history` is given, the curriculum suggestion of the session, if any,
+    is also appended to the `TrainerStateHistory` store at that path.
+    """
+    session_mapper = AindAcquisitionDataMapper(
+        data_path=Path(data_path),
+        repository_path=Path(repository_path),
+        session_end_time=session_end_time,
+        curriculum_repository_path=curriculum_repository_path,
+        curriculum_suggestion=curriculum_suggestion,
+    )
+    session_mapper.map()
+
+    # The rig is parsed once, by the acquisition mapper, and shared with the instrument mapper
+    rig_mapper = AindInstrumentDataMapper(
+        data_path=Path(data_path), cache_dir=instrument_cache_dir, rig_model=session_mapper.rig_model
+    )
+    rig_mapper.map()
+
+    assert session_mapper.mapped is not None
+    assert rig_mapper.mapped is not None
+
+    session_mapper.mapped.instrument_id = rig_mapper.mapped.instrument_id
+    session_mapper.mapped.write_standard_file(output_directory=Path(data_path), filename_suffix=suffix)
+    rig_mapper.mapped.write_standard_file(output_directory=Path(data_path), filename_suffix=suffix)
+
+    if trainer_state_history is not None and (suggestion := session_mapper.curriculum_suggestion) is not None:
+        with TrainerStateHistory(trainer_state_history) as history:
+            history.append(
+                TrainerStateRecord.from_suggestion(
+                    session_mapper.session_model, suggestion.trainer_state, suggestion.metrics, data_path
+                )
+            )
+
+
+def map_sessions(
+    data_paths: Iterable[os.PathLike],
+    repository_path: os.PathLike,
+    *,
+    curriculum_repository_path: Optional[os.PathLike] = None,
+    instrument_cache_dir: Optional[os.PathLike] = None,
+    trainer_state_history: Optional[os.PathLike] = None,
+    suffix: Optional[str] = "vrforaging",
+    max_workers: Optional[int] = None,
+) -> list[SessionMappingResult]:
+    """Maps many sessions in a pool of worker processes.
+
+    Each worker keeps its repository metadata cached across the sessions it
+    maps, and the rig of each session is parsed once. A failing session does not stop the run;
+    its error is reported in the returned results instead.
+
+    Args:
+        data_paths: Paths to the session data directories.
+        repository_path: Path to the repository used to acquire the sessions.
+        curriculum_repository_path: Path to the curriculum repository. Defaults to `repository_path`.
+        instrument_cache_dir: Directory where mapped instruments are cached, shared by all workers.
+        trainer_state_history: Path to a trainer state history store the curriculum suggestions are appended to.
+        suffix: Suffix to append to the output filenames.
+        max_workers: Number of worker processes. If 1, sessions are mapped in the calling process.
+
+    Returns:
+        One result per session, in the order of `data_paths`.
+    """
+    data_paths = [Path(p) for p in data_paths]
+    kwargs = dict(
+        repository_path=Path(repository_path),
+        curriculum_repository_path=curriculum_repository_path,
+        instrument_cache_dir=instrument_cache_dir,
+        trainer_state_history=trainer_state_history,
+        suffix=suffix,
+    )
+    if max_workers == 1:
+        return [_try_map_session(data_path, **kwargs) for data_path in data_paths]
+
+    results: dict[int, SessionMappingResult] = {}
+    # Workers are spawned rather than forked so that no git subprocess or lock
+    # held by the parent leaks into them, matching the behavior on Windows rigs.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(_try_map_session, data_path, **kwargs): i for i, data_path in enumerate(data_paths)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            logger.info(
+                "[%d/%d] %s %s",
+                len(results),
+                len(data_paths),
+                "Mapped" if result.succeeded else "Failed to map",
+                result.data_path,
+            )
+    return [results[i] for i in range(len(data_paths))]
+
+
+def format_summary(results: list[SessionMappingResult]) -> str:
+    """Renders mapping results as a plain-text table."""
+    width = max([len(str(r.data_path)) for r in results] + [len("session")])
+    lines = [f"{'session':<{width}}  {'status':<6}  {'time (s)':>8}  error"]
+    for r in results:
+        status = "ok" if r.succeeded else "failed"
+        error = "" if r.error is None else r.error.strip().splitlines()[-1]
+        lines.append(f"{str(r.data_path):<{width}}  {status:<6}  {r.elapsed_seconds:>8.2f}  {error}")
+    n_failed = sum(not r.succeeded for r in results)
+    lines.append(f"{len(results) - n_failed} of {len(results)} sessions mapped successfully.")
+    return "\n".join(lines)
+
+
+def _try_map_session(data_path: Path, **kwargs) -> SessionMappingResult:
+    start = time.perf_counter()
+    try:
+        map_session(data_path, **kwargs)
+    except Exception:  # errors are collected and reported per session
+        logger.error("Failed to map session %s.", data_path, exc_info=True)
+        return SessionMappingResult(
+            data_path=data_path, elapsed_seconds=time.perf_counter() - start, error=traceback.format_exc()
+        )
+    return SessionMappingResult(data_path=data_path, elapsed_seconds=time.perf_counter() - start)
@@ -1,4 +1,6 @@
 import dataclasses
+import hashlib
+import json
 import logging
 import os
 import platform
@@ -8,7 +10,6 @@ from typing import Optional, cast
 
 from aind_behavior_services.common import Vector3
 from aind_behavior_services.rig import cameras, olfactometer, visual_stimulation
-from aind_behavior_services.utils import model_from_json_file
 from aind_data_schema.base import GenericModel
 from aind_data_schema.components import connections, coordinates, devices, measurements
 from aind_data_schema.core import instrument
@@ -16,12 +17,37 @@ from aind_data_schema_models import coordinates as aind_schema_model_coordinates
 from aind_data_schema_models import modalities, units
 from clabe.data_mapper import aind_data_schema as ads
 
+from aind_behavior_vr_foraging import __semver__
+from aind_behavior_vr_foraging.hashing import canonical_json
 from aind_behavior_vr_foraging.rig import AindVrForagingRig
 
-from ._utils import TrackedDevices, _make_origin_coordinate_system, utcnow
+from ._utils import TrackedDevices, _make_origin_coordinate_system, has_undated_calibrations, load_rig_model, utcnow
 
 logger = logging.getLogger(__name__)
 
+_instrument_cache: dict[str, instrument.Instrument] = {}
+
+
+def instrument_cache_key(rig_path: os.PathLike) -> str:
+    """Returns the key under which the instrument mapped from `rig_path` is cached.
+
+    The key is a hash of the canonical form of the rig json (so formatting and
+    key order do not matter), the mapper version and the host platform, which is
+    recorded in the instrument's computer.
+    """
+    with open(rig_path, "r", encoding="utf-8") as f:
+        canonical = canonical_json(json.load(f), exact=True)
+    digest = hashlib.sha256()
+    for part in (canonical, __semver__, platform.platform()):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def clear_instrument_cache() -> None:
+    """Drops all instruments cached in memory. Instruments persisted to disk are kept."""
+    _instrument_cache.clear()
+
 
 @dataclasses.dataclass(frozen=True)
 class _DeviceNode:
@@ -43,21 +69,61 @@ class AindInstrumentDataMapper(ads.AindDataSchemaRigDataMapper):
     def __init__(
         self,
         data_path: os.PathLike,
+        cache_dir: Optional[os.PathLike] = None,
+        rig_model: Optional[AindVrForagingRig] = None,
     ):
+        """Maps the rig configuration of a session to an aind-data-schema Instrument.
+
+        Mapped instruments are cached by the content of `rig_input.json` and the
+        mapper version. The cache always lives in memory and, if `cache_dir` is
+        given, is also persisted to disk so it can be shared across processes and runs.
+        Rigs with undated calibrations are always mapped again, since those are dated
+        at the time of mapping.
+
+        Args:
+            data_path: Path to the session data directory.
+            cache_dir: Optional directory where mapped instruments are persisted.
+            rig_model: The rig model of `rig_input.json`, if already loaded, e.g. by the
+                acquisition mapper of the same session. Loaded from the file otherwise.
+        """
         super().__init__()
         self._data_path = Path(data_path)
+        self._cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._rig_model = rig_model
         self._mapped: Optional[instrument.Instrument] = None
 
     def rig_schema(self):
         return self.mapped
 
+    @property
+    def rig_model(self) -> AindVrForagingRig:
+        if self._rig_model is None:
+            self._rig_model = load_rig_model(self._rig_path)
+        return self._rig_model
+
+    @property
+    def _rig_path(self) -> Path:
+        return self._data_path / "Behavior" / "Logs" / "rig_input.json"
+
     @property
     def session_name(self):
         raise NotImplementedError("Method not implemented.")
 
     def map(self) -> instrument.Instrument:
         logger.info("Mapping aind-data-schema Rig.")
-        self._mapped = self._map(self._data_path)
+        if has_undated_calibrations(self.rig_model):
+            # Undated calibrations are dated at the time of mapping, which a cached instrument would freeze
+            logger.debug("Rig has undated calibrations. Not using the instrument cache.")
+            self._mapped = self._map(self.rig_model)
+            return self.mapped
+        cache_key = instrument_cache_key(self._rig_path)
+        cached = self._read_cache(cache_key)
+        if cached is not None:
+            logger.debug("Using cached instrument %s.", cache_key)
+            self._mapped = cached.model_copy(update={"modification_date": utcnow().date()}, deep=True)
+        else:
+            self._mapped = self._map(self.rig_model)
+            self._write_cache(cache_key, self._mapped)
         return self.mapped
 
     @property
@@ -69,12 +135,34 @@ class AindInstrumentDataMapper(ads.AindDataSchemaRigDataMapper):
     def is_mapped(self) -> bool:
         return self.mapped is not None
 
+    def _read_cache(self, cache_key: str) -> Optional[instrument.Instrument]:
+        # Instruments cached in memory are already validated, and must be copied before they are returned
+        cached = _instrument_cache.get(cache_key)
+        if cached is None and self._cache_dir is not None:
+            cache_file = self._cache_dir / f"{cache_key}.json"
+            if cache_file.exists():
+                cached = _instrument_cache[cache_key] = instrument.Instrument.model_validate_json(
+                    cache_file.read_text(encoding="utf-8")
+                )
+        return cached
+
+    def _write_cache(self, cache_key: str, mapped: instrument.Instrument) -> None:
+        if not isinstance(mapped, instrument.Instrument):
+            return
+        _instrument_cache[cache_key] = mapped.model_copy(deep=True)
+        if self._cache_dir is not None:
+            serialized = mapped.model_dump_json()
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_dir / f"{cache_key}.json"
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(serialized, encoding="utf-8")
+            os.replace(tmp_file, cache_file)
+
     # From here on, private methods only!
     # Lasciate ogne speranza, voi ch'entrate
 
     @classmethod
-    def _map(cls, root_path: os.PathLike) -> instrument.Instrument:
-        rig = model_from_json_file(Path(root_path) / "Behavior" / "Logs" / "rig_input.json", AindVrForagingRig)
+    def _map(cls, rig: AindVrForagingRig) -> instrument.Instrument:
         _modalities = [modalities.Modality.BEHAVIOR, modalities.Modality.BEHAVIOR_VIDEOS]
         _components, _connections = cls._get_all_components_and_connections(rig)
         _calibrations: list[measurements.Calibration] = cls._get_calibrations(rig)
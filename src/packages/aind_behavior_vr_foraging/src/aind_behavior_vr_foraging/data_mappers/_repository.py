@@ -0,0 +1,98 @@
+import dataclasses
+import functools
+import logging
+import os
+from pathlib import Path
+
+import git
+from clabe.apps import BonsaiApp
+from clabe.data_mapper import helpers as data_mapper_helpers
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class RepositoryMetadata:
+    """Snapshot of the git repository used to acquire (or evaluate) a session."""
+
+    working_tree_dir: Path
+    remote_url: str
+    commit_hash: str
+    is_dirty: bool
+
+
+@dataclasses.dataclass(frozen=True)
+class BonsaiEnvironment:
+    """Snapshot of the Bonsai environment shipped with a repository checkout."""
+
+    executable: Path
+    workflow: Path
+    version: str
+
+
+def get_repository_metadata(repository_path: os.PathLike) -> RepositoryMetadata:
+    """Returns the metadata of the repository at `repository_path`.
+
+    Results are cached per repository path and HEAD commit, so mapping many
+    sessions from the same checkout only inspects the repository once.
+    """
+    repository = _open_repository(Path(repository_path).resolve())
+    return _resolve_repository_metadata(_working_tree_dir(repository), repository.head.commit.hexsha)
+
+
+def get_bonsai_environment(repository_path: os.PathLike) -> BonsaiEnvironment:
+    """Returns the Bonsai environment of the repository at `repository_path`.
+
+    Results are cached per repository path and HEAD commit.
+
+    Raises:
+        FileNotFoundError: If the Bonsai executable or workflow cannot be found.
+    """
+    repository = _open_repository(Path(repository_path).resolve())
+    return _resolve_bonsai_environment(_working_tree_dir(repository), repository.head.commit.hexsha)
+
+
+def clear_repository_cache() -> None:
+    """Drops all cached repositories and metadata."""
+    _open_repository.cache_clear()
+    _resolve_repository_metadata.cache_clear()
+    _resolve_bonsai_environment.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _open_repository(repository_path: Path) -> git.Repo:
+    return git.Repo(repository_path)
+
+
+def _working_tree_dir(repository: git.Repo) -> Path:
+    if repository.working_tree_dir is None:
+        raise ValueError(f"Repository {repository.git_dir} does not have a working tree.")
+    return Path(repository.working_tree_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_repository_metadata(working_tree_dir: Path, head: str) -> RepositoryMetadata:
+    repository = _open_repository(working_tree_dir)
+    is_dirty = repository.is_dirty(untracked_files=False)
+    if is_dirty:
+        logger.warning("Repository %s has uncommitted changes on top of %s.", working_tree_dir, head)
+    return RepositoryMetadata(
+        working_tree_dir=working_tree_dir,
+        remote_url=repository.remote().url,
+        commit_hash=head,
+        is_dirty=is_dirty,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_bonsai_environment(working_tree_dir: Path, head: str) -> BonsaiEnvironment:
+    bonsai_app = BonsaiApp(
+        executable=working_tree_dir / ".bonsai" / "bonsai.exe",
+        workflow=working_tree_dir / "src" / "main.bonsai",
+    )
+    bonsai_env = data_mapper_helpers.snapshot_bonsai_environment(Path(bonsai_app.executable).parent / "bonsai.config")
+    return BonsaiEnvironment(
+        executable=Path(bonsai_app.executable),
+        workflow=Path(bonsai_app.workflow),
+        version=bonsai_env.get("Bonsai", "unknown"),
+    )
@@ -1,10 +1,14 @@
 import enum
+import functools
 import logging
-from typing import List, Type, TypeVar, Union
+import os
+import types
+import typing
+from typing import Any, List, Literal, Optional, Type, TypeVar, Union
 
 import aind_behavior_services.rig.water_valve as water_valve
 import pydantic
-from aind_behavior_services.utils import get_fields_of_type, utcnow
+from aind_behavior_services.utils import model_from_json_file, utcnow
 from aind_data_schema.components import coordinates, measurements
 from aind_data_schema.core import acquisition
 from aind_data_schema_models import units
@@ -30,6 +34,107 @@ def coerce_to_aind_data_schema(value: Union[pydantic.BaseModel, dict], target_ty
     return target_type(**_normalized_input)
 
 
+def load_rig_model(path: os.PathLike) -> AindVrForagingRig:
+    """Loads a rig model from a json file."""
+    return model_from_json_file(path, AindVrForagingRig)
+
+
+def get_fields_of_type(
+    searchable: Union[pydantic.BaseModel, dict, list],
+    target_type: Type[T],
+    *,
+    stop_recursion_on_type: bool = True,
+) -> list[tuple[Optional[str], T]]:
+    """Recursively finds all fields of `target_type` in `searchable`.
+
+    Behaves like `aind_behavior_services.utils.get_fields_of_type`, but pydantic
+    models are only searched through the fields whose annotation can hold a
+    `target_type`. These traversal plans are computed once per model class and
+    target type, so repeated lookups cost in proportion to the matches rather
+    than to the size of the model.
+
+    Plans are derived from the declared field annotations. Values that are not
+    instances of their annotated type (e.g. a subclass instance with additional
+    fields, assigned without validation) may not be searched.
+    """
+    result: list[tuple[Optional[str], T]] = []
+    _collect_fields_of_type(searchable, target_type, stop_recursion_on_type, result)
+    return result
+
+
+def _collect_fields_of_type(
+    searchable: Union[pydantic.BaseModel, dict, list],
+    target_type: Type[T],
+    stop_recursion_on_type: bool,
+    result: list[tuple[Optional[str], T]],
+) -> None:
+    _iterable: typing.Iterable[tuple[Optional[str], typing.Any]]
+    if isinstance(searchable, dict):
+        _iterable = searchable.items()
+    elif isinstance(searchable, list):
+        _iterable = ((None, value) for value in searchable)
+    elif isinstance(searchable, pydantic.BaseModel):
+        _iterable = ((name, getattr(searchable, name)) for name in _traversal_plan(type(searchable), target_type))
+    else:
+        raise ValueError(f"Unsupported model type: {type(searchable)}")
+
+    for name, field in _iterable:
+        is_type = isinstance(field, target_type)
+        if is_type:
+            result.append((name, field))
+        if isinstance(field, (pydantic.BaseModel, dict, list)) and not (stop_recursion_on_type and is_type):
+            _collect_fields_of_type(field, target_type, stop_recursion_on_type, result)
+
+
+@functools.lru_cache(maxsize=None)
+def _traversal_plan(model_type: Type[pydantic.BaseModel], target_type: type) -> tuple[str, ...]:
+    """Returns the names of the fields of `model_type` that can hold a `target_type`, directly or nested."""
+    return tuple(
+        name
+        for name, field_info in model_type.model_fields.items()
+        if _annotation_can_hold(field_info.annotation, target_type, frozenset({model_type}))
+    )
+
+
+def _annotation_can_hold(annotation: Any, target_type: type, visited: frozenset[type]) -> bool:
+    if annotation is None or annotation is type(None):
+        return False
+    if annotation is Any:
+        return True
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Annotated:
+        return _annotation_can_hold(args[0], target_type, visited)
+    if origin is Union or origin is types.UnionType:
+        return any(_annotation_can_hold(arg, target_type, visited) for arg in args)
+    if origin is Literal:
+        return any(isinstance(arg, target_type) for arg in args)
+    if origin is list and len(args) == 1:
+        return _annotation_can_hold(args[0], target_type, visited)
+    if origin is dict and len(args) == 2:
+        return _annotation_can_hold(args[1], target_type, visited)
+    if origin is not None:
+        # Other generics are not searched into, only matched as a whole.
+        return not isinstance(origin, type) or issubclass(origin, (list, dict)) or _is_related(origin, target_type)
+    if not isinstance(annotation, type):
+        # TypeVars, forward references and the like: assume the worst.
+        return True
+    if _is_related(annotation, target_type) or issubclass(annotation, (list, dict)):
+        return True
+    if issubclass(annotation, pydantic.BaseModel):
+        if annotation in visited:
+            return False
+        return any(
+            _annotation_can_hold(field_info.annotation, target_type, visited | {annotation})
+            for field_info in annotation.model_fields.values()
+        )
+    return False
+
+
+def _is_related(cls: type, target_type: type) -> bool:
+    return issubclass(cls, target_type) or issubclass(target_type, cls)
+
+
 def _get_water_calibration(rig_model: AindVrForagingRig) -> List[measurements.VolumeCalibration]:
     def _mapper(
         device_name: str, water_calibration: water_valve.WaterValveCalibration
@@ -80,6 +185,16 @@ def _get_treadmill_brake_calibration(rig_model: AindVrForagingRig) -> List[measu
     return [calibration_ads]
 
 
+def has_undated_calibrations(rig_model: AindVrForagingRig) -> bool:
+    """Returns whether any calibration mapped from the rig has no date, and so is dated at the time of mapping."""
+    treadmill_calibration = rig_model.harp_treadmill.calibration
+    if treadmill_calibration is not None and not treadmill_calibration.date:
+        return True
+    return any(
+        not calibration.date for _, calibration in get_fields_of_type(rig_model, water_valve.WaterValveCalibration)
+    )
+
+
 def _make_origin_coordinate_system() -> coordinates.CoordinateSystem:
     return coordinates.CoordinateSystem(
         name="origin",
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import math
+from typing import Any
+
+import pydantic
+
+FLOAT_SIGNIFICANT_DIGITS = 12
+"""Number of significant digits floats are rounded to, so arithmetic noise does not change digests."""
+
+NON_SEMANTIC_FIELDS = frozenset({"description"})
+"""Fields of models that document them without changing their behavior, which are left out of canonical forms."""
+
+
+def canonicalize(value: Any, *, exact: bool = False) -> Any:
+    """Returns the canonical json form of a model or json document.
+
+    Models, e.g. `AindVrForagingTaskLogic`, `AindVrForagingRig` or any of their
+    sub-models, are dumped to json first. Unless `exact` is set:
+
+    - fields in `NON_SEMANTIC_FIELDS` are dropped from the model and its sub-models.
+      Keys of dictionaries and json documents are kept, whatever their name, since
+      they may hold data, e.g. a serialized trainer state;
+    - floats are rounded to `FLOAT_SIGNIFICANT_DIGITS` significant digits, and
+      integral floats are converted to integers, so e.g. `1.0` and `1` are equal.
+
+    Keys are sorted when the canonical form is serialized by `canonical_json`.
+
+    Args:
+        value: The model or json document.
+        exact: If True, the document is kept as is, so only formatting and key
+            order are disregarded. Use it where the canonical form must identify
+            the document exactly, e.g. to identify revisions of it.
+
+    Returns:
+        The canonical json document.
+    """
+    if isinstance(value, pydantic.BaseModel):
+        document = value.model_dump(mode="json")
+        value = document if exact else _drop_non_semantic_fields(value, document)
+    return value if exact else _normalize(value)
+
+
+def canonical_json(value: Any, *, exact: bool = False) -> str:
+    """Returns the canonical serialization of a model or json document. See `canonicalize`."""
+    return json.dumps(canonicalize(value, exact=exact), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_digest(value: Any, *, exact: bool = False) -> str:
+    """Returns a stable sha256 digest of a model or json document, for use as a cache or deduplication key.
+
+    Models and json documents with the same canonical form have the same digest,
+    regardless of formatting, key order and, unless `exact` is set, descriptions
+    of models and float rounding noise. See `canonicalize`.
+
+    Examples:
+        ```python
+        key = canonical_digest(task_logic)
+        assert key == canonical_digest(task_logic.model_copy(update={"description": "Another description"}))
+        ```
+    """
+    return hashlib.sha256(canonical_json(value, exact=exact).encode("utf-8")).hexdigest()
+
+
+def _drop_non_semantic_fields(value: Any, document: Any) -> Any:
+    """Drops `NON_SEMANTIC_FIELDS` of the models in `value` from `document`, its json dump, in place.
+
+    The model and its dump are walked together, so only keys that dump model fields are dropped.
+    """
+    if isinstance(value, pydantic.RootModel):
+        return _drop_non_semantic_fields(value.root, document)
+    if isinstance(value, pydantic.BaseModel):
+        if not isinstance(document, dict):  # e.g. a model with a custom serializer
+            return document
+        for name, field in type(value).model_fields.items():
+            key = name if name in document else field.serialization_alias or field.alias
+            if key not in document:
+                continue
+            if name in NON_SEMANTIC_FIELDS:
+                del document[key]
+            else:
+                # Read from the instance dictionary, since reading deprecated fields warns
+                document[key] = _drop_non_semantic_fields(value.__dict__.get(name), document[key])
+        return document
+    if isinstance(value, (list, tuple, set, frozenset)) and isinstance(document, list) and len(value) == len(document):
+        for i, item in enumerate(value):
+            document[i] = _drop_non_semantic_fields(item, document[i])
+    elif isinstance(value, dict) and isinstance(document, dict) and len(value) == len(document):
+        # Keys may be serialized differently, e.g. enums, but keep their order
+        for key, item in zip(document, value.values()):
+            document[key] = _drop_non_semantic_fields(item, document[key])
+    return document
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float) and math.isfinite(value):
+        value = float(f"{value:.{FLOAT_SIGNIFICANT_DIGITS}g}")
+        return int(value) if value.is_integer() else value
+    return value
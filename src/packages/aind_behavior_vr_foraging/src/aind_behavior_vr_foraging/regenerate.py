@@ -1,37 +1,233 @@
+import ast
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterable, List, Optional, Union
 
 import pydantic
-from aind_behavior_services.schema import BonsaiSgenSerializers, convert_pydantic_to_bonsai
+from aind_behavior_services.schema import BonsaiSgenSerializers, bonsai_sgen, export_schema
 from aind_behavior_services.session import Session
+from aind_behavior_services.utils import snake_to_pascal_case
 
 import aind_behavior_vr_foraging.rig
 import aind_behavior_vr_foraging.task_logic
 
+logger = logging.getLogger(__name__)
+
 SCHEMA_ROOT = Path("./schema/")
 EXTENSIONS_ROOT = Path("./src/Extensions/")
 NAMESPACE_PREFIX = "AindVrForagingDataSchema"
+MODEL_NAME = "aind_behavior_vr_foraging"
+MODELS = (
+    aind_behavior_vr_foraging.task_logic.AindVrForagingTaskLogic,
+    aind_behavior_vr_foraging.rig.AindVrForagingRig,
+    Session,
+    aind_behavior_vr_foraging.task_logic.VirtualSite,
+    aind_behavior_vr_foraging.task_logic.VisualCorridor,
+)
+
+FINGERPRINTS_FILE = f"{MODEL_NAME}.fingerprints.json"
+"""Fingerprints of the inputs and output, and the distribution versions, of the last export of the json schema.
+
+Saved next to the schema file.
+"""
+
+SOURCE_PACKAGES = ("aind_behavior_vr_foraging",)
+"""Packages whose source files are fingerprinted as inputs of the models that import them."""
+
+DISTRIBUTIONS = ("aind-behavior-vr-foraging", "aind-behavior-services", "pydantic")
+"""Distributions whose versions are recorded as inputs of the json schema, e.g. since the version of the models is serialized."""
+
+
+def fingerprint(content: str) -> str:
+    """Returns the sha256 fingerprint of the content of a generated output."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def is_up_to_date(path: Path, content: str) -> bool:
+    """Returns whether the file at `path` exists and holds `content`."""
+    try:
+        return Path(path).read_text(encoding="utf-8") == content
+    except FileNotFoundError:
+        return False
+
+
+def input_fingerprint() -> str:
+    """Returns the fingerprint of the sources the json schema is generated from, without building it.
+
+    These are the source files of the modules that define `MODELS`, and of the modules they
+    import at module level, from `SOURCE_PACKAGES`. The versions of the installed distributions
+    are recorded separately, see `distribution_versions`.
+    """
+    files: Dict[str, Path] = {}
+    for module in sorted({model.__module__ for model in MODELS}):
+        files.update(source_files(module, SOURCE_PACKAGES))
+    digest = hashlib.sha256()
+    for module, path in sorted(files.items()):
+        digest.update(f"{module}\n".encode("utf-8"))
+        digest.update(path.read_bytes().replace(b"\r\n", b"\n"))
+    return digest.hexdigest()
+
+
+def distribution_versions(distributions: Iterable[str] = DISTRIBUTIONS) -> Dict[str, Optional[str]]:
+    """Returns the installed version of each distribution, or None for those not installed."""
+    return {distribution: _distribution_version(distribution) for distribution in distributions}
+
+
+def source_files(module: str, packages: Iterable[str] = SOURCE_PACKAGES) -> Dict[str, Path]:
+    """Returns the source files of a module and of the modules it imports at module level, from `packages`.
+
+    Imports are found by parsing the source files, so no module is imported. Imports
+    within functions, or only done for type checking, are not followed.
+
+    Returns:
+        The source file of each module, by module name.
+    """
+    roots = {}
+    for package in packages:
+        spec = importlib.util.find_spec(package)
+        if spec is not None and spec.submodule_search_locations:
+            roots[package] = Path(list(spec.submodule_search_locations)[0]).parent
+
+    files: Dict[str, Path] = {}
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in files or (path := _module_path(name, roots)) is None:
+            continue
+        files[name] = path
+        parts = name.split(".")
+        pending += [".".join(parts[:i]) for i in range(1, len(parts))]
+        package = name if path.name == "__init__.py" else name.rpartition(".")[0]
+        for imported in _module_level_imports(ast.parse(path.read_bytes()).body, package):
+            pending.append(imported)
+    return files
+
+
+def build_schema() -> str:
+    """Returns the json schema published for the vr-foraging models."""
+    return export_schema(pydantic.RootModel[Union[MODELS]])
+
+
+def main(check: bool = False) -> List[Path]:
+    """Regenerates the json schema and C# extensions of the vr-foraging models.
+
+    The json schema is only built when its inputs or the schema file changed since its
+    last export, according to their fingerprints, and only rewritten when it differs from
+    the schema on disk. The C# extensions, which are generated from it, are only
+    regenerated when the schema was rewritten or they are missing.
+
+    In check mode, e.g. in CI, the installed versions of `DISTRIBUTIONS` are not compared,
+    so environments that resolved other versions than the one the schema was exported
+    from can check it.
+
+    Args:
+        check: If True, no output is written and the outdated outputs are only reported.
+
+    Returns:
+        The outputs that were, or in check mode would be, regenerated.
+    """
+    schema_path = SCHEMA_ROOT / f"{MODEL_NAME}.json"
+    extensions_path = EXTENSIONS_ROOT / f"{snake_to_pascal_case(MODEL_NAME)}.Generated.cs"
+    fingerprints = _read_fingerprints(SCHEMA_ROOT)
+    inputs = input_fingerprint()
+
+    schema = None
+    outdated = []
+    if (
+        fingerprints.get("inputs") != inputs
+        or (not check and fingerprints.get("versions") != distribution_versions())
+        or not _has_fingerprint(schema_path, fingerprints.get("output"))
+    ):
+        schema = build_schema()
+        if not is_up_to_date(schema_path, schema):
+            outdated += [schema_path, extensions_path]
+    if schema_path not in outdated and not extensions_path.exists():
+        outdated.append(extensions_path)
+
+    for path in outdated:
+        logger.info("%s %s", "Outdated:" if check else "Regenerating", path)
+    if check:
+        return outdated
+
+    if schema_path in outdated:
+        schema_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(schema_path, "w", encoding="utf-8") as f:
+            f.write(schema)
+    if schema is not None:
+        with open(SCHEMA_ROOT / FINGERPRINTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {"inputs": inputs, "versions": distribution_versions(), "output": fingerprint(schema)}, f, indent=4
+            )
+            f.write("\n")
+    if extensions_path in outdated:
+        bonsai_sgen(
+            schema_path=schema_path,
+            output_path=extensions_path,
+            namespace=NAMESPACE_PREFIX,
+            serializer=[BonsaiSgenSerializers.JSON],
+            root_element="Root",
+        )
+    return outdated
+
+
+def _read_fingerprints(root: Path) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(root / FINGERPRINTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _has_fingerprint(path: Path, expected: Optional[str]) -> bool:
+    try:
+        return expected is not None and fingerprint(path.read_text(encoding="utf-8")) == expected
+    except FileNotFoundError:
+        return False
+
+
+def _distribution_version(distribution: str) -> Optional[str]:
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _module_path(module: str, roots: Dict[str, Path]) -> Optional[Path]:
+    root = roots.get(module.partition(".")[0])
+    if root is None:
+        return None
+    base = root.joinpath(*module.split("."))
+    for path in (base / "__init__.py", base.with_suffix(".py")):
+        if path.is_file():
+            return path
+    return None
 
 
-def main():
-    models = [
-        aind_behavior_vr_foraging.task_logic.AindVrForagingTaskLogic,
-        aind_behavior_vr_foraging.rig.AindVrForagingRig,
-        Session,
-        aind_behavior_vr_foraging.task_logic.VirtualSite,
-        aind_behavior_vr_foraging.task_logic.VisualCorridor,
-    ]
-    model = pydantic.RootModel[Union[tuple(models)]]
-
-    convert_pydantic_to_bonsai(
-        model,
-        model_name="aind_behavior_vr_foraging",
-        root_element="Root",
-        cs_namespace=NAMESPACE_PREFIX,
-        json_schema_output_dir=SCHEMA_ROOT,
-        cs_output_dir=EXTENSIONS_ROOT,
-        cs_serializer=[BonsaiSgenSerializers.JSON],
-    )
+def _module_level_imports(statements: List[ast.stmt], package: str) -> List[str]:
+    """Returns the modules imported by statements, and by the blocks they contain other than type checking ones."""
+    imported = []
+    for statement in statements:
+        if isinstance(statement, ast.Import):
+            imported += [alias.name for alias in statement.names]
+        elif isinstance(statement, ast.ImportFrom):
+            if statement.level:
+                base = package.rsplit(".", statement.level - 1)[0] if statement.level > 1 else package
+                base = f"{base}.{statement.module}" if statement.module else base
+            else:
+                base = statement.module or ""
+            # Imported names may be submodules, which are skipped later if they are not
+            imported += [base] + [f"{base}.{alias.name}" for alias in statement.names]
+        elif isinstance(statement, ast.If):
+            if "TYPE_CHECKING" not in ast.unparse(statement.test):
+                imported += _module_level_imports(statement.body + statement.orelse, package)
+        elif isinstance(statement, ast.Try):
+            blocks = statement.body + statement.orelse + statement.finalbody
+            imported += _module_level_imports(blocks + [s for h in statement.handlers for s in h.body], package)
+    return imported
 
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+import json
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from aind_behavior_vr_foraging.hashing import canonical_digest
+from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+JsonDocument = Dict[str, Any]
+
+
+class PatchOperation(BaseModel):
+    """A single JSON Patch (RFC 6902) operation."""
+
+    op: Literal["add", "remove", "replace"] = Field(description="Operation to apply at `path`")
+    path: str = Field(description="JSON pointer (RFC 6901) to the target location")
+    value: Any = Field(default=None, description="Value to add or replace with. Ignored by 'remove'")
+
+
+class Revision(BaseModel):
+    """A task logic revision, stored either as a full document or as a delta against its parent."""
+
+    parent: Optional[str] = Field(default=None, description="Id of the parent revision")
+    delta: List[PatchOperation] = Field(default_factory=list, description="Operations that apply to the parent")
+    document: Optional[JsonDocument] = Field(default=None, description="Full document, for snapshot revisions")
+    depth: int = Field(default=0, ge=0, description="Number of deltas since the last snapshot revision")
+
+
+def diff(parent: Any, child: Any, path: str = "") -> List[PatchOperation]:
+    """Computes the JSON Patch operations that transform the `parent` document into `child`.
+
+    Objects are compared key by key and arrays index by index, so only the values
+    that changed are emitted. Elements added to or removed from the end of an
+    array are emitted as 'add' and 'remove' operations.
+
+    Args:
+        parent: The source json document.
+        child: The target json document.
+        path: JSON pointer of the documents, when diffing sub-documents.
+
+    Returns:
+        The operations, in the order they must be applied.
+    """
+    operations: List[PatchOperation] = []
+    _diff(parent, child, path, operations)
+    return operations
+
+
+def apply_patch(document: Any, operations: Iterable[PatchOperation]) -> Any:
+    """Applies JSON Patch operations to a json document.
+
+    `document` is not modified. Only the objects and arrays along the patched
+    paths are copied, so the result shares unchanged sub-documents with `document`.
+
+    Raises:
+        ValueError: If an operation targets a location that does not exist.
+    """
+    for operation in operations:
+        document = _apply(document, _parse_pointer(operation.path), operation)
+    return document
+
+
+class RevisionStore(BaseModel):
+    """Stores task logic revisions as compact deltas against their parent revisions.
+
+    Revisions are identified by a hash of the canonical form of their document,
+    so adding an already stored task logic returns the existing revision. Every
+    `snapshot_interval` deltas a full document is stored instead, which bounds the
+    number of deltas applied to materialize a revision.
+
+    The store is a pydantic model, so it can be persisted with `model_dump_json`
+    and restored with `model_validate_json`.
+    """
+
+    snapshot_interval: int = Field(default=32, ge=1, description="Maximum number of chained deltas")
+    revisions: Dict[str, Revision] = Field(default_factory=dict, description="Revisions by id")
+
+    _documents: Dict[str, JsonDocument] = PrivateAttr(default_factory=dict)
+
+    def add(self, task_logic: AindVrForagingTaskLogic | JsonDocument, parent: Optional[str] = None) -> str:
+        """Stores a revision and returns its id.
+
+        Args:
+            task_logic: The task logic, as a model or as its json document.
+            parent: Id of the revision `task_logic` was derived from. Revisions
+                without a parent are stored as full documents.
+
+        Returns:
+            The id of the revision.
+        """
+        if isinstance(task_logic, AindVrForagingTaskLogic):
+            document = json.loads(task_logic.model_dump_json())
+        else:
+            document = json.loads(json.dumps(task_logic))
+        revision_id = canonical_digest(document, exact=True)
+        if revision_id in self.revisions:
+            return revision_id
+
+        if parent is None:
+            revision = Revision(document=document)
+        else:
+            depth = self._get_revision(parent).depth + 1
+            if depth >= self.snapshot_interval:
+                revision = Revision(parent=parent, document=document)
+            else:
+                delta = diff(self._materialize(parent), document)
+                revision = Revision(parent=parent, delta=delta, depth=depth)
+        self.revisions[revision_id] = revision
+        self._documents[revision_id] = document
+        return revision_id
+
+    def document(self, revision_id: str) -> JsonDocument:
+        """Returns a copy of the json document of a revision."""
+        return json.loads(json.dumps(self._materialize(revision_id)))
+
+    def get(self, revision_id: str) -> AindVrForagingTaskLogic:
+        """Returns the task logic of a revision."""
+        return AindVrForagingTaskLogic.model_validate_json(json.dumps(self._materialize(revision_id)))
+
+    def changes(self, revision_id: str, since: Optional[str] = None) -> List[PatchOperation]:
+        """Returns the operations that transform revision `since` into `revision_id`.
+
+        Args:
+            revision_id: Id of the revision.
+            since: Id of the revision to compare against. Defaults to the parent revision.
+
+        Returns:
+            The operations. All of the document is reported as added for revisions without a parent.
+        """
+        revision = self._get_revision(revision_id)
+        if since is None:
+            if revision.document is None:
+                return list(revision.delta)
+            since_document = self._materialize(revision.parent) if revision.parent is not None else {}
+        else:
+            since_document = self._materialize(since)
+        return diff(since_document, self._materialize(revision_id))
+
+    def history(self, revision_id: str) -> List[str]:
+        """Returns the ids of a revision and its ancestors, from the oldest ancestor."""
+        history = [revision_id]
+        parent = self._get_revision(revision_id).parent
+        while parent is not None:
+            history.append(parent)
+            parent = self._get_revision(parent).parent
+        return history[::-1]
+
+    def _get_revision(self, revision_id: str) -> Revision:
+        try:
+            return self.revisions[revision_id]
+        except KeyError:
+            raise KeyError(f"Unknown revision: {revision_id}") from None
+
+    def _materialize(self, revision_id: str) -> JsonDocument:
+        document = self._documents.get(revision_id)
+        if document is not None:
+            return document
+        pending = []
+        revision = self._get_revision(revision_id)
+        while revision.document is None:
+            pending.append(revision)
+            if revision.parent is None:
+                raise ValueError(f"Revision {revision_id} has neither a document nor a parent.")
+            revision = self._get_revision(revision.parent)
+        document = revision.document
+        for revision in reversed(pending):
+            document = apply_patch(document, revision.delta)
+        self._documents[revision_id] = document
+        return document
+
+
+def _diff(parent: Any, child: Any, path: str, operations: List[PatchOperation]) -> None:
+    if isinstance(parent, dict) and isinstance(child, dict):
+        for key in parent:
+            if key not in child:
+                operations.append(PatchOperation(op="remove", path=f"{path}/{_escape(key)}"))
+        for key, value in child.items():
+            if key not in parent:
+                operations.append(PatchOperation(op="add", path=f"{path}/{_escape(key)}", value=value))
+            else:
+                _diff(parent[key], value, f"{path}/{_escape(key)}", operations)
+    elif isinstance(parent, list) and isinstance(child, list):
+        for i in range(min(len(parent), len(child))):
+            _diff(parent[i], child[i], f"{path}/{i}", operations)
+        for i in range(len(parent), len(child)):
+            operations.append(PatchOperation(op="add", path=f"{path}/{i}", value=child[i]))
+        for i in range(len(parent) - 1, len(child) - 1, -1):
+            operations.append(PatchOperation(op="remove", path=f"{path}/{i}"))
+    elif type(parent) is not type(child) or parent != child:
+        operations.append(PatchOperation(op="replace", path=path, value=child))
+
+
+def _apply(document: Any, tokens: List[str], operation: PatchOperation) -> Any:
+    if not tokens:
+        if operation.op == "remove":
+            raise ValueError("Cannot remove the whole document.")
+        return operation.value
+
+    token, rest = tokens[0], tokens[1:]
+    if isinstance(document, dict):
+        document = dict(document)
+        if rest:
+            document[token] = _apply(_child(document, token, operation), rest, operation)
+        elif operation.op == "add":
+            document[token] = operation.value
+        else:
+            _child(document, token, operation)
+            if operation.op == "remove":
+                del document[token]
+            else:
+                document[token] = operation.value
+        return document
+
+    if isinstance(document, list):
+        document = list(document)
+        if not rest and operation.op == "add":
+            index = len(document) if token == "-" else _index(token, len(document) + 1, operation)
+            document.insert(index, operation.value)
+            return document
+        index = _index(token, len(document), operation)
+        if rest:
+            document[index] = _apply(document[index], rest, operation)
+        elif operation.op == "remove":
+            del document[index]
+        else:
+            document[index] = operation.value
+        return document
+
+    raise ValueError(f"Path {operation.path} does not exist.")
+
+
+def _child(document: dict, token: str, operation: PatchOperation) -> Any:
+    if token not in document:
+        raise ValueError(f"Path {operation.path} does not exist.")
+    return document[token]
+
+
+def _index(token: str, length: int, operation: PatchOperation) -> int:
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0") or int(token) >= length:
+        raise ValueError(f"Path {operation.path} does not exist.")
+    return int(token)
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
@@ -0,0 +1,553 @@
+import json
+import math
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Type
+
+import pydantic
+
+from aind_behavior_vr_foraging import regenerate
+from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+# Keywords that constrain documents but are not compiled. Schemas using them are rejected,
+# rather than silently validating less than they specify.
+_UNSUPPORTED_KEYWORDS = frozenset(
+    {
+        "patternProperties",
+        "dependentRequired",
+        "dependentSchemas",
+        "dependencies",
+        "if",
+        "contains",
+        "unevaluatedProperties",
+        "unevaluatedItems",
+        "$dynamicRef",
+        "$recursiveRef",
+    }
+)
+
+_PYTHON_TYPES: Dict[str, tuple] = {
+    "null": (type(None),),
+    "boolean": (bool,),
+    "integer": (int,),
+    "number": (int, float),
+    "string": (str,),
+    "array": (list, tuple),
+    "object": (dict,),
+}
+_JSON_PYTHON_TYPES = frozenset(t for types in _PYTHON_TYPES.values() for t in types)
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a document does not conform to a json schema."""
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+        super().__init__(f"{path or '/'}: {message}")
+
+
+class _Error:
+    """A validation failure. The pointer tokens are collected while unwinding, so valid documents never build paths."""
+
+    __slots__ = ("tokens", "message")
+
+    def __init__(self, message: str):
+        self.tokens: List[str] = []
+        self.message = message
+
+    def at(self, token: Any) -> "_Error":
+        self.tokens.append(str(token).replace("~", "~0").replace("/", "~1"))
+        return self
+
+    def to_exception(self) -> SchemaValidationError:
+        return SchemaValidationError("".join(f"/{token}" for token in reversed(self.tokens)), self.message)
+
+
+_Check = Callable[[Any], Optional[_Error]]
+
+
+class SchemaValidator:
+    """Validates json documents against a json schema.
+
+    The schema is compiled once into nested python closures, one per schema
+    keyword, so validating a document does not interpret the schema again. The
+    discriminators pydantic emits for tagged unions are used to select the
+    `oneOf` branch to validate against, instead of trying every branch.
+
+    Annotation keywords (e.g. `title`, `description`, `default` and `format`) are
+    ignored. Schemas that use a validation keyword that is not supported raise a
+    `ValueError` when compiled.
+
+    Examples:
+        ```python
+        validator = get_validator(AindVrForagingTaskLogic)
+        errors = validator.validate_many(payloads)
+        ```
+    """
+
+    def __init__(self, schema: Mapping[str, Any], ref: str = "#"):
+        """Compiles `schema`.
+
+        Args:
+            schema: The json schema document.
+            ref: JSON pointer reference, within `schema`, of the schema documents are validated against.
+        """
+        self._schema = schema
+        self._refs: Dict[str, _Check] = {}
+        self._check = self._compile_ref(ref)
+
+    @classmethod
+    def from_file(cls, path: os.PathLike, ref: str = "#") -> "SchemaValidator":
+        """Compiles the json schema saved at `path`, e.g. a published schema."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), ref=ref)
+
+    def first_error(self, document: Any) -> Optional[SchemaValidationError]:
+        """Returns the first error of `document`, or None if it is valid.
+
+        Args:
+            document: The parsed json document, or its json string.
+        """
+        if isinstance(document, (str, bytes, bytearray)):
+            document = json.loads(document)
+        error = self._check(document)
+        return None if error is None else error.to_exception()
+
+    def is_valid(self, document: Any) -> bool:
+        """Returns whether `document` is valid."""
+        return self.first_error(document) is None
+
+    def validate(self, document: Any) -> None:
+        """Validates `document`.
+
+        Raises:
+            SchemaValidationError: If `document` is not valid.
+        """
+        error = self.first_error(document)
+        if error is not None:
+            raise error
+
+    def validate_many(self, documents: Iterable[Any]) -> List[Optional[SchemaValidationError]]:
+        """Validates a batch of documents and returns the first error of each, or None for valid documents."""
+        return [self.first_error(document) for document in documents]
+
+    def _resolve(self, ref: str) -> Any:
+        if not ref.startswith("#"):
+            raise ValueError(f"Only local references are supported: {ref}")
+        node: Any = self._schema
+        for token in ref[1:].split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            try:
+                node = node[int(token)] if isinstance(node, list) else node[token]
+            except (KeyError, IndexError, ValueError):
+                raise ValueError(f"Unresolvable reference: {ref}") from None
+        return node
+
+    def _compile_ref(self, ref: str) -> _Check:
+        if ref in self._refs:
+            return self._refs[ref]
+        compiled: List[_Check] = []
+
+        # Placeholder that allows recursive references to be compiled.
+        def check_ref(value: Any) -> Optional[_Error]:
+            return compiled[0](value)
+
+        self._refs[ref] = check_ref
+        compiled.append(self._compile(self._resolve(ref)))
+        self._refs[ref] = compiled[0]
+        return compiled[0]
+
+    def _compile(self, schema: Any) -> _Check:
+        if schema is True or schema == {}:
+            return _always_valid
+        if schema is False:
+            return lambda value: _Error("no value is allowed")
+        if not isinstance(schema, Mapping):
+            raise ValueError(f"Invalid schema: {schema!r}")
+        unsupported = _UNSUPPORTED_KEYWORDS.intersection(schema)
+        if unsupported:
+            raise ValueError(f"Unsupported schema keywords: {sorted(unsupported)}")
+
+        checks: List[_Check] = []
+        if "$ref" in schema:
+            checks.append(self._compile_ref(schema["$ref"]))
+        object_properties = self._compile_object(schema)
+        # The properties check of objects also checks their type.
+        if "type" in schema and not (schema["type"] == "object" and object_properties):
+            checks.append(_compile_type(schema["type"]))
+        if "const" in schema:
+            checks.append(_compile_enum([schema["const"]]))
+        if "enum" in schema:
+            checks.append(_compile_enum(schema["enum"]))
+        checks.extend(_compile_number(schema))
+        checks.extend(_compile_string(schema))
+        checks.extend(self._compile_array(schema))
+        checks.extend(object_properties)
+        checks.extend(self._compile_combinators(schema))
+
+        if not checks:
+            return _always_valid
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(value: Any) -> Optional[_Error]:
+            for check in checks:
+                error = check(value)
+                if error is not None:
+                    return error
+            return None
+
+        return check_all
+
+    def _compile_array(self, schema: Mapping[str, Any]) -> List[_Check]:
+        checks: List[_Check] = []
+        prefix_items = schema.get("prefixItems")
+        items = schema.get("items")
+        if isinstance(items, list):
+            prefix_items, items = items, schema.get("additionalItems")
+        if prefix_items is not None:
+            checks.append(_compile_prefix_items([self._compile(item) for item in prefix_items]))
+        if items is not None and items is not True:
+            start = len(prefix_items) if prefix_items is not None else 0
+            item_check = self._compile(items)
+
+            def check_items(value: Any) -> Optional[_Error]:
+                if isinstance(value, (list, tuple)):
+                    for i in range(start, len(value)):
+                        error = item_check(value[i])
+                        if error is not None:
+                            return error.at(i)
+                return None
+
+            checks.append(check_items)
+        if "minItems" in schema or "maxItems" in schema:
+            checks.append(_compile_length(schema.get("minItems"), schema.get("maxItems"), (list, tuple), "items"))
+        if schema.get("uniqueItems"):
+            checks.append(_check_unique_items)
+        return checks
+
+    def _compile_object(self, schema: Mapping[str, Any]) -> List[_Check]:
+        checks: List[_Check] = []
+        properties = {name: self._compile(subschema) for name, subschema in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        additional_check = None if additional in (True, False) else self._compile(additional)
+
+        is_object = schema.get("type") == "object"
+        if properties or required or additional is not True or is_object:
+
+            def check_properties(value: Any) -> Optional[_Error]:
+                if not isinstance(value, dict):
+                    return _Error(f"{_repr(value)} is not of type 'object'") if is_object else None
+                for name in required:
+                    if name not in value:
+                        return _Error(f"'{name}' is a required property")
+                for name, item in value.items():
+                    check = properties.get(name)
+                    if check is None:
+                        if additional is False:
+                            return _Error(f"additional property '{name}' is not allowed")
+                        if additional_check is None:
+                            continue
+                        check = additional_check
+                    error = check(item)
+                    if error is not None:
+                        return error.at(name)
+                return None
+
+            checks.append(check_properties)
+        if "propertyNames" in schema:
+            checks.append(_compile_property_names(self._compile(schema["propertyNames"])))
+        if "minProperties" in schema or "maxProperties" in schema:
+            checks.append(
+                _compile_length(schema.get("minProperties"), schema.get("maxProperties"), (dict,), "properties")
+            )
+        return checks
+
+    def _compile_combinators(self, schema: Mapping[str, Any]) -> List[_Check]:
+        checks: List[_Check] = []
+        if "allOf" in schema:
+            checks.extend(self._compile(subschema) for subschema in schema["allOf"])
+        if "anyOf" in schema:
+            any_of = self._compile_branches(schema["anyOf"])
+
+            def check_any_of(value: Any) -> Optional[_Error]:
+                candidates = any_of.get(type(value), any_of[None])
+                errors = []
+                for check in candidates:
+                    error = check(value)
+                    if error is None:
+                        return None
+                    errors.append(error)
+                return _best_error(errors, f"{_repr(value)} is not valid under any of the given schemas")
+
+            checks.append(check_any_of)
+        if "oneOf" in schema:
+            one_of = self._compile_branches(schema["oneOf"])
+            discriminator = schema.get("discriminator") or {}
+            property_name = discriminator.get("propertyName")
+            mapping = {tag: self._compile_ref(ref) for tag, ref in discriminator.get("mapping", {}).items()}
+
+            def check_one_of(value: Any) -> Optional[_Error]:
+                if mapping and isinstance(value, dict):
+                    tag = value.get(property_name)
+                    if isinstance(tag, str) and tag in mapping:
+                        return mapping[tag](value)
+                candidates = one_of.get(type(value), one_of[None])
+                if len(candidates) == 1:
+                    return candidates[0](value)
+                errors = [check(value) for check in candidates]
+                n_valid = errors.count(None)
+                if n_valid == 0:
+                    return _best_error(errors, f"{_repr(value)} is not valid under any of the given schemas")
+                if n_valid > 1:
+                    return _Error(f"is valid under {n_valid} of the given schemas, but must be valid under exactly one")
+                return None
+
+            checks.append(check_one_of)
+        if "not" in schema:
+            not_check = self._compile(schema["not"])
+            checks.append(
+                lambda value: (
+                    _Error("is valid under the schema it must not match") if not_check(value) is None else None
+                )
+            )
+        return checks
+
+    def _compile_branches(self, branches: List[Any]) -> Dict[Optional[type], List[_Check]]:
+        """Compiles the branches of a combinator, grouped by the python types of the values each branch can accept.
+
+        Branches that cannot accept the type of a value are invalid for it, so only the
+        remaining candidates need to be validated. Values of other types, keyed by None,
+        are validated against every branch.
+        """
+        compiled = [(self._compile(branch), self._accepted_types(branch)) for branch in branches]
+        candidates: Dict[Optional[type], List[_Check]] = {None: [check for check, _ in compiled]}
+        for python_type in _JSON_PYTHON_TYPES:
+            candidates[python_type] = [check for check, types in compiled if types is None or python_type in types]
+        return candidates
+
+    def _accepted_types(self, schema: Any, depth: int = 0) -> Optional[frozenset]:
+        """Returns the python types of the values `schema` can accept, or None if they are not known."""
+        if not isinstance(schema, Mapping) or depth > 16:
+            return None
+        if "type" in schema:
+            names = [schema["type"]] if isinstance(schema["type"], str) else schema["type"]
+            types = {t for name in names for t in _PYTHON_TYPES[name]}
+            return frozenset(types | {float} if "integer" in names else types)
+        if "$ref" in schema:
+            return self._accepted_types(self._resolve(schema["$ref"]), depth + 1)
+        for keyword in ("oneOf", "anyOf"):
+            if keyword in schema:
+                branch_types = [self._accepted_types(branch, depth + 1) for branch in schema[keyword]]
+                if any(types is None for types in branch_types):
+                    return None
+                return frozenset().union(*branch_types)
+        return None
+
+
+VALIDATED_MODELS = (AindVrForagingTaskLogic,)
+"""Models validators are provided for.
+
+Only models whose documents are validated faster than by pydantic are included. Rig
+documents are mostly flat, so pydantic, which parses and validates them natively, is faster.
+"""
+
+
+@lru_cache(maxsize=None)
+def _load_schema(path: Path) -> Mapping[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _built_schema() -> Mapping[str, Any]:
+    return json.loads(regenerate.build_schema())
+
+
+@lru_cache(maxsize=None)
+def get_validator(model_type: Type[pydantic.BaseModel], schema_path: Optional[os.PathLike] = None) -> SchemaValidator:
+    """Returns the validator of the json schema of `model_type`.
+
+    The schema is built from the installed models, as it is published by `regenerate`,
+    and compiled once per model type and schema file. The validator is shared by all
+    later calls.
+
+    Args:
+        model_type: One of `VALIDATED_MODELS`.
+        schema_path: Path to a schema file to validate against instead, e.g. a
+            published `schema/aind_behavior_vr_foraging.json`.
+
+    Raises:
+        ValueError: If `model_type` is not one of `VALIDATED_MODELS`.
+    """
+    if model_type not in VALIDATED_MODELS:
+        raise ValueError(
+            f"No validator is provided for {model_type.__name__}, use pydantic validation instead. "
+            f"Validators are provided for: {', '.join(model.__name__ for model in VALIDATED_MODELS)}."
+        )
+    schema = _built_schema() if schema_path is None else _load_schema(Path(schema_path))
+    return SchemaValidator(schema, ref=f"#/$defs/{model_type.__name__}")
+
+
+def _always_valid(value: Any) -> None:
+    return None
+
+
+def _best_error(errors: List[Optional[_Error]], message: str) -> _Error:
+    # The branch that failed deepest in the document is most likely the intended one.
+    deepest = max((error for error in errors if error is not None), key=lambda error: len(error.tokens), default=None)
+    return deepest if deepest is not None and deepest.tokens else _Error(message)
+
+
+def _compile_type(type_: Any) -> _Check:
+    names = [type_] if isinstance(type_, str) else list(type_)
+    python_types = frozenset(t for name in names for t in _PYTHON_TYPES[name])
+    instance_types = tuple(python_types)
+    integral_floats = "integer" in names and "number" not in names
+
+    def check_type(value: Any) -> Optional[_Error]:
+        value_type = type(value)
+        if value_type in python_types:
+            return None
+        if integral_floats and value_type is float and value.is_integer():
+            return None
+        if value_type is not bool and isinstance(value, instance_types):
+            return None
+        return _Error(f"{_repr(value)} is not of type {', '.join(map(repr, names))}")
+
+    return check_type
+
+
+def _compile_enum(options: List[Any]) -> _Check:
+    # Enumerations of strings, the most common ones, are checked by a set lookup.
+    strings = frozenset(options) if all(isinstance(option, str) for option in options) else None
+
+    def check_enum(value: Any) -> Optional[_Error]:
+        if strings is not None:
+            if isinstance(value, str) and value in strings:
+                return None
+        elif any(_json_equal(value, option) for option in options):
+            return None
+        if len(options) == 1:
+            return _Error(f"{_repr(options[0])} was expected, got {_repr(value)}")
+        return _Error(f"{_repr(value)} is not one of {options!r}")
+
+    return check_enum
+
+
+def _compile_number(schema: Mapping[str, Any]) -> List[_Check]:
+    bounds = [
+        (schema.get("minimum"), lambda value, bound: value >= bound, "less than the minimum of"),
+        (schema.get("maximum"), lambda value, bound: value <= bound, "greater than the maximum of"),
+        (schema.get("exclusiveMinimum"), lambda value, bound: value > bound, "less than or equal to the minimum of"),
+        (schema.get("exclusiveMaximum"), lambda value, bound: value < bound, "greater than or equal to the maximum of"),
+    ]
+    bounds = [(bound, compare, message) for bound, compare, message in bounds if isinstance(bound, (int, float))]
+    multiple_of = schema.get("multipleOf")
+    if not bounds and multiple_of is None:
+        return []
+
+    def check_number(value: Any) -> Optional[_Error]:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        for bound, compare, message in bounds:
+            if not compare(value, bound):
+                return _Error(f"{_repr(value)} is {message} {bound}")
+        if multiple_of is not None:
+            quotient = value / multiple_of
+            if not math.isclose(quotient, round(quotient), rel_tol=0, abs_tol=1e-9):
+                return _Error(f"{_repr(value)} is not a multiple of {multiple_of}")
+        return None
+
+    return [check_number]
+
+
+def _compile_string(schema: Mapping[str, Any]) -> List[_Check]:
+    checks: List[_Check] = []
+    if "minLength" in schema or "maxLength" in schema:
+        checks.append(_compile_length(schema.get("minLength"), schema.get("maxLength"), (str,), "characters"))
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value: Any) -> Optional[_Error]:
+            if isinstance(value, str) and pattern.search(value) is None:
+                return _Error(f"{_repr(value)} does not match {pattern.pattern!r}")
+            return None
+
+        checks.append(check_pattern)
+    return checks
+
+
+def _compile_prefix_items(prefix_checks: List[_Check]) -> _Check:
+    def check_prefix_items(value: Any) -> Optional[_Error]:
+        if isinstance(value, (list, tuple)):
+            for i, (check, item) in enumerate(zip(prefix_checks, value)):
+                error = check(item)
+                if error is not None:
+                    return error.at(i)
+        return None
+
+    return check_prefix_items
+
+
+def _check_unique_items(value: Any) -> Optional[_Error]:
+    if isinstance(value, (list, tuple)):
+        for i in range(len(value)):
+            if any(_json_equal(value[i], other) for other in value[i + 1 :]):
+                return _Error("items are not unique")
+    return None
+
+
+def _compile_property_names(name_check: _Check) -> _Check:
+    def check_property_names(value: Any) -> Optional[_Error]:
+        if isinstance(value, dict):
+            for name in value:
+                error = name_check(name)
+                # Keys of json objects are always strings, so numeric keys, as pydantic
+                # emits for integer dict keys, are validated by their value.
+                if error is not None and (_numeric_key(name) is None or name_check(_numeric_key(name))):
+                    return _Error(f"invalid property name '{name}': {error.message}")
+        return None
+
+    return check_property_names
+
+
+def _compile_length(minimum: Optional[int], maximum: Optional[int], types: tuple, unit: str) -> _Check:
+    minimum = 0 if minimum is None else minimum
+    maximum = math.inf if maximum is None else maximum
+
+    def check_length(value: Any) -> Optional[_Error]:
+        if isinstance(value, types) and not minimum <= len(value) <= maximum:
+            bound = f"at least {minimum}" if len(value) < minimum else f"at most {maximum}"
+            return _Error(f"expected {bound} {unit}, got {len(value)}")
+        return None
+
+    return check_length
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    return a == b
+
+
+def _numeric_key(name: str) -> Optional[float]:
+    for parse in (int, float):
+        try:
+            return parse(name)
+        except ValueError:
+            pass
+    return None
+
+
+def _repr(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= 40 else text[:37] + "..."
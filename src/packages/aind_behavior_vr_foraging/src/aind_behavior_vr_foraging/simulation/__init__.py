@@ -0,0 +1,49 @@
+from ._engine import PATCH_VISIT_DTYPE, REFRESH_PERIOD, SITE_DTYPE, SimulationResult, simulate
+from ._update_functions import apply_update_function
+from .agents import Agent, ConsecutiveFailuresAgent, RandomAgent, SiteObservation, StatePreferenceAgent
+from .corridor import (
+    CORRIDOR_DTYPE,
+    DEFAULT_WALL_TEXTURES,
+    CorridorDifference,
+    CorridorLayout,
+    compile_corridor,
+    diff_visual_corridors,
+)
+from .markov import (
+    MarkovAnalysis,
+    PatchExpectation,
+    analyze_markov_environment,
+    analyze_task,
+    mixing_time,
+    stationary_distribution,
+)
+from .sampling import DistributionSampler, compile_distribution, sample
+
+__all__ = [
+    "Agent",
+    "CORRIDOR_DTYPE",
+    "ConsecutiveFailuresAgent",
+    "CorridorDifference",
+    "CorridorLayout",
+    "DEFAULT_WALL_TEXTURES",
+    "DistributionSampler",
+    "MarkovAnalysis",
+    "PATCH_VISIT_DTYPE",
+    "PatchExpectation",
+    "RandomAgent",
+    "REFRESH_PERIOD",
+    "SITE_DTYPE",
+    "SimulationResult",
+    "SiteObservation",
+    "StatePreferenceAgent",
+    "analyze_markov_environment",
+    "analyze_task",
+    "apply_update_function",
+    "compile_corridor",
+    "compile_distribution",
+    "diff_visual_corridors",
+    "mixing_time",
+    "sample",
+    "simulate",
+    "stationary_distribution",
+]
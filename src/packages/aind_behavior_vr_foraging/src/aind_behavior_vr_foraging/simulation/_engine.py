@@ -0,0 +1,770 @@
+import dataclasses
+import enum
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from aind_behavior_services.task.distributions import Distribution
+
+from aind_behavior_vr_foraging import task_logic
+
+from ._update_functions import apply_update_function
+from .agents import Agent, SiteObservation
+from .sampling import DistributionSampler, compile_distribution
+
+logger = logging.getLogger(__name__)
+
+REFRESH_PERIOD = 0.1
+"""Period (s) at which the workflow ticks time- and distance-based reward functions."""
+
+MAX_STALLED_STEPS = 10_000
+"""Number of consecutive steps a session may take without advancing in time or distance before the simulation fails."""
+
+_TIME_RULES = (
+    task_logic.RewardFunctionRule.ON_TIME,
+    task_logic.RewardFunctionRule.ON_DISTANCE,
+    task_logic.RewardFunctionRule.ON_TIME_ACCUMULATED,
+    task_logic.RewardFunctionRule.ON_DISTANCE_ACCUMULATED,
+)
+_STATE_VARIABLES = ("amount", "probability", "available")
+
+PATCH_VISIT_DTYPE = np.dtype(
+    [
+        ("session", np.int64),
+        ("block", np.int64),
+        ("state_index", np.int64),
+        ("reward_sites", np.int64),
+        ("choices", np.int64),
+        ("rewards", np.int64),
+        ("water", np.float64),
+        ("duration", np.float64),
+    ]
+)
+"""Record of a single patch visit in `SimulationResult.patch_visits`."""
+
+SITE_DTYPE = np.dtype(
+    [
+        ("session", np.int64),
+        ("id", np.int64),
+        ("label", "U16"),
+        ("generator", "U16"),
+        ("block", np.int64),
+        ("patch", np.int64),
+        ("state_index", np.int64),
+        ("start_position", np.float64),
+        ("length", np.float64),
+        ("contrast", np.float64),
+    ]
+)
+"""Record of a single virtual site in `SimulationResult.sites`. `generator` is the `PatchVirtualSitesGenerator`
+field the site was generated from, `patch` the index of the patch in its block, and `contrast` is NaN when the site
+does not specify one."""
+
+
+class _Phase(enum.IntEnum):
+    INTER_PATCH = 0
+    INTER_SITE = 1
+    REWARD_SITE = 2
+    POST_PATCH = 3
+
+
+_SCOPE_INSIDE = "inside"
+_SCOPE_OUTSIDE = "outside"
+_SCOPE_ALWAYS = "always"
+
+
+@dataclasses.dataclass(frozen=True)
+class _BoundRewardFunction:
+    column: int
+    function: task_logic.RewardFunction
+    scope: str
+    delay: float
+
+
+@dataclasses.dataclass
+class _CompiledBlock:
+    block: task_logic.Block
+    patches: List[task_logic.Patch]
+    column_of_state: Dict[int, int]
+    odors: np.ndarray
+    reward_functions: List[_BoundRewardFunction]
+
+    @classmethod
+    def compile(cls, block: task_logic.Block) -> "_CompiledBlock":
+        patches = list(block.environment.patches)
+        column_of_state = {patch.state_index: column for column, patch in enumerate(patches)}
+        if len(column_of_state) != len(patches):
+            raise ValueError("Patches within a block must have unique state indices.")
+        environment = block.environment
+        if isinstance(environment, task_logic.MarkovEnvironment):
+            n_states = len(environment.transition_matrix)
+            missing = [i for i in range(n_states) if i not in column_of_state]
+            if missing:
+                raise ValueError(f"Transition matrix states {missing} do not correspond to any patch.state_index.")
+            if any(sum(row) <= 0 for row in environment.transition_matrix):
+                raise ValueError("Transition matrix rows must sum to a positive value.")
+            if environment.first_state_occupancy and len(environment.first_state_occupancy) != n_states:
+                raise ValueError(
+                    "The number of initial states must match the number of states in the transition matrix."
+                )
+        n_odors = max(len(patch.odor_specification) for patch in patches)
+        odors = np.zeros((len(patches), n_odors))
+        reward_functions = []
+        for column, patch in enumerate(patches):
+            odors[column, : len(patch.odor_specification)] = patch.odor_specification
+            for function in patch.reward_specification.reward_function:
+                scope = {
+                    "PatchRewardFunction": _SCOPE_INSIDE,
+                    "OnThisPatchEntryRewardFunction": _SCOPE_INSIDE,
+                    "OutsideRewardFunction": _SCOPE_OUTSIDE,
+                    "PersistentRewardFunction": _SCOPE_ALWAYS,
+                }[function.function_type]
+                delay = getattr(function, "delay", 0.0)
+                reward_functions.append(_BoundRewardFunction(column, function, scope, delay))
+        return cls(block, patches, column_of_state, odors, reward_functions)
+
+    def functions_with_rules(self, *rules: task_logic.RewardFunctionRule) -> List[_BoundRewardFunction]:
+        return [f for f in self.reward_functions if f.function.rule in rules]
+
+
+@dataclasses.dataclass(frozen=True)
+class SimulationResult:
+    """Outcome of a batch of simulated sessions.
+
+    Per-session arrays have one entry per simulated session.
+    """
+
+    duration: np.ndarray
+    """Session duration (s)."""
+    distance: np.ndarray
+    """Distance (cm) traveled in the session."""
+    water: np.ndarray
+    """Water (uL) collected in the session."""
+    rewards: np.ndarray
+    """Number of rewards collected in the session."""
+    choices: np.ndarray
+    """Number of choices made in the session."""
+    patches: np.ndarray
+    """Number of patches visited in the session."""
+    patch_visits: np.ndarray
+    """One record per patch visit, with the fields of `PATCH_VISIT_DTYPE`."""
+    sites: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros(0, SITE_DTYPE))
+    """One record per virtual site, with the fields of `SITE_DTYPE`. Only filled if requested."""
+
+    @property
+    def n_sessions(self) -> int:
+        return len(self.duration)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the mean, standard deviation and quartiles of the per-session statistics,
+        and the mean rewards and water per visit of each patch state."""
+
+        def _describe(values: np.ndarray) -> Dict[str, float]:
+            if len(values) == 0:
+                return {}
+            q25, median, q75 = np.percentile(values, [25, 50, 75])
+            return {
+                "mean": float(np.mean(values)),
+                "std": float(np.std(values)),
+                "q25": float(q25),
+                "median": float(median),
+                "q75": float(q75),
+            }
+
+        summary = {
+            name: _describe(getattr(self, name))
+            for name in ("duration", "distance", "water", "rewards", "choices", "patches")
+        }
+        for state_index in np.unique(self.patch_visits["state_index"]):
+            visits = self.patch_visits[self.patch_visits["state_index"] == state_index]
+            summary[f"patch_{state_index}"] = {
+                "visits_per_session": len(visits) / self.n_sessions,
+                "rewards_per_visit": float(np.mean(visits["rewards"])),
+                "water_per_visit": float(np.mean(visits["water"])),
+                "reward_sites_per_visit": float(np.mean(visits["reward_sites"])),
+            }
+        return summary
+
+
+def simulate(
+    task: task_logic.AindVrForagingTaskLogic,
+    agent: Agent,
+    n_sessions: int = 1000,
+    *,
+    max_duration: float = 3600.0,
+    max_water: Optional[float] = None,
+    max_distance: Optional[float] = None,
+    seed: Optional[int] = None,
+    record_sites: bool = False,
+) -> SimulationResult:
+    """Simulates many sessions of a task logic, driven by a synthetic agent.
+
+    All sessions are advanced together, one virtual site at a time, with NumPy
+    operations across sessions. The simulation follows the structure of the
+    Bonsai workflow: blocks and their end conditions, Markov and sequence
+    environments, the virtual sites of each patch, operant reward logic, reward
+    functions updating the state of each patch and patch terminators.
+
+    Some aspects are simplified:
+
+    - Each site is traversed at the speed returned by the agent, and animals stop
+      only at reward sites, for the sampled stop duration plus reward delay.
+    - Time- and distance-based reward functions are ticked at the workflow refresh
+      period, spreading the distance of a site evenly over its ticks.
+    - Accumulated rules count from the patch entry for functions applied inside
+      the patch, and from the block start otherwise.
+    - Numerical updaters, visual corridors and friction are not simulated.
+
+    Args:
+        task: The task logic to simulate.
+        agent: Agent deciding where to stop.
+        n_sessions: Number of sessions to simulate.
+        max_duration: Duration (s) after which a session ends.
+        max_water: Optional amount of water (uL) after which a session ends.
+        max_distance: Optional distance (cm) after which a session ends.
+        seed: Seed of the random number generator.
+        record_sites: Whether to record every virtual site in `SimulationResult.sites`.
+
+    Returns:
+        The outcome of the simulated sessions.
+
+    Raises:
+        RuntimeError: If sessions stop advancing in time and distance for `MAX_STALLED_STEPS` steps.
+    """
+    if n_sessions < 1:
+        raise ValueError("n_sessions must be at least 1.")
+    simulation = _BatchSimulation(
+        task,
+        agent,
+        n_sessions,
+        rng=np.random.default_rng(seed),
+        max_duration=max_duration,
+        max_water=max_water,
+        max_distance=max_distance,
+        record_sites=record_sites,
+    )
+    return simulation.run()
+
+
+class _BatchSimulation:
+    def __init__(
+        self,
+        task: task_logic.AindVrForagingTaskLogic,
+        agent: Agent,
+        n_sessions: int,
+        rng: np.random.Generator,
+        max_duration: float,
+        max_water: Optional[float] = None,
+        max_distance: Optional[float] = None,
+        record_sites: bool = False,
+    ):
+        self.agent = agent
+        self.rng = rng
+        self.max_duration = max_duration
+        self.max_water = max_water if max_water is not None else np.inf
+        self.max_distance = max_distance if max_distance is not None else np.inf
+        self.block_structure = task.task_parameters.environment
+        self.blocks = [_CompiledBlock.compile(block) for block in self.block_structure.blocks]
+        self.n = n_sessions
+        n, n_columns = n_sessions, max(len(block.patches) for block in self.blocks)
+        n_conditions = max(len(block.block.end_conditions) for block in self.blocks)
+        n_terminators = max(len(patch.patch_terminators) for block in self.blocks for patch in block.patches)
+        n_sequence = max(
+            (len(b.block.environment.patch_indices) for b in self.blocks if _is_sequence(b.block.environment)),
+            default=0,
+        )
+
+        self.active = np.ones(n, dtype=bool)
+        self.time = np.zeros(n)
+        self.distance = np.zeros(n)
+        self.water = np.zeros(n)
+        self.rewards = np.zeros(n, dtype=np.int64)
+        self.choices = np.zeros(n, dtype=np.int64)
+        self.patch_count = np.zeros(n, dtype=np.int64)
+        self.tick_residual = np.zeros(n)
+        self.stalled_steps = np.zeros(n, dtype=np.int64)
+
+        self.block_order = np.zeros((n, len(self.blocks)), dtype=np.int64)
+        self.block_position = np.zeros(n, dtype=np.int64)
+        self.block = np.zeros(n, dtype=np.int64)
+        self.block_start = np.zeros((n, 5))  # time, distance, choices, rewards, patches
+        self.block_thresholds = np.full((n, n_conditions), np.nan)
+
+        self.sequence = np.zeros((n, n_sequence), dtype=np.int64)
+        self.sequence_position = np.zeros(n, dtype=np.int64)
+        self.state_index = np.zeros(n, dtype=np.int64)
+        self.column = np.zeros(n, dtype=np.int64)
+        self.patch_state = {name: np.zeros((n, n_columns)) for name in _STATE_VARIABLES}
+        self.left_patch_time = np.zeros((n, n_columns))
+
+        self.phase = np.full(n, _Phase.INTER_PATCH, dtype=np.int64)
+        self.patch_start = np.zeros((n, 2))  # time, distance
+        self.reward_sites = np.zeros(n, dtype=np.int64)
+        self.patch_choices = np.zeros(n, dtype=np.int64)
+        self.patch_rewards = np.zeros(n, dtype=np.int64)
+        self.patch_water = np.zeros(n)
+        self.rejections = np.zeros(n, dtype=np.int64)
+        self.consecutive_failures = np.zeros(n, dtype=np.int64)
+        self.terminator_thresholds = np.full((n, n_terminators), np.nan)
+
+        self.patch_visits: List[np.ndarray] = []
+        self.sites: Optional[List[np.ndarray]] = [] if record_sites else None
+        # The task is not modified while it is simulated, so samplers can be looked up by identity.
+        self._samplers: Dict[int, DistributionSampler] = {}
+
+    # Session and block flow
+
+    def run(self) -> SimulationResult:
+        everyone = np.arange(self.n)
+        self.agent.reset(self.n, self.rng)
+        self._shuffle_blocks(everyone)
+        self._enter_block(everyone)
+        while np.any(self.active):
+            sessions = np.flatnonzero(self.active)
+            phases = self.phase[sessions]
+            time, distance = self.time[sessions], self.distance[sessions]
+            for phase, step in (
+                (_Phase.INTER_PATCH, self._inter_patch),
+                (_Phase.INTER_SITE, self._inter_site),
+                (_Phase.REWARD_SITE, self._reward_site),
+                (_Phase.POST_PATCH, self._post_patch),
+            ):
+                in_phase = sessions[phases == phase]
+                if len(in_phase) > 0:
+                    step(in_phase)
+            self._check_progress(sessions, time, distance)
+            ended = sessions[
+                (self.time[sessions] >= self.max_duration)
+                | (self.water[sessions] >= self.max_water)
+                | (self.distance[sessions] >= self.max_distance)
+            ]
+            if len(ended) > 0:
+                self._record_patch_visits(ended[self.phase[ended] != _Phase.INTER_PATCH])
+                self.active[ended] = False
+
+        patch_visits = np.concatenate(self.patch_visits) if self.patch_visits else np.zeros(0, PATCH_VISIT_DTYPE)
+        return SimulationResult(
+            duration=self.time.copy(),
+            distance=self.distance.copy(),
+            water=self.water.copy(),
+            rewards=self.rewards.copy(),
+            choices=self.choices.copy(),
+            patches=self.patch_count.copy(),
+            patch_visits=patch_visits[np.argsort(patch_visits["session"], kind="stable")],
+            sites=self._concatenate_sites(),
+        )
+
+    def _check_progress(self, sessions: np.ndarray, time: np.ndarray, distance: np.ndarray) -> None:
+        """Fails if sessions stopped advancing, e.g. since all sites have zero length and the agent never stops."""
+        progressed = (self.time[sessions] > time) | (self.distance[sessions] > distance)
+        self.stalled_steps[sessions] = np.where(progressed, 0, self.stalled_steps[sessions] + 1)
+        if np.any(self.stalled_steps[sessions] > MAX_STALLED_STEPS):
+            raise RuntimeError(
+                f"Sessions made no progress in time or distance for {MAX_STALLED_STEPS} steps. "
+                "Check that the task logic has sites of positive length, or stop durations the agent waits for."
+            )
+
+    def _concatenate_sites(self) -> np.ndarray:
+        if not self.sites:
+            return np.zeros(0, SITE_DTYPE)
+        sites = np.concatenate(self.sites)
+        return sites[np.argsort(sites["session"], kind="stable")]
+
+    def _shuffle_blocks(self, sessions: np.ndarray) -> None:
+        order = np.tile(np.arange(len(self.blocks)), (len(sessions), 1))
+        if self.block_structure.sampling_mode == "Random":
+            order = np.take_along_axis(order, np.argsort(self.rng.random(order.shape), axis=1), axis=1)
+        self.block_order[sessions] = order
+        self.block_position[sessions] = 0
+
+    def _enter_block(self, sessions: np.ndarray) -> None:
+        self.block[sessions] = self.block_order[sessions, self.block_position[sessions]]
+        self.block_start[sessions] = np.stack(
+            [self.time[sessions], self.distance[sessions], self.choices[sessions], self.rewards[sessions]]
+            + [self.patch_count[sessions]],
+            axis=1,
+        )
+        self.block_thresholds[sessions] = np.nan
+        for b, block, in_block in self._by_block(sessions):
+            for i, condition in enumerate(block.block.end_conditions):
+                self.block_thresholds[in_block, i] = self._sample(condition.value, len(in_block))
+            for column, patch in enumerate(block.patches):
+                for name in _STATE_VARIABLES:
+                    distribution = getattr(patch.reward_specification, name)
+                    self.patch_state[name][in_block, column] = self._sample(distribution, len(in_block))
+            self.left_patch_time[in_block] = self.time[in_block, None]
+            self._sample_first_state(block, in_block)
+
+    def _end_patch(self, sessions: np.ndarray) -> None:
+        self._record_patch_visits(sessions)
+        self.left_patch_time[sessions, self.column[sessions]] = self.time[sessions]
+        self.patch_count[sessions] += 1
+
+        block_ended = np.zeros(len(sessions), dtype=bool)
+        for b, block, in_block in self._by_block(sessions):
+            mask = np.isin(sessions, in_block)
+            progress = self._block_progress(in_block)
+            for i, condition in enumerate(block.block.end_conditions):
+                index = ["Duration", "Distance", "Choice", "Reward", "PatchCount"].index(condition.condition_type)
+                block_ended[mask] |= progress[:, index] >= self.block_thresholds[in_block, i]
+
+        ended, continuing = sessions[block_ended], sessions[~block_ended]
+        if len(continuing) > 0:
+            for b, block, in_block in self._by_block(continuing):
+                self._sample_next_state(block, in_block)
+        if len(ended) > 0:
+            self.block_position[ended] += 1
+            wrapped = ended[self.block_position[ended] >= len(self.blocks)]
+            if len(wrapped) > 0:
+                self._shuffle_blocks(wrapped)
+            self._enter_block(ended)
+        self.phase[sessions] = _Phase.INTER_PATCH
+
+    def _block_progress(self, sessions: np.ndarray) -> np.ndarray:
+        current = np.stack(
+            [
+                self.time[sessions],
+                self.distance[sessions],
+                self.choices[sessions],
+                self.rewards[sessions],
+                self.patch_count[sessions],
+            ],
+            axis=1,
+        )
+        return current - self.block_start[sessions]
+
+    def _by_block(self, sessions: np.ndarray):
+        blocks = self.block[sessions]
+        for b in np.unique(blocks):
+            yield int(b), self.blocks[b], sessions[blocks == b]
+
+    # Environment sampling
+
+    def _sample_first_state(self, block: _CompiledBlock, sessions: np.ndarray) -> None:
+        environment = block.block.environment
+        if isinstance(environment, task_logic.MarkovEnvironment):
+            n_states = len(environment.transition_matrix)
+            occupancy = environment.first_state_occupancy
+            weights = np.asarray(occupancy, dtype=float) if occupancy else np.ones(n_states)
+            states = _weighted_sample(np.tile(weights, (len(sessions), 1)), self.rng)
+        else:
+            indices = np.asarray(environment.patch_indices)
+            self.sequence_position[sessions] = 0
+            if environment.sampling_mode == "RandomWithoutReplacement":
+                self._shuffle_sequence(indices, sessions)
+            else:
+                self.sequence[sessions, : len(indices)] = indices
+            states = self._sequence_state(environment, sessions)
+        self._set_state(block, sessions, states)
+
+    def _sample_next_state(self, block: _CompiledBlock, sessions: np.ndarray) -> None:
+        environment = block.block.environment
+        if isinstance(environment, task_logic.MarkovEnvironment):
+            matrix = np.asarray(environment.transition_matrix, dtype=float)
+            states = _weighted_sample(matrix[self.state_index[sessions]], self.rng)
+        else:
+            self.sequence_position[sessions] += 1
+            if environment.sampling_mode == "RandomWithoutReplacement":
+                exhausted = sessions[self.sequence_position[sessions] >= len(environment.patch_indices)]
+                if len(exhausted) > 0:
+                    self._shuffle_sequence(np.asarray(environment.patch_indices), exhausted)
+                    self.sequence_position[exhausted] = 0
+            states = self._sequence_state(environment, sessions)
+        self._set_state(block, sessions, states)
+
+    def _shuffle_sequence(self, indices: np.ndarray, sessions: np.ndarray) -> None:
+        permutation = np.argsort(self.rng.random((len(sessions), len(indices))), axis=1)
+        self.sequence[sessions, : len(indices)] = indices[permutation]
+
+    def _sequence_state(self, environment: task_logic.SequenceEnvironment, sessions: np.ndarray) -> np.ndarray:
+        n_indices = len(environment.patch_indices)
+        if environment.sampling_mode == "RandomWithReplacement":
+            return np.asarray(environment.patch_indices)[self.rng.integers(n_indices, size=len(sessions))]
+        return self.sequence[sessions, self.sequence_position[sessions] % n_indices]
+
+    def _set_state(self, block: _CompiledBlock, sessions: np.ndarray, states: np.ndarray) -> None:
+        self.state_index[sessions] = states
+        self.column[sessions] = [block.column_of_state[int(s)] for s in states]
+
+    # Sites
+
+    def _inter_patch(self, sessions: np.ndarray) -> None:
+        self._traverse(sessions, "inter_patch")
+        self._enter_patch(sessions)
+        self.phase[sessions] = _Phase.INTER_SITE
+
+    def _enter_patch(self, sessions: np.ndarray) -> None:
+        self.patch_start[sessions] = np.stack([self.time[sessions], self.distance[sessions]], axis=1)
+        for counter in (self.reward_sites, self.patch_choices, self.patch_rewards, self.rejections):
+            counter[sessions] = 0
+        self.consecutive_failures[sessions] = 0
+        self.patch_water[sessions] = 0
+        self.terminator_thresholds[sessions] = np.nan
+        for b, block, in_block in self._by_block(sessions):
+            for column, patch in enumerate(block.patches):
+                in_patch = in_block[self.column[in_block] == column]
+                for i, terminator in enumerate(patch.patch_terminators):
+                    self.terminator_thresholds[in_patch, i] = self._sample(terminator.count, len(in_patch))
+            for bound in block.functions_with_rules(task_logic.RewardFunctionRule.ON_THIS_PATCH_ENTRY):
+                entering = in_block[self.column[in_block] == bound.column]
+                self._apply(bound, entering, np.ones(len(entering)))
+            for bound in block.functions_with_rules(task_logic.RewardFunctionRule.ON_PATCH_ENTRY):
+                self._apply(bound, in_block, np.ones(len(in_block)))
+
+    def _inter_site(self, sessions: np.ndarray) -> None:
+        self._traverse(sessions, "inter_site")
+        terminated = self._is_terminated(sessions)
+        self.phase[sessions[~terminated]] = _Phase.REWARD_SITE
+        leaving = sessions[terminated]
+        has_post_patch = np.array(
+            [
+                self.blocks[b].patches[c].patch_virtual_sites_generator.post_patch is not None
+                for b, c in self._keys(leaving)
+            ],
+            dtype=bool,
+        )
+        self.phase[leaving[has_post_patch]] = _Phase.POST_PATCH
+        if np.any(~has_post_patch):
+            self._end_patch(leaving[~has_post_patch])
+
+    def _post_patch(self, sessions: np.ndarray) -> None:
+        self._traverse(sessions, "post_patch")
+        self._end_patch(sessions)
+
+    def _reward_site(self, sessions: np.ndarray) -> None:
+        length, speed = self._sample_site_lengths(sessions, "reward_site"), self.agent.speed(sessions, self.rng)
+        observation = SiteObservation(
+            sessions=sessions,
+            state_index=self.state_index[sessions],
+            odor=self._odors(sessions),
+            sites_in_patch=self.reward_sites[sessions].copy(),
+            choices_in_patch=self.patch_choices[sessions].copy(),
+            rewards_in_patch=self.patch_rewards[sessions].copy(),
+            consecutive_failures=self.consecutive_failures[sessions].copy(),
+            time_in_patch=self.time[sessions] - self.patch_start[sessions, 0],
+        )
+        stopped = np.asarray(self.agent.choose(observation, self.rng), dtype=bool)
+        wait = np.zeros(len(sessions))
+        for (b, c), at_patch in self._group_by_patch(sessions):
+            specification = self.blocks[b].patches[c].reward_specification
+            operant = specification.operant_logic
+            if operant is None or not operant.is_operant:
+                stopped[at_patch] = True
+            else:
+                wait[at_patch] += self._sample(operant.stop_duration, len(at_patch))
+            wait[at_patch] += self._sample(specification.delay, len(at_patch))
+        wait = np.where(stopped, np.maximum(wait, 0), 0)
+        self._advance(sessions, length / speed + wait, length)
+
+        columns = self.column[sessions]
+        probability = self.patch_state["probability"][sessions, columns]
+        amount = self.patch_state["amount"][sessions, columns]
+        available = self.patch_state["available"][sessions, columns]
+        coin = self.rng.random(len(sessions))
+        success = np.where(probability >= 1, True, np.where(probability <= 0, False, coin < probability))
+        rewarded = stopped & success & (available > 0)
+        delivered = np.where(rewarded, np.minimum(amount, available), 0.0)
+        self.patch_state["available"][sessions, columns] = np.maximum(available - delivered, 0)
+
+        self.reward_sites[sessions] += 1
+        self.choices[sessions] += stopped
+        self.patch_choices[sessions] += stopped
+        self.rewards[sessions] += rewarded
+        self.patch_rewards[sessions] += rewarded
+        self.water[sessions] += delivered
+        self.patch_water[sessions] += delivered
+        self.rejections[sessions] += ~stopped
+        self.consecutive_failures[sessions] = np.where(
+            rewarded, 0, self.consecutive_failures[sessions] + (stopped & ~rewarded)
+        )
+        self.agent.update(observation, stopped, rewarded)
+        self._apply_event_rules(sessions, stopped, rewarded, delivered)
+        self.phase[sessions] = _Phase.INTER_SITE
+
+    def _traverse(self, sessions: np.ndarray, generator: str) -> None:
+        length = self._sample_site_lengths(sessions, generator)
+        self._advance(sessions, length / self.agent.speed(sessions, self.rng), length)
+
+    def _sample_site_lengths(self, sessions: np.ndarray, generator: str) -> np.ndarray:
+        length = np.zeros(len(sessions))
+        for (b, c), at_patch in self._group_by_patch(sessions):
+            site_generator = getattr(self.blocks[b].patches[c].patch_virtual_sites_generator, generator)
+            length[at_patch] = self._sample(site_generator.length_distribution, len(at_patch))
+            if self.sites is not None:
+                self._record_sites(sessions[at_patch], generator, site_generator, length[at_patch])
+        return np.maximum(length, 0)
+
+    def _advance(self, sessions: np.ndarray, elapsed: np.ndarray, length: np.ndarray) -> None:
+        """Moves `sessions` forward in time and space, ticking time- and distance-based reward functions."""
+        clock = self.tick_residual[sessions] + elapsed
+        n_ticks = np.floor(clock / REFRESH_PERIOD + 1e-9).astype(np.int64)
+        self.tick_residual[sessions] = clock - n_ticks * REFRESH_PERIOD
+        distance_per_tick = np.divide(length, n_ticks, out=np.zeros(len(sessions)), where=n_ticks > 0)
+        start_time, start_distance = self.time[sessions].copy(), self.distance[sessions].copy()
+        self.time[sessions] += elapsed
+        self.distance[sessions] += length
+
+        if not np.any(n_ticks > 0):
+            return
+        for b, block, in_block in self._by_block(sessions):
+            bound_functions = block.functions_with_rules(*_TIME_RULES)
+            if not bound_functions:
+                continue
+            mask = np.isin(sessions, in_block)
+            for bound in bound_functions:
+                scoped = mask & self._in_scope(bound, sessions)
+                for tick in range(int(n_ticks[scoped].max(initial=0))):
+                    ticking = scoped & (tick < n_ticks)
+                    targets = sessions[ticking]
+                    rule = bound.function.rule
+                    if rule == task_logic.RewardFunctionRule.ON_TIME:
+                        ticks = np.full(len(targets), REFRESH_PERIOD)
+                    elif rule == task_logic.RewardFunctionRule.ON_DISTANCE:
+                        ticks = distance_per_tick[ticking]
+                    else:
+                        origin = self._accumulation_origin(bound, targets)
+                        if rule == task_logic.RewardFunctionRule.ON_TIME_ACCUMULATED:
+                            ticks = start_time[ticking] + (tick + 1) * REFRESH_PERIOD - origin[:, 0]
+                        else:
+                            ticks = start_distance[ticking] + (tick + 1) * distance_per_tick[ticking] - origin[:, 1]
+                    self._apply(bound, targets, ticks)
+
+    def _in_scope(self, bound: _BoundRewardFunction, sessions: np.ndarray) -> np.ndarray:
+        if bound.scope == _SCOPE_ALWAYS:
+            return np.ones(len(sessions), dtype=bool)
+        phases = self.phase[sessions]
+        inside = (self.column[sessions] == bound.column) & (
+            (phases == _Phase.INTER_SITE) | (phases == _Phase.REWARD_SITE)
+        )
+        if bound.scope == _SCOPE_INSIDE:
+            return inside
+        return ~inside & (self.time[sessions] - self.left_patch_time[sessions, bound.column] >= bound.delay)
+
+    def _accumulation_origin(self, bound: _BoundRewardFunction, sessions: np.ndarray) -> np.ndarray:
+        if bound.scope == _SCOPE_INSIDE:
+            return self.patch_start[sessions]
+        return self.block_start[sessions, :2]
+
+    def _apply_event_rules(
+        self, sessions: np.ndarray, stopped: np.ndarray, rewarded: np.ndarray, delivered: np.ndarray
+    ) -> None:
+        rules = task_logic.RewardFunctionRule
+        triggers = {
+            rules.ON_REWARD: (rewarded, np.ones(len(sessions))),
+            rules.ON_REWARD_AMOUNT: (rewarded, delivered),
+            rules.ON_CHOICE: (stopped, np.ones(len(sessions))),
+            rules.ON_CHOICE_ACCUMULATED: (stopped, self.patch_choices[sessions].astype(float)),
+            rules.ON_REWARD_ACCUMULATED: (rewarded, self.patch_rewards[sessions].astype(float)),
+        }
+        for b, block, in_block in self._by_block(sessions):
+            mask = np.isin(sessions, in_block)
+            for bound in block.functions_with_rules(*triggers):
+                triggered, ticks = triggers[bound.function.rule]
+                selected = mask & triggered & self._in_scope(bound, sessions)
+                self._apply(bound, sessions[selected], ticks[selected])
+
+    def _apply(self, bound: _BoundRewardFunction, sessions: np.ndarray, ticks: np.ndarray) -> None:
+        if len(sessions) == 0:
+            return
+        for name in _STATE_VARIABLES:
+            update_function = getattr(bound.function, name)
+            if update_function is None:
+                continue
+            values = self.patch_state[name][sessions, bound.column]
+            self.patch_state[name][sessions, bound.column] = apply_update_function(
+                update_function, values, ticks, self.rng, sampler=self._sample_with
+            )
+
+    def _is_terminated(self, sessions: np.ndarray) -> np.ndarray:
+        progress = {
+            "OnRejection": self.rejections[sessions],
+            "OnChoice": self.patch_choices[sessions],
+            "OnReward": self.patch_rewards[sessions],
+            "OnTime": self.time[sessions] - self.patch_start[sessions, 0],
+            "OnDistance": self.distance[sessions] - self.patch_start[sessions, 1],
+            "OnRewardSite": self.reward_sites[sessions],
+        }
+        terminated = np.zeros(len(sessions), dtype=bool)
+        for (b, c), at_patch in self._group_by_patch(sessions):
+            for i, terminator in enumerate(self.blocks[b].patches[c].patch_terminators):
+                reached = (
+                    progress[terminator.terminator_type][at_patch] >= self.terminator_thresholds[sessions[at_patch], i]
+                )
+                terminated[at_patch] |= reached
+        return terminated
+
+    # Bookkeeping
+
+    def _sample(self, distribution: Distribution, size: int) -> np.ndarray:
+        sampler = self._samplers.get(id(distribution))
+        if sampler is None:
+            sampler = self._samplers[id(distribution)] = compile_distribution(distribution)
+        return sampler(size, self.rng)
+
+    def _sample_with(self, distribution: Distribution, size: int, rng: np.random.Generator) -> np.ndarray:
+        return self._sample(distribution, size)
+
+    def _record_patch_visits(self, sessions: np.ndarray) -> None:
+        if len(sessions) == 0:
+            return
+        record = np.zeros(len(sessions), dtype=PATCH_VISIT_DTYPE)
+        record["session"] = sessions
+        record["block"] = self.block[sessions]
+        record["state_index"] = self.state_index[sessions]
+        record["reward_sites"] = self.reward_sites[sessions]
+        record["choices"] = self.patch_choices[sessions]
+        record["rewards"] = self.patch_rewards[sessions]
+        record["water"] = self.patch_water[sessions]
+        record["duration"] = self.time[sessions] - self.patch_start[sessions, 0]
+        self.patch_visits.append(record)
+
+    def _record_sites(
+        self,
+        sessions: np.ndarray,
+        generator: str,
+        site_generator: task_logic.VirtualSiteGenerator,
+        length: np.ndarray,
+    ) -> None:
+        # Like the workflow, sites are identified by the integer part of their start position.
+        record = np.zeros(len(sessions), dtype=SITE_DTYPE)
+        record["session"] = sessions
+        record["id"] = np.floor(self.distance[sessions])
+        record["label"] = site_generator.label.value
+        record["generator"] = generator
+        record["block"] = self.block[sessions]
+        record["patch"] = self.column[sessions]
+        record["state_index"] = self.state_index[sessions]
+        record["start_position"] = self.distance[sessions]
+        record["length"] = np.maximum(length, 0)
+        contrast = site_generator.render_specification.contrast
+        record["contrast"] = contrast if contrast is not None else np.nan
+        self.sites.append(record)
+
+    def _odors(self, sessions: np.ndarray) -> np.ndarray:
+        n_odors = max(block.odors.shape[1] for block in self.blocks)
+        odors = np.zeros((len(sessions), n_odors))
+        for (b, c), at_patch in self._group_by_patch(sessions):
+            odors[at_patch, : self.blocks[b].odors.shape[1]] = self.blocks[b].odors[c]
+        return odors
+
+    def _keys(self, sessions: np.ndarray) -> List[Tuple[int, int]]:
+        return list(zip(self.block[sessions].tolist(), self.column[sessions].tolist()))
+
+    def _group_by_patch(self, sessions: np.ndarray):
+        """Yields the positions, within `sessions`, of the sessions in each (block, patch column)."""
+        keys = self.block[sessions] * (1 + self.column.max(initial=0)) + self.column[sessions]
+        for key in np.unique(keys):
+            at_patch = np.flatnonzero(keys == key)
+            first = sessions[at_patch[0]]
+            yield (int(self.block[first]), int(self.column[first])), at_patch
+
+
+def _is_sequence(environment: task_logic.Environment) -> bool:
+    return isinstance(environment, task_logic.SequenceEnvironment)
+
+
+def _weighted_sample(weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Samples one index per row of `weights`, like `WeightedSample` in the workflow."""
+    cumulative = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+    coin = rng.random(len(weights))
+    return np.minimum(np.sum(cumulative < coin[:, None], axis=1), weights.shape[1] - 1)
@@ -0,0 +1,78 @@
+from typing import Callable, Optional
+
+import aind_behavior_services.task.distributions as distributions
+import numpy as np
+
+from aind_behavior_vr_foraging import task_logic
+
+from .sampling import sample
+
+
+def apply_update_function(
+    function: task_logic.PatchUpdateFunction,
+    values: np.ndarray,
+    ticks: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    sampler: Callable[[distributions.Distribution, int, np.random.Generator], np.ndarray] = sample,
+) -> np.ndarray:
+    """Vectorized equivalent of `PatchUpdateFunction.Invoke` in the Bonsai workflow.
+
+    Args:
+        function: The patch update function to apply.
+        values: Current values of the patch state variable, one per session.
+        ticks: Tick value of the triggering rule, one per session.
+        rng: Random number generator used to sample rates and values.
+        sampler: Function drawing values from the distributions of the update function.
+
+    Returns:
+        The updated values.
+    """
+    n = len(values)
+    match function:
+        case task_logic.SetValueFunction():
+            return sampler(function.value, n, rng)
+        case task_logic.ClampedRateFunction():
+            return _clamp(values + sampler(function.rate, n, rng) * ticks, function.minimum, function.maximum)
+        case task_logic.ClampedMultiplicativeRateFunction():
+            return _clamp(values * sampler(function.rate, n, rng) ** ticks, function.minimum, function.maximum)
+        case task_logic.SaturatingMultiplicativeRateFunction():
+            raw = values * sampler(function.rate, n, rng) ** ticks
+            updated = raw
+            if function.maximum is not None:
+                above = function.above_maximum_to if function.above_maximum_to is not None else function.maximum
+                updated = np.where(raw >= function.maximum, above, updated)
+            # The minimum takes precedence, as it is checked first in the workflow.
+            if function.minimum is not None:
+                below = function.below_minimum_to if function.below_minimum_to is not None else function.minimum
+                updated = np.where(raw <= function.minimum, below, updated)
+            return updated
+        case task_logic.LookupTableFunction():
+            order = np.argsort(function.lut_keys)
+            return np.interp(ticks, np.asarray(function.lut_keys)[order], np.asarray(function.lut_values)[order])
+        case task_logic.CtcmFunction():
+            return _apply_ctcm(function, values, rng)
+        case _:
+            raise ValueError(f"Unsupported patch update function: {type(function).__name__}")
+
+
+def _clamp(values: np.ndarray, minimum: Optional[float], maximum: Optional[float]) -> np.ndarray:
+    if maximum is not None:
+        values = np.minimum(values, maximum)
+    if minimum is not None:
+        values = np.maximum(values, minimum)
+    return values
+
+
+def _apply_ctcm(function: task_logic.CtcmFunction, values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    transition_matrix = np.asarray(function.transition_matrix, dtype=float)
+    n_states = transition_matrix.shape[0]
+    values = np.clip(values, function.minimum, function.maximum)
+    current = n_states - 1 - np.round(np.log(values / function.maximum) / np.log(function.rho)).astype(int)
+    current = np.clip(current, 0, n_states - 1)
+    coin = rng.random(len(values))
+    # Index of the first state whose cumulative probability exceeds the coin, or n_states if none does.
+    following = np.sum(np.cumsum(transition_matrix, axis=1)[current] <= coin[:, None], axis=1)
+    following = np.minimum(following, n_states - 1)
+    updated = values / function.rho ** (following - current)
+    return np.clip(updated, function.minimum, function.maximum)
@@ -0,0 +1,105 @@
+import abc
+import dataclasses
+from typing import Dict
+
+import numpy as np
+
+
+@dataclasses.dataclass(frozen=True)
+class SiteObservation:
+    """What the simulated animals know when they reach a reward site.
+
+    Each array has one entry per session that is currently at a reward site.
+    """
+
+    sessions: np.ndarray
+    """Index of each session in the batch."""
+    state_index: np.ndarray
+    """`Patch.state_index` of the active patch."""
+    odor: np.ndarray
+    """Odor mixture of the active patch, with shape (n, n_odors)."""
+    sites_in_patch: np.ndarray
+    """Number of reward sites visited in the active patch before this one."""
+    choices_in_patch: np.ndarray
+    """Number of choices made in the active patch."""
+    rewards_in_patch: np.ndarray
+    """Number of rewards collected in the active patch."""
+    consecutive_failures: np.ndarray
+    """Number of unrewarded choices since the last reward in the active patch."""
+    time_in_patch: np.ndarray
+    """Time (s) since entering the active patch."""
+
+
+class Agent(abc.ABC):
+    """Base class for synthetic agents driving the simulator.
+
+    An agent runs through the corridor at `running_speed` and decides, at each
+    reward site, whether to stop. Agents are vectorized: every call receives the
+    state of all the sessions that need a decision at once.
+    """
+
+    def __init__(self, running_speed: float = 30.0):
+        """
+        Args:
+            running_speed: Running speed (cm/s) through the corridor.
+        """
+        if running_speed <= 0:
+            raise ValueError("running_speed must be positive.")
+        self.running_speed = running_speed
+
+    def reset(self, n_sessions: int, rng: np.random.Generator) -> None:
+        """Called once before a batch of `n_sessions` sessions is simulated."""
+
+    def speed(self, sessions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Returns the running speed (cm/s) of each of `sessions` through its next site."""
+        return np.full(len(sessions), self.running_speed)
+
+    @abc.abstractmethod
+    def choose(self, observation: SiteObservation, rng: np.random.Generator) -> np.ndarray:
+        """Returns, for each observed session, whether the animal stops at the reward site."""
+
+    def update(self, observation: SiteObservation, stopped: np.ndarray, rewarded: np.ndarray) -> None:
+        """Called with the outcome of each decision returned by `choose`."""
+
+
+class RandomAgent(Agent):
+    """Stops at each reward site with a fixed probability."""
+
+    def __init__(self, stop_probability: float = 0.5, running_speed: float = 30.0):
+        super().__init__(running_speed=running_speed)
+        if not 0 <= stop_probability <= 1:
+            raise ValueError("stop_probability must be between 0 and 1.")
+        self.stop_probability = stop_probability
+
+    def choose(self, observation: SiteObservation, rng: np.random.Generator) -> np.ndarray:
+        return rng.random(len(observation.sessions)) < self.stop_probability
+
+
+class ConsecutiveFailuresAgent(Agent):
+    """Stops at every reward site until `max_consecutive_failures` unrewarded choices in a row, then leaves."""
+
+    def __init__(self, max_consecutive_failures: int = 1, running_speed: float = 30.0):
+        super().__init__(running_speed=running_speed)
+        if max_consecutive_failures < 1:
+            raise ValueError("max_consecutive_failures must be at least 1.")
+        self.max_consecutive_failures = max_consecutive_failures
+
+    def choose(self, observation: SiteObservation, rng: np.random.Generator) -> np.ndarray:
+        return observation.consecutive_failures < self.max_consecutive_failures
+
+
+class StatePreferenceAgent(Agent):
+    """Stops with a probability that depends on the state index of the active patch."""
+
+    def __init__(
+        self, stop_probabilities: Dict[int, float], default_probability: float = 0.0, running_speed: float = 30.0
+    ):
+        super().__init__(running_speed=running_speed)
+        self.stop_probabilities = dict(stop_probabilities)
+        self.default_probability = default_probability
+
+    def choose(self, observation: SiteObservation, rng: np.random.Generator) -> np.ndarray:
+        probabilities = np.full(len(observation.sessions), self.default_probability)
+        for state_index, probability in self.stop_probabilities.items():
+            probabilities[observation.state_index == state_index] = probability
+        return rng.random(len(observation.sessions)) < probabilities
@@ -0,0 +1,243 @@
+import dataclasses
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+
+from aind_behavior_vr_foraging import task_logic
+
+from ._engine import simulate
+from .agents import Agent, ConsecutiveFailuresAgent
+
+CORRIDOR_DTYPE = np.dtype(
+    [
+        ("id", np.int64),
+        ("start_position", np.float64),
+        ("length", np.float64),
+        ("width", np.float64),
+        ("height", np.float64),
+    ]
+)
+"""Record of a single visual corridor in `CorridorLayout.corridors`."""
+
+DEFAULT_WALL_TEXTURES = task_logic.WallTextures(
+    floor=task_logic.Texture(name="Floor"),
+    ceiling=task_logic.Texture(name="Ceiling"),
+    left=task_logic.Texture(name="LeftWall"),
+    right=task_logic.Texture(name="RightWall"),
+)
+"""Textures bound to every visual corridor by the workflow's CorridorFactory."""
+
+
+@dataclasses.dataclass(frozen=True)
+class CorridorLayout:
+    """Array-backed layout of the virtual sites and visual corridors of a session."""
+
+    sites: np.ndarray
+    """One record per virtual site, in order, with the fields of `SITE_DTYPE`."""
+    odors: np.ndarray
+    """Odor mixture of each site, with shape (n_sites, n_odors). NaN for sites without odor."""
+    corridors: np.ndarray
+    """One record per visual corridor, in order, with the fields of `CORRIDOR_DTYPE`."""
+    textures: task_logic.WallTextures
+    """Textures shared by all visual corridors."""
+    task: task_logic.AindVrForagingTaskLogic = dataclasses.field(repr=False)
+
+    @property
+    def length(self) -> float:
+        """Position (cm) of the end of the last virtual site."""
+        if len(self.sites) == 0:
+            return 0.0
+        return float(self.sites["start_position"][-1] + self.sites["length"][-1])
+
+    def virtual_sites(self) -> List[task_logic.VirtualSite]:
+        """Returns the virtual sites as task logic models, like those logged in the ActiveSite stream."""
+        blocks = self.task.task_parameters.environment.blocks
+        virtual_sites = []
+        for site, odor in zip(self.sites, self.odors):
+            patch = blocks[site["block"]].environment.patches[site["patch"]]
+            site_generator = getattr(patch.patch_virtual_sites_generator, str(site["generator"]))
+            reward_specification = None
+            operant_logic = patch.reward_specification.operant_logic
+            if site["generator"] == "reward_site" and operant_logic is not None:
+                reward_specification = task_logic.VirtualSiteRewardSpecification(
+                    operant_logic=operant_logic, delay=patch.reward_specification.delay
+                )
+            virtual_sites.append(
+                task_logic.VirtualSite(
+                    id=int(site["id"]),
+                    label=str(site["label"]),
+                    length=float(site["length"]),
+                    start_position=float(site["start_position"]),
+                    odor_specification=None if np.isnan(odor).all() else odor.tolist(),
+                    reward_specification=reward_specification,
+                    render_specification=site_generator.render_specification,
+                    treadmill_specification=site_generator.treadmill_specification,
+                )
+            )
+        return virtual_sites
+
+    def visual_corridors(self) -> List[task_logic.VisualCorridor]:
+        """Returns the visual corridors as task logic models, like those logged in the VisualCorridorSpecs stream."""
+        return [
+            task_logic.VisualCorridor(
+                id=int(corridor["id"]),
+                start_position=float(corridor["start_position"]),
+                length=float(corridor["length"]),
+                size=task_logic.Size(width=float(corridor["width"]), height=float(corridor["height"])),
+                textures=self.textures,
+            )
+            for corridor in self.corridors
+        ]
+
+
+@dataclasses.dataclass(frozen=True)
+class CorridorDifference:
+    """A mismatch between an expected and a logged visual corridor."""
+
+    id: int
+    field: str
+    """Mismatched field, or "missing"/"unexpected" if the corridor is only in one of the layouts."""
+    expected: Any
+    logged: Any
+
+
+def compile_corridor(
+    task: task_logic.AindVrForagingTaskLogic,
+    agent: Optional[Agent] = None,
+    *,
+    seed: Optional[int] = None,
+    max_distance: Optional[float] = None,
+    max_duration: float = 3600.0,
+    far_clip_horizon: float = 1000.0,
+    corridor_length: float = 120.0,
+    corridor_width: float = 40.0,
+    corridor_height: float = 30.0,
+    textures: Optional[task_logic.WallTextures] = None,
+) -> CorridorLayout:
+    """Pre-generates the corridor layout of a session without running Bonsai.
+
+    Which sites are generated depends on the choices of the animal, so a single
+    session is simulated with `agent` and every virtual site is recorded. Sites
+    follow the workflow: each starts where the previous one ends, is identified by
+    the integer part of its start position, and only reward sites carry the odor
+    of their patch. Visual corridors tile the track in `corridor_length` segments,
+    up to the far clip horizon ahead of the last site.
+
+    The layout is deterministic for a given seed, but NumPy does not reproduce the
+    random stream of the workflow, so sampled lengths differ from those of a
+    session acquired with the same `rng_seed`.
+
+    Args:
+        task: The task logic of the session.
+        agent: Agent deciding where to stop. Defaults to a `ConsecutiveFailuresAgent`.
+        seed: Seed of the random number generator. Defaults to the task `rng_seed`.
+        max_distance: Optional length (cm) of track to generate.
+        max_duration: Duration (s) of the simulated session.
+        far_clip_horizon: Distance (cm) ahead of the animal up to which corridors are instantiated.
+        corridor_length: Length (cm) of each visual corridor.
+        corridor_width: Width (cm) of each visual corridor.
+        corridor_height: Height (cm) of each visual corridor.
+        textures: Textures of the visual corridors. Defaults to `DEFAULT_WALL_TEXTURES`.
+
+    Returns:
+        The compiled layout.
+    """
+    agent = agent if agent is not None else ConsecutiveFailuresAgent()
+    if seed is None and task.task_parameters.rng_seed is not None:
+        seed = int(task.task_parameters.rng_seed)
+    result = simulate(
+        task,
+        agent,
+        1,
+        max_duration=max_duration,
+        max_distance=max_distance,
+        seed=seed,
+        record_sites=True,
+    )
+    sites = result.sites
+    if max_distance is not None:
+        sites = sites[sites["start_position"] < max_distance]
+
+    blocks = [block.environment.patches for block in task.task_parameters.environment.blocks]
+    n_odors = max(len(patch.odor_specification) for patches in blocks for patch in patches)
+    odors = np.full((len(sites), n_odors), np.nan)
+    for i in np.flatnonzero(sites["generator"] == "reward_site"):
+        odor = blocks[sites["block"][i]][sites["patch"][i]].odor_specification
+        odors[i] = 0
+        odors[i, : len(odor)] = odor
+
+    end = float(sites["start_position"][-1] + sites["length"][-1]) if len(sites) > 0 else 0.0
+    ids = np.arange(int(np.floor((end + far_clip_horizon) / corridor_length)) + 1)
+    corridors = np.zeros(len(ids), dtype=CORRIDOR_DTYPE)
+    corridors["id"] = ids
+    corridors["start_position"] = ids * corridor_length
+    corridors["length"] = corridor_length
+    corridors["width"] = corridor_width
+    corridors["height"] = corridor_height
+
+    return CorridorLayout(
+        sites=sites,
+        odors=odors,
+        corridors=corridors,
+        textures=textures if textures is not None else DEFAULT_WALL_TEXTURES,
+        task=task,
+    )
+
+
+def diff_visual_corridors(
+    expected: CorridorLayout | Iterable[task_logic.VisualCorridor],
+    logged: Iterable[task_logic.VisualCorridor | dict],
+    *,
+    tolerance: float = 1e-3,
+) -> List[CorridorDifference]:
+    """Compares expected visual corridors against those logged in the VisualCorridorSpecs stream.
+
+    Only corridors up to the last logged one are compared, since a compiled layout
+    usually extends beyond the end of the acquired session.
+
+    Args:
+        expected: A compiled layout, or the expected visual corridors.
+        logged: The logged visual corridors, as models or as their serialized dictionaries.
+        tolerance: Absolute tolerance (cm) when comparing positions and sizes.
+
+    Returns:
+        The differences found, ordered by corridor id.
+    """
+    if isinstance(expected, CorridorLayout):
+        expected = expected.visual_corridors()
+    expected_by_id = {corridor.id: corridor for corridor in expected}
+    logged_by_id = {}
+    for corridor in logged:
+        corridor = task_logic.VisualCorridor.model_validate(corridor)
+        logged_by_id[corridor.id] = corridor
+    if not logged_by_id:
+        return []
+
+    last_logged = max(logged_by_id)
+    differences = []
+    for corridor_id in sorted(set(logged_by_id) | {i for i in expected_by_id if i <= last_logged}):
+        expected_corridor, logged_corridor = expected_by_id.get(corridor_id), logged_by_id.get(corridor_id)
+        if logged_corridor is None:
+            differences.append(CorridorDifference(corridor_id, "missing", expected_corridor, None))
+        elif expected_corridor is None:
+            differences.append(CorridorDifference(corridor_id, "unexpected", None, logged_corridor))
+        else:
+            differences.extend(_diff_corridor(expected_corridor, logged_corridor, tolerance))
+    return differences
+
+
+def _diff_corridor(
+    expected: task_logic.VisualCorridor, logged: task_logic.VisualCorridor, tolerance: float
+) -> List[CorridorDifference]:
+    differences = []
+    for field in ("start_position", "length"):
+        if abs(getattr(expected, field) - getattr(logged, field)) > tolerance:
+            differences.append(CorridorDifference(expected.id, field, getattr(expected, field), getattr(logged, field)))
+    if (
+        abs(expected.size.width - logged.size.width) > tolerance
+        or abs(expected.size.height - logged.size.height) > tolerance
+    ):
+        differences.append(CorridorDifference(expected.id, "size", expected.size, logged.size))
+    if expected.textures != logged.textures:
+        differences.append(CorridorDifference(expected.id, "textures", expected.textures, logged.textures))
+    return differences
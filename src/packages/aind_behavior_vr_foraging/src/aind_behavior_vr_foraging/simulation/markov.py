@@ -0,0 +1,600 @@
+import dataclasses
+import logging
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aind_behavior_services.task.distributions as distributions
+import numpy as np
+
+from aind_behavior_vr_foraging import task_logic
+
+from ._update_functions import apply_update_function
+from .sampling import _MAX_EXCLUDE_ATTEMPTS, _compile_json, compile_distribution
+
+logger = logging.getLogger(__name__)
+
+_QUADRATURE_SIZE = 100_000
+_NEGLIGIBLE = 1e-15
+_STATE_VARIABLES = ("amount", "probability", "available")
+_EVENT_RULES = (
+    task_logic.RewardFunctionRule.ON_REWARD,
+    task_logic.RewardFunctionRule.ON_REWARD_AMOUNT,
+    task_logic.RewardFunctionRule.ON_CHOICE,
+    task_logic.RewardFunctionRule.ON_CHOICE_ACCUMULATED,
+    task_logic.RewardFunctionRule.ON_REWARD_ACCUMULATED,
+)
+_COUNTED_TERMINATORS = ("OnRejection", "OnChoice", "OnReward", "OnRewardSite")
+
+_Moments = Callable[[float], Tuple[float, float]]
+"""Returns the probability that a value is at most `x`, and the expectation of values over that event."""
+
+
+@dataclasses.dataclass(frozen=True)
+class PatchExpectation:
+    """Expected outcome of a single visit to a patch."""
+
+    state_index: int
+    label: str
+    reward_sites: float
+    """Expected number of reward sites visited."""
+    choices: float
+    """Expected number of reward sites where the animal stopped."""
+    rewards: float
+    """Expected number of rewards."""
+    water: float
+    """Expected water (uL) collected."""
+    distance: float
+    """Expected distance (cm) traveled, from the start of the inter-patch site to the end of the patch."""
+    truncated: float
+    """Probability that the visit lasts beyond the maximum number of reward sites analyzed."""
+
+
+@dataclasses.dataclass(frozen=True)
+class MarkovAnalysis:
+    """Long-run statistics of a Markov environment.
+
+    Arrays are indexed by the position of the state in `state_indices`, which
+    follows the rows of the transition matrix.
+    """
+
+    state_indices: np.ndarray
+    transition_matrix: np.ndarray
+    """Row-normalized transition matrix between patches."""
+    first_state_distribution: np.ndarray
+    """Distribution of the first patch of the block."""
+    stationary_distribution: np.ndarray
+    """Long-run fraction of patch visits to each state, starting from `first_state_distribution`."""
+    second_eigenvalue_modulus: float
+    """Largest modulus of the eigenvalues of the transition matrix other than 1."""
+    mixing_time: float
+    """Number of patch visits after which the distribution of the patch visited is within 0.25 (in total
+    variation) of its long-run distribution, from any first state. Infinite for periodic chains."""
+    patches: List[PatchExpectation]
+    """Expected outcome of a visit to each state."""
+
+    @property
+    def rewards_per_patch(self) -> float:
+        return float(self.stationary_distribution @ self._expected("rewards"))
+
+    @property
+    def water_per_patch(self) -> float:
+        return float(self.stationary_distribution @ self._expected("water"))
+
+    @property
+    def distance_per_patch(self) -> float:
+        return float(self.stationary_distribution @ self._expected("distance"))
+
+    @property
+    def rewards_per_distance(self) -> float:
+        """Long-run number of rewards per cm traveled."""
+        return self.rewards_per_patch / self.distance_per_patch
+
+    @property
+    def water_per_distance(self) -> float:
+        """Long-run water (uL) collected per cm traveled."""
+        return self.water_per_patch / self.distance_per_patch
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the analysis as a json-serializable dictionary."""
+        return {
+            "stationary_distribution": {
+                int(state): float(p) for state, p in zip(self.state_indices, self.stationary_distribution)
+            },
+            "second_eigenvalue_modulus": self.second_eigenvalue_modulus,
+            "mixing_time": self.mixing_time,
+            "rewards_per_patch": self.rewards_per_patch,
+            "water_per_patch": self.water_per_patch,
+            "distance_per_patch": self.distance_per_patch,
+            "rewards_per_distance": self.rewards_per_distance,
+            "water_per_distance": self.water_per_distance,
+            "patches": [dataclasses.asdict(patch) for patch in self.patches],
+        }
+
+    def _expected(self, name: str) -> np.ndarray:
+        return np.array([getattr(patch, name) for patch in self.patches])
+
+
+def stationary_distribution(transition_matrix: np.ndarray, initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """Returns the long-run fraction of time a Markov chain spends in each state.
+
+    For chains with several closed classes the result depends on the initial
+    distribution, and for periodic chains it is the time average of the
+    distribution of the chain.
+
+    Args:
+        transition_matrix: Row-stochastic transition matrix.
+        initial: Initial distribution of the chain. Defaults to uniform.
+    """
+    transition_matrix = np.asarray(transition_matrix, dtype=float)
+    n_states = len(transition_matrix)
+    initial = np.full(n_states, 1 / n_states) if initial is None else np.asarray(initial, dtype=float)
+    return initial @ _limit_matrix(transition_matrix)
+
+
+def mixing_time(transition_matrix: np.ndarray, epsilon: float = 0.25, max_steps: int = 10_000) -> float:
+    """Returns the number of steps after which the chain is within `epsilon` of its long-run distribution.
+
+    The distance is the total variation distance from the worst-case initial state.
+    Returns infinity if the chain does not mix within `max_steps` steps, e.g. if it is periodic.
+    """
+    transition_matrix = np.asarray(transition_matrix, dtype=float)
+    limit = _limit_matrix(transition_matrix)
+    power = np.eye(len(transition_matrix))
+    for step in range(max_steps + 1):
+        if 0.5 * np.abs(power - limit).sum(axis=1).max() <= epsilon:
+            return float(step)
+        power = power @ transition_matrix
+    return float("inf")
+
+
+def analyze_markov_environment(
+    environment: task_logic.MarkovEnvironment,
+    *,
+    stop_probability: float | Dict[int, float] = 1.0,
+    max_sites: int = 256,
+) -> MarkovAnalysis:
+    """Computes the long-run statistics of a Markov environment without simulating sessions.
+
+    The patch sequence is analyzed as a Markov chain, and the expected outcome of a
+    visit to each patch is computed by propagating the distribution of the number of
+    choices and rewards of the visit, one reward site at a time. Its long-run
+    averages then follow from the stationary distribution of the chain.
+
+    The analysis makes the following assumptions:
+
+    - The animal stops at each reward site with `stop_probability`, like `RandomAgent`,
+      or always if the reward site is not operant.
+    - Every visit starts from the initial reward specification of the patch. State
+      carried over between visits is not modeled, and neither are reward functions
+      with time- or distance-based rules (e.g. replenishment), which are ignored.
+    - Update functions are applied to the expected patch state, using the mean of
+      their distributions. This is exact when the state is a deterministic function
+      of the number of choices and rewards in the visit.
+
+    Use `simulate` for tasks that do not meet these assumptions.
+
+    Args:
+        environment: The Markov environment to analyze.
+        stop_probability: Probability of stopping at a reward site, or a mapping of
+            patch state index to that probability. States missing from the mapping never stop.
+        max_sites: Maximum number of reward sites of a single visit considered.
+
+    Returns:
+        The analysis of the environment.
+    """
+    n_states = len(environment.transition_matrix)
+    patches = {patch.state_index: patch for patch in environment.patches}
+    missing = [i for i in range(n_states) if i not in patches]
+    if missing:
+        raise ValueError(f"Transition matrix states {missing} do not correspond to any patch.state_index.")
+    matrix = np.asarray(environment.transition_matrix, dtype=float)
+    row_sums = matrix.sum(axis=1, keepdims=True)
+    if np.any(row_sums <= 0):
+        raise ValueError("Transition matrix rows must sum to a positive value.")
+    matrix = matrix / row_sums
+
+    occupancy = environment.first_state_occupancy
+    if occupancy:
+        if len(occupancy) != n_states:
+            raise ValueError("The number of initial states must match the number of states in the transition matrix.")
+        first_state = np.asarray(occupancy, dtype=float) / np.sum(occupancy)
+    else:
+        first_state = np.full(n_states, 1 / n_states)
+
+    expectations = []
+    for state_index in range(n_states):
+        if isinstance(stop_probability, dict):
+            probability = stop_probability.get(state_index, 0.0)
+        else:
+            probability = stop_probability
+        expectations.append(_visit_expectation(patches[state_index], probability, max_sites))
+
+    eigenvalues = np.abs(np.linalg.eigvals(matrix))
+    non_unit = eigenvalues[~np.isclose(eigenvalues, 1.0)]
+    return MarkovAnalysis(
+        state_indices=np.arange(n_states),
+        transition_matrix=matrix,
+        first_state_distribution=first_state,
+        stationary_distribution=stationary_distribution(matrix, first_state),
+        second_eigenvalue_modulus=float(non_unit.max(initial=0.0)),
+        mixing_time=mixing_time(matrix),
+        patches=expectations,
+    )
+
+
+def analyze_task(task: task_logic.AindVrForagingTaskLogic, **kwargs) -> Dict[int, MarkovAnalysis]:
+    """Analyzes the Markov environment of each block of a task logic.
+
+    Keyword arguments are passed to `analyze_markov_environment`.
+
+    Returns:
+        The analysis of each block with a Markov environment, by block index.
+    """
+    return {
+        i: analyze_markov_environment(block.environment, **kwargs)
+        for i, block in enumerate(task.task_parameters.environment.blocks)
+        if isinstance(block.environment, task_logic.MarkovEnvironment)
+    }
+
+
+def _visit_expectation(patch: task_logic.Patch, stop_probability: float, max_sites: int) -> PatchExpectation:
+    for terminator in patch.patch_terminators:
+        if terminator.terminator_type not in _COUNTED_TERMINATORS:
+            raise ValueError(f"{terminator.terminator_type} patch terminators cannot be analyzed. Use `simulate`.")
+    specification = patch.reward_specification
+    if specification.operant_logic is None or not specification.operant_logic.is_operant:
+        stop_probability = 1.0
+    entry_functions, event_functions = _visit_functions(patch)
+
+    # Patch state and probability mass of the visit, by number of choices (rows) and rewards (columns).
+    size = max_sites + 2
+    mass = np.zeros((size, size))
+    mass[0, 0] = 1.0
+    state = {name: np.full((size, size), _mean(getattr(specification, name))) for name in _STATE_VARIABLES}
+    for function in entry_functions:
+        _apply(function, state, np.ones((size, size)))
+    survival_functions = [
+        (terminator.terminator_type, _survival_function(terminator.count, size))
+        for terminator in patch.patch_terminators
+    ]
+
+    reward_sites = expected_choices = expected_rewards = water = 0.0
+    for site in range(max_sites + 1):
+        # Only the states with some probability mass are computed, with room for one more choice and reward.
+        rows, columns = np.flatnonzero(mass.any(axis=1)), np.flatnonzero(mass.any(axis=0))
+        if len(rows) == 0:
+            break
+        window = (slice(rows[0], rows[-1] + 2), slice(columns[0], columns[-1] + 2))
+        choices, rewards = np.indices((rows[-1] + 2 - rows[0], columns[-1] + 2 - columns[0]))
+        choices, rewards = choices + rows[0], rewards + columns[0]
+        survival = np.where((choices <= site) & (rewards <= choices), 1.0, 0.0)
+        for terminator_type, survival_function in survival_functions:
+            progress = {"OnRejection": site - choices, "OnChoice": choices, "OnReward": rewards, "OnRewardSite": site}
+            survival *= survival_function[np.clip(progress[terminator_type], 0, size - 1)]
+        # Descendants of a terminated state are terminated too, as counters only increase.
+        # States that are all but unreachable are dropped as well.
+        mass[window] = np.where((survival > 0) & (mass[window] > _NEGLIGIBLE), mass[window], 0.0)
+        alive = mass[window] * survival
+        if site == max_sites or alive.sum() < _NEGLIGIBLE:
+            break
+        reward_sites += alive.sum()
+
+        current = {name: values[window] for name, values in state.items()}
+        probability = np.clip(current["probability"], 0, 1)
+        rewarded = stop_probability * np.where(current["available"] > 0, probability, 0.0)
+        delivered = np.minimum(current["amount"], current["available"])
+        expected_choices += stop_probability * alive.sum()
+        expected_rewards += (alive * rewarded).sum()
+        water += (alive * rewarded * delivered).sum()
+
+        failed_state = {name: values.copy() for name, values in current.items()}
+        rewarded_state = {name: values.copy() for name, values in current.items()}
+        rewarded_state["available"] = np.maximum(current["available"] - delivered, 0)
+        ones = np.ones(choices.shape)
+        for function in event_functions:
+            rule = task_logic.RewardFunctionRule(function.rule)
+            if rule in (task_logic.RewardFunctionRule.ON_CHOICE, task_logic.RewardFunctionRule.ON_CHOICE_ACCUMULATED):
+                ticks = ones if rule == task_logic.RewardFunctionRule.ON_CHOICE else choices + 1.0
+                _apply(function, failed_state, ticks)
+                _apply(function, rewarded_state, ticks)
+            else:
+                ticks = {
+                    task_logic.RewardFunctionRule.ON_REWARD: ones,
+                    task_logic.RewardFunctionRule.ON_REWARD_AMOUNT: delivered,
+                    task_logic.RewardFunctionRule.ON_REWARD_ACCUMULATED: rewards + 1.0,
+                }[rule]
+                _apply(function, rewarded_state, ticks)
+
+        rejected_mass = mass[window] * (1 - stop_probability)
+        failed_mass = _shift(mass[window] * (stop_probability - rewarded), 1, 0)
+        rewarded_mass = _shift(mass[window] * rewarded, 1, 1)
+        next_mass = rejected_mass + failed_mass + rewarded_mass
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for name in _STATE_VARIABLES:
+                merged = (
+                    rejected_mass * current[name]
+                    + failed_mass * _shift(failed_state[name], 1, 0)
+                    + rewarded_mass * _shift(rewarded_state[name], 1, 1)
+                ) / next_mass
+                state[name][window] = np.where(next_mass > 0, merged, current[name])
+        mass[window] = next_mass
+
+    truncated = float(alive.sum()) if site == max_sites else 0.0
+    generator = patch.patch_virtual_sites_generator
+    distance = (
+        _mean_length(generator.inter_patch)
+        + _mean_length(generator.inter_site) * (reward_sites + 1)
+        + _mean_length(generator.reward_site) * reward_sites
+        + (_mean_length(generator.post_patch) if generator.post_patch is not None else 0.0)
+    )
+    return PatchExpectation(
+        state_index=patch.state_index,
+        label=patch.label,
+        reward_sites=float(reward_sites),
+        choices=float(expected_choices),
+        rewards=float(expected_rewards),
+        water=float(water),
+        distance=float(distance),
+        truncated=truncated,
+    )
+
+
+def _visit_functions(patch: task_logic.Patch):
+    entry_functions, event_functions, ignored = [], [], []
+    for function in patch.reward_specification.reward_function:
+        rule = task_logic.RewardFunctionRule(function.rule)
+        if function.function_type == "OutsideRewardFunction":
+            ignored.append(function)
+        elif rule == task_logic.RewardFunctionRule.ON_THIS_PATCH_ENTRY:
+            entry_functions.append(function)
+        elif rule in _EVENT_RULES:
+            event_functions.append(function)
+        elif rule == task_logic.RewardFunctionRule.ON_PATCH_ENTRY:
+            entry_functions.append(function)
+        else:
+            ignored.append(function)
+    # The workflow applies functions triggered on this patch's entry before those triggered on any entry.
+    entry_functions.sort(key=lambda f: f.rule != task_logic.RewardFunctionRule.ON_THIS_PATCH_ENTRY)
+    if ignored:
+        logger.warning(
+            "Ignoring reward functions of patch %s that cannot be analyzed: %s",
+            patch.state_index,
+            ", ".join(f"{f.function_type}({task_logic.RewardFunctionRule(f.rule).value})" for f in ignored),
+        )
+    return entry_functions, event_functions
+
+
+def _apply(function: task_logic.RewardFunction, state: Dict[str, np.ndarray], ticks: np.ndarray) -> None:
+    for name in _STATE_VARIABLES:
+        update_function = getattr(function, name)
+        if update_function is None:
+            continue
+        values = state[name].ravel()
+        if isinstance(update_function, task_logic.CtcmFunction):
+            updated = _expected_ctcm_update(update_function, values)
+        else:
+            updated = apply_update_function(
+                update_function, values, np.broadcast_to(ticks, state[name].shape).ravel(), None, sampler=_mean_sampler
+            )
+        state[name] = np.asarray(updated, dtype=float).reshape(state[name].shape)
+
+
+def _expected_ctcm_update(function: task_logic.CtcmFunction, values: np.ndarray) -> np.ndarray:
+    transition_matrix = np.asarray(function.transition_matrix, dtype=float)
+    n_states = transition_matrix.shape[0]
+    values = np.clip(values, function.minimum, function.maximum)
+    current = n_states - 1 - np.round(np.log(values / function.maximum) / np.log(function.rho)).astype(int)
+    current = np.clip(current, 0, n_states - 1)
+    following = np.arange(n_states)
+    updated = values[:, None] / function.rho ** (following[None, :] - current[:, None])
+    updated = np.clip(updated, function.minimum, function.maximum)
+    return np.sum(transition_matrix[current] * updated, axis=1)
+
+
+def _survival_function(count: distributions.Distribution, size: int) -> np.ndarray:
+    """Probability that a terminator with threshold `count` is not reached, for progress values 0 to `size` - 1."""
+    thresholds = _quadrature(count)
+    return 1 - np.searchsorted(thresholds, np.arange(size), side="right") / len(thresholds)
+
+
+def _shift(values: np.ndarray, rows: int, columns: int) -> np.ndarray:
+    shifted = np.zeros_like(values)
+    shifted[rows:, columns:] = values[: values.shape[0] - rows, : values.shape[1] - columns]
+    return shifted
+
+
+def _limit_matrix(transition_matrix: np.ndarray) -> np.ndarray:
+    """Returns the Cesaro limit of the powers of `transition_matrix`, from the powers of its lazy chain."""
+    limit = 0.5 * (np.eye(len(transition_matrix)) + transition_matrix)
+    for _ in range(64):
+        squared = limit @ limit
+        if np.allclose(squared, limit, rtol=0, atol=1e-14):
+            break
+        limit = squared
+    return squared
+
+
+def _mean_sampler(distribution: distributions.Distribution, size: int, rng: Any) -> np.ndarray:
+    return np.full(size, _mean(distribution))
+
+
+def _mean(distribution: distributions.Distribution | float) -> float:
+    partial_expectation = _partial_expectation(distribution)
+    if partial_expectation is None:
+        return float(np.mean(_quadrature(distribution)))
+    return partial_expectation(math.inf)
+
+
+def _mean_length(generator: task_logic.VirtualSiteGenerator) -> float:
+    # Like the simulator, negative lengths are traversed as empty sites.
+    partial_expectation = _partial_expectation(generator.length_distribution)
+    if partial_expectation is None:
+        return float(np.mean(np.maximum(_quadrature(generator.length_distribution), 0)))
+    return partial_expectation(math.inf) - partial_expectation(0.0)
+
+
+def _partial_expectation(distribution: distributions.Distribution | float) -> Optional[Callable[[float], float]]:
+    """Returns the function `y -> E[Y; Y <= y]` of values `Y` drawn from `distribution`, if known in closed form.
+
+    Scaling and truncation follow `DistributionSampler`. Returns None for families
+    without a closed form here, whose expectations are then sampled.
+    """
+    if isinstance(distribution, (int, float)) or isinstance(
+        distribution.distribution_parameters, distributions.ScalarDistributionParameter
+    ):
+        value = float(_quadrature(distribution)[0])
+        return lambda y: value if y >= value else 0.0
+
+    moments = _unscaled_moments(distribution.distribution_parameters)
+    scaling = distribution.scaling_parameters
+    scale, offset = (float(scaling.scale), float(scaling.offset)) if scaling is not None else (1.0, 0.0)
+    if moments is None or scale == 0:
+        return None
+    scaled = _scaled_moments(moments, scale, offset)
+
+    truncation = distribution.truncation_parameters
+    if truncation is None:
+        return lambda y: scaled(y)[1]
+    minimum, maximum = float(truncation.min), float(truncation.max)
+    below, partial_below = scaled(minimum)
+    above, partial_above = scaled(maximum)
+    if truncation.truncation_mode == "clamp":
+        at_minimum = minimum * below - partial_below
+        total = at_minimum + partial_above + maximum * (1 - above)
+        return lambda y: 0.0 if y < minimum else (total if y >= maximum else at_minimum + scaled(y)[1])
+
+    # Values still excluded after the last redraw are set to the bound closest to the mean of the drawn values.
+    mass = above - below
+    excluded = (1 - mass) ** (_MAX_EXCLUDE_ATTEMPTS + 1)
+    mean = (partial_above - partial_below) / mass if mass > 0 else scaled(math.inf)[1]
+    closest = minimum if abs(mean - minimum) <= abs(mean - maximum) else maximum
+
+    def partial_expectation(y: float) -> float:
+        if y < minimum:
+            return 0.0
+        included = (scaled(min(y, maximum))[1] - partial_below) / mass if mass > 0 else 0.0
+        return (1 - excluded) * included + (excluded * closest if y >= closest else 0.0)
+
+    return partial_expectation
+
+
+def _scaled_moments(moments: _Moments, scale: float, offset: float) -> _Moments:
+    """Returns the moments of `scale * X + offset`, from those of a continuous variable `X`."""
+    mean = moments(math.inf)[1]
+
+    def scaled(y: float) -> Tuple[float, float]:
+        probability, partial = moments((y - offset) / scale)
+        if scale > 0:
+            return probability, scale * partial + offset * probability
+        return 1 - probability, scale * (mean - partial) + offset * (1 - probability)
+
+    return scaled
+
+
+def _unscaled_moments(parameters: distributions.DistributionParametersBase) -> Optional[_Moments]:
+    """Returns the moments of a continuous distribution family, or None if not known in closed form."""
+    match parameters:
+        case distributions.NormalDistributionParameters() if parameters.std > 0:
+            mean, std = parameters.mean, parameters.std
+
+            def moments(x: float) -> Tuple[float, float]:
+                z = (x - mean) / std
+                probability = _normal_cdf(z)
+                return probability, mean * probability - std * math.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+
+            return _bounded(moments, mean)
+        case distributions.LogNormalDistributionParameters() if parameters.std > 0:
+            mu, sigma = parameters.mean, parameters.std
+            mean = math.exp(mu + 0.5 * sigma**2)
+
+            def moments(x: float) -> Tuple[float, float]:
+                if x <= 0:
+                    return 0.0, 0.0
+                z = (math.log(x) - mu) / sigma
+                return _normal_cdf(z), mean * _normal_cdf(z - sigma)
+
+            return _bounded(moments, mean)
+        case distributions.UniformDistributionParameters() if parameters.min != parameters.max:
+            low, high = sorted((parameters.min, parameters.max))
+
+            def moments(x: float) -> Tuple[float, float]:
+                x = min(max(x, low), high)
+                return (x - low) / (high - low), (x * x - low * low) / (2 * (high - low))
+
+            return _bounded(moments, 0.5 * (low + high))
+        case distributions.ExponentialDistributionParameters():
+            rate = parameters.rate
+
+            def moments(x: float) -> Tuple[float, float]:
+                if x <= 0:
+                    return 0.0, 0.0
+                probability = -math.expm1(-rate * x)
+                return probability, (probability - rate * x * math.exp(-rate * x)) / rate
+
+            return _bounded(moments, 1.0 / rate)
+        case distributions.GammaDistributionParameters():
+            shape, scale = parameters.shape, 1.0 / parameters.rate
+
+            def moments(x: float) -> Tuple[float, float]:
+                return _regularized_gamma(shape, x / scale), shape * scale * _regularized_gamma(shape + 1, x / scale)
+
+            return _bounded(moments, shape * scale)
+        case _:
+            return None
+
+
+def _bounded(moments: _Moments, mean: float) -> _Moments:
+    """Extends the moments of finite values to infinite ones."""
+    return lambda x: (1.0, mean) if x == math.inf else ((0.0, 0.0) if x == -math.inf else moments(x))
+
+
+def _normal_cdf(z: float) -> float:
+    return 0.5 * math.erfc(-z / math.sqrt(2))
+
+
+def _regularized_gamma(a: float, x: float) -> float:
+    """Returns the regularized lower incomplete gamma function P(a, x), from its series or continued fraction."""
+    if x <= 0:
+        return 0.0
+    prefactor = math.exp(a * math.log(x) - x - math.lgamma(a))
+    if x < a + 1:
+        term = total = 1.0 / a
+        for n in range(1, 1000):
+            term *= x / (a + n)
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return total * prefactor
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    fraction = d
+    for n in range(1, 1000):
+        coefficient = -n * (n - a)
+        b += 2
+        d = coefficient * d + b
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = b + coefficient / c
+        c = c if abs(c) > tiny else tiny
+        fraction *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return 1 - prefactor * fraction
+
+
+def _quadrature(distribution: distributions.Distribution | float) -> np.ndarray:
+    """Returns sorted draws of `distribution` from a fixed seed, used to compute its expectations."""
+    if isinstance(distribution, (int, float)):
+        return np.array([float(distribution)])
+    if isinstance(distribution.distribution_parameters, distributions.ScalarDistributionParameter):
+        return compile_distribution(distribution)(1, np.random.default_rng(0))
+    return _quadrature_json(distribution.model_dump_json())
+
+
+@lru_cache(maxsize=1024)
+def _quadrature_json(serialized: str) -> np.ndarray:
+    draws = _compile_json(serialized)(_QUADRATURE_SIZE, np.random.default_rng(0))
+    draws.sort()
+    draws.setflags(write=False)
+    return draws
@@ -0,0 +1,144 @@
+import dataclasses
+from functools import lru_cache
+from typing import Callable, Literal, Optional
+
+import aind_behavior_services.task.distributions as distributions
+import numpy as np
+from pydantic import TypeAdapter
+
+_MAX_EXCLUDE_ATTEMPTS = 100
+
+_Draw = Callable[[np.random.Generator, int], np.ndarray]
+
+
+@dataclasses.dataclass(frozen=True)
+class DistributionSampler:
+    """A task logic distribution compiled into a vectorized sampler.
+
+    Scaling is applied before truncation, following the semantics of the Bonsai
+    sampler. Values that fall outside the truncation bounds in "exclude" mode are
+    redrawn; those still out of bounds after a fixed number of attempts are set to
+    the bound closest to the mean of the drawn values.
+
+    Instances are obtained from `compile_distribution` and are safe to share.
+    """
+
+    draw: _Draw
+    """Draws unscaled, untruncated values from the distribution family."""
+    scale: float = 1.0
+    offset: float = 0.0
+    truncation_mode: Optional[Literal["exclude", "clamp"]] = None
+    minimum: float = -np.inf
+    maximum: float = np.inf
+
+    def __call__(self, size: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Draws `size` values, using `rng` or a freshly seeded generator."""
+        rng = rng if rng is not None else np.random.default_rng()
+        values = self._scaled(rng, size)
+        if self.truncation_mode is None:
+            return values
+        if self.truncation_mode == "clamp":
+            return np.clip(values, self.minimum, self.maximum, out=values)
+
+        out_of_bounds = np.flatnonzero((values < self.minimum) | (values > self.maximum))
+        for _ in range(_MAX_EXCLUDE_ATTEMPTS):
+            if len(out_of_bounds) == 0:
+                return values
+            redrawn = self._scaled(rng, len(out_of_bounds))
+            values[out_of_bounds] = redrawn
+            out_of_bounds = out_of_bounds[(redrawn < self.minimum) | (redrawn > self.maximum)]
+        if len(out_of_bounds) > 0:
+            mean = float(np.mean(values))
+            closest = self.minimum if abs(mean - self.minimum) <= abs(mean - self.maximum) else self.maximum
+            values[out_of_bounds] = closest
+        return values
+
+    def _scaled(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        values = self.draw(rng, size)
+        if self.scale != 1.0:
+            values *= self.scale
+        if self.offset != 0.0:
+            values += self.offset
+        return values
+
+
+def compile_distribution(distribution: distributions.Distribution | float) -> DistributionSampler:
+    """Compiles a task logic distribution, or a constant, into a `DistributionSampler`.
+
+    Compiled samplers are cached by the content of the distribution, so compiling
+    equal distributions repeatedly is cheap.
+    """
+    if isinstance(distribution, (int, float)):
+        return _compile_constant(float(distribution))
+    return _compile_json(distribution.model_dump_json())
+
+
+def sample(
+    distribution: distributions.Distribution | float, size: int, rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """Draws `size` values from a task logic distribution. See `DistributionSampler`."""
+    return compile_distribution(distribution)(size, rng)
+
+
+@lru_cache(maxsize=1024)
+def _compile_constant(value: float) -> DistributionSampler:
+    return DistributionSampler(draw=lambda rng, size: np.full(size, value))
+
+
+@lru_cache(maxsize=1024)
+def _compile_json(serialized: str) -> DistributionSampler:
+    distribution = _distribution_adapter().validate_json(serialized)
+    kwargs = {}
+    scaling = distribution.scaling_parameters
+    if scaling is not None:
+        kwargs.update(scale=float(scaling.scale), offset=float(scaling.offset))
+    truncation = distribution.truncation_parameters
+    if truncation is not None:
+        kwargs.update(
+            truncation_mode=truncation.truncation_mode, minimum=float(truncation.min), maximum=float(truncation.max)
+        )
+    return DistributionSampler(draw=_compile_draw(distribution.distribution_parameters), **kwargs)
+
+
+@lru_cache(maxsize=1)
+def _distribution_adapter() -> TypeAdapter:
+    return TypeAdapter(distributions.Distribution)
+
+
+def _compile_draw(parameters: distributions.DistributionParametersBase) -> _Draw:
+    match parameters:
+        case distributions.ScalarDistributionParameter():
+            value = float(parameters.value)
+            return lambda rng, size: np.full(size, value)
+        case distributions.NormalDistributionParameters():
+            mean, std = parameters.mean, parameters.std
+            return lambda rng, size: rng.normal(mean, std, size)
+        case distributions.LogNormalDistributionParameters():
+            mean, std = parameters.mean, parameters.std
+            return lambda rng, size: rng.lognormal(mean, std, size)
+        case distributions.UniformDistributionParameters():
+            low, high = parameters.min, parameters.max
+            return lambda rng, size: rng.uniform(low, high, size)
+        case distributions.ExponentialDistributionParameters():
+            scale = 1.0 / parameters.rate
+            return lambda rng, size: rng.exponential(scale, size)
+        case distributions.GammaDistributionParameters():
+            shape, scale = parameters.shape, 1.0 / parameters.rate
+            return lambda rng, size: rng.gamma(shape, scale, size)
+        case distributions.BinomialDistributionParameters():
+            n, p = parameters.n, parameters.p
+            return lambda rng, size: rng.binomial(n, p, size).astype(float)
+        case distributions.BetaDistributionParameters():
+            alpha, beta = parameters.alpha, parameters.beta
+            return lambda rng, size: rng.beta(alpha, beta, size)
+        case distributions.PoissonDistributionParameters():
+            rate = parameters.rate
+            return lambda rng, size: rng.poisson(rate, size).astype(float)
+        case distributions.PdfDistributionParameters():
+            index = np.asarray(parameters.index, dtype=float)
+            cdf = np.cumsum(parameters.pdf)
+            cdf /= cdf[-1]
+            last = len(index) - 1
+            return lambda rng, size: index[np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), last)]
+        case _:
+            raise ValueError(f"Unsupported distribution parameters: {type(parameters).__name__}")
@@ -1,6 +1,6 @@
 import logging
 from enum import Enum
-from typing import TYPE_CHECKING, Annotated, Any, Dict, List, Literal, Optional, Self, TypeAlias, Union, cast
+from typing import TYPE_CHECKING, Annotated, Any, Dict, List, Literal, Optional, Self, TypeAlias, Union
 
 import aind_behavior_services.task.distributions as distributions
 from aind_behavior_services.common import Size, Vector3
@@ -18,6 +18,7 @@ from typing_extensions import TypeAliasType, deprecated
 
 from aind_behavior_vr_foraging import (
     __semver__,
+    ctmc,
 )
 
 logger = logging.getLogger(__name__)
@@ -314,6 +315,11 @@ class CtcmFunction(_PatchUpdateFunction):
     It expects a transition matrix that takes the current value of the variable
     of interest (e.g. Probability), and outputs a new value based on the defined
     stochastic process in the transition matrix.
+
+    The rows of the transition matrix are scaled to sum to 1 when the model is
+    validated, so a serialized model always holds a row-stochastic matrix. Matrices
+    that are not square, or that have negative entries or a row summing to 0, are
+    rejected.
     """
 
     function_type: Literal["CtcmFunction"] = "CtcmFunction"
@@ -331,15 +337,7 @@ class CtcmFunction(_PatchUpdateFunction):
     @classmethod
     def validate_transition_matrix(cls, value):
         """Ensures matrix is of valid format and normalized to 1 within rows"""
-        if not value:
-            raise ValueError("Transition matrix must not be empty.")
-        if any(len(row) != len(value) for row in value):
-            raise ValueError("Transition matrix must be square (same number of rows and columns).")
-        for row in value:
-            row_sum = sum(row)
-            for col in row:
-                col /= row_sum
-        return value
+        return ctmc.normalize_transition_matrix(value)
 
     @field_serializer("transition_matrix")
     def serialize_transition_matrix(self, value: List[List[NonNegativeFloat]]) -> List[List[NonNegativeFloat]]:
@@ -348,10 +346,21 @@ class CtcmFunction(_PatchUpdateFunction):
 
     @classmethod
     def from_replenishment_rate(
-        cls, n_states: int, replenishment_rate: float, rho: float, dt: Optional[float] = 0.1
+        cls,
+        n_states: int,
+        replenishment_rate: float,
+        rho: float,
+        dt: Optional[float] = 0.1,
+        *,
+        minimum: float,
+        maximum: float,
     ) -> "CtcmFunction":
         """
         Computes the replenishment transition probability matrix for each patch
+
+        `minimum` and `maximum` are required, keyword-only arguments, since the
+        model cannot be built without them.
+
         Parameters
         -----------
         n_states: int
@@ -362,6 +371,10 @@ class CtcmFunction(_PatchUpdateFunction):
             The underlying value governing the stochastic process
         dt: float
             experiment time step
+        minimum: float
+            Minimum value after update
+        maximum: float
+            Maximum value after update
 
 
         Returns
@@ -369,24 +382,15 @@ class CtcmFunction(_PatchUpdateFunction):
         CtcmFunction
             Instance of CtcmFunction with computed transition matrix.
         """
-        import numpy as np
-        from scipy.linalg import expm
-
         if dt is None:
             dt = cls.model_fields["dt"].default
-        q = np.zeros((n_states, n_states))
-        np.fill_diagonal(q, -replenishment_rate)
-        np.fill_diagonal(q[:, 1:], replenishment_rate)
-        q[-1, -1] = 0
-
-        p_t = expm(q * dt)
-        assert p_t.ndim == 2
-        transition_matrix = cast(list[list[float]], p_t.tolist())
         return cls(
-            transition_matrix=transition_matrix,
+            transition_matrix=ctmc.replenishment_transition_matrix(n_states, replenishment_rate, dt),
             rho=rho,
             dt=dt,
             rate=replenishment_rate,
+            minimum=minimum,
+            maximum=maximum,
         )
 
 
@@ -0,0 +1,242 @@
+import datetime
+import json
+import os
+import sqlite3
+import typing as t
+from pathlib import Path
+
+from aind_behavior_services.session import Session
+from pydantic import AwareDatetime, BaseModel, Field
+
+from aind_behavior_vr_foraging.hashing import canonical_digest
+
+if t.TYPE_CHECKING:
+    from aind_behavior_curriculum import TrainerState
+
+JsonDocument = t.Dict[str, t.Any]
+
+SCHEMA_VERSION = 1
+"""Version of the layout of the database, stored as its `user_version`."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trainer_states (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    session_time TEXT NOT NULL,
+    session_name TEXT,
+    curriculum TEXT,
+    stage TEXT,
+    is_on_curriculum INTEGER NOT NULL,
+    data_directory TEXT,
+    trainer_state TEXT NOT NULL,
+    metrics TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trainer_states_subject ON trainer_states (subject, session_time);
+CREATE INDEX IF NOT EXISTS trainer_states_curriculum ON trainer_states (curriculum, stage);
+CREATE INDEX IF NOT EXISTS trainer_states_stage ON trainer_states (stage);
+CREATE INDEX IF NOT EXISTS trainer_states_session_time ON trainer_states (session_time);
+CREATE TRIGGER IF NOT EXISTS trainer_states_no_update BEFORE UPDATE ON trainer_states
+BEGIN SELECT RAISE(ABORT, 'the trainer state history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS trainer_states_no_delete BEFORE DELETE ON trainer_states
+BEGIN SELECT RAISE(ABORT, 'the trainer state history is append-only'); END;
+"""
+
+_COLUMNS = (
+    "subject",
+    "session_time",
+    "session_name",
+    "curriculum",
+    "stage",
+    "is_on_curriculum",
+    "data_directory",
+    "trainer_state",
+    "metrics",
+)
+
+
+class TrainerStateRecord(BaseModel):
+    """The trainer state suggested for a subject after one of its sessions."""
+
+    subject: str = Field(description="Name of the subject")
+    session_time: AwareDatetime = Field(description="Start time of the session the trainer state was evaluated on")
+    session_name: t.Optional[str] = Field(default=None, description="Name of the session")
+    curriculum: t.Optional[str] = Field(default=None, description="Name of the curriculum")
+    stage: t.Optional[str] = Field(default=None, description="Name of the suggested stage")
+    is_on_curriculum: bool = Field(description="Whether the subject is on curriculum")
+    data_directory: t.Optional[str] = Field(default=None, description="Path to the session data directory")
+    trainer_state: JsonDocument = Field(description="The serialized trainer state")
+    metrics: t.Optional[JsonDocument] = Field(default=None, description="The metrics the suggestion was based on")
+
+    @classmethod
+    def from_suggestion(
+        cls,
+        session: Session,
+        trainer_state: "TrainerState",
+        metrics: t.Optional[BaseModel] = None,
+        data_directory: t.Optional[os.PathLike] = None,
+    ) -> "TrainerStateRecord":
+        """Creates the record of a curriculum suggestion.
+
+        Args:
+            session: The session the suggestion was evaluated on.
+            trainer_state: The suggested trainer state.
+            metrics: The metrics calculated from the session.
+            data_directory: Path to the session data directory, which is resolved.
+        """
+        return cls(
+            subject=session.subject,
+            session_time=session.date,
+            session_name=session.session_name,
+            curriculum=trainer_state.curriculum.name if trainer_state.curriculum is not None else None,
+            stage=trainer_state.stage.name if trainer_state.stage is not None else None,
+            is_on_curriculum=trainer_state.is_on_curriculum,
+            data_directory=os.fspath(Path(data_directory).resolve()) if data_directory is not None else None,
+            trainer_state=trainer_state.model_dump(mode="json"),
+            metrics=metrics.model_dump(mode="json") if metrics is not None else None,
+        )
+
+
+class TrainerStateHistory:
+    """An append-only sqlite store of the trainer states suggested for subjects.
+
+    Records are indexed by subject, curriculum, stage and session time, so the
+    stage history of a subject, or the subjects currently in a stage, are looked
+    up without reading the session folders. Records are never updated or deleted,
+    and appending a record with the same canonical form as a stored one has no
+    effect, so the same suggestion can be written by both the curriculum and the
+    data mapper.
+
+    Examples:
+        ```python
+        with TrainerStateHistory("trainer_states.db") as history:
+            history.append(TrainerStateRecord.from_suggestion(session, suggestion.trainer_state, suggestion.metrics))
+            graduated = history.latest(stage="graduation")
+        ```
+    """
+
+    def __init__(self, path: os.PathLike | str, timeout: float = 30) -> None:
+        """Opens the store, creating it if it does not exist.
+
+        Args:
+            path: Path to the sqlite database, or ":memory:".
+            timeout: Seconds to wait for other processes writing to the store.
+        """
+        self._connection = sqlite3.connect(path, timeout=timeout)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._connection.close()
+            raise ValueError(f"Unsupported trainer state history version {version}. Expected {SCHEMA_VERSION}.")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> "TrainerStateHistory":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM trainer_states").fetchone()[0]
+
+    def append(self, record: TrainerStateRecord) -> bool:
+        """Appends a record to the store.
+
+        Returns:
+            False if a record with the same canonical form was already stored, True otherwise.
+        """
+        values = record.model_dump(mode="json")
+        values["session_time"] = _to_key(record.session_time)
+        values["trainer_state"] = json.dumps(record.trainer_state)
+        values["metrics"] = json.dumps(record.metrics) if record.metrics is not None else None
+        with self._connection:
+            cursor = self._connection.execute(
+                f"INSERT OR IGNORE INTO trainer_states (digest, recorded_at, {', '.join(_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(_COLUMNS))})",
+                (
+                    canonical_digest(record),
+                    _to_key(datetime.datetime.now(datetime.timezone.utc)),
+                    *(values[column] for column in _COLUMNS),
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def query(
+        self,
+        *,
+        subject: t.Optional[str] = None,
+        curriculum: t.Optional[str] = None,
+        stage: t.Optional[str] = None,
+        since: t.Optional[datetime.datetime] = None,
+        until: t.Optional[datetime.datetime] = None,
+    ) -> t.List[TrainerStateRecord]:
+        """Returns the records that match all the given filters, ordered by session time.
+
+        Args:
+            subject: Name of the subject.
+            curriculum: Name of the curriculum.
+            stage: Name of the stage.
+            since: Earliest session time, inclusive.
+            until: Latest session time, exclusive.
+        """
+        conditions, parameters = _filters(subject=subject, curriculum=curriculum, stage=stage)
+        if since is not None:
+            conditions.append("session_time >= ?")
+            parameters.append(_to_key(since))
+        if until is not None:
+            conditions.append("session_time < ?")
+            parameters.append(_to_key(until))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM trainer_states {where} ORDER BY session_time, id", parameters
+        )
+        return [_from_row(row) for row in rows]
+
+    def stage_history(self, subject: str) -> t.List[TrainerStateRecord]:
+        """Returns the records of a subject, ordered by session time."""
+        return self.query(subject=subject)
+
+    def latest(
+        self, *, curriculum: t.Optional[str] = None, stage: t.Optional[str] = None
+    ) -> t.List[TrainerStateRecord]:
+        """Returns the most recent record of each subject, ordered by subject.
+
+        Filters apply to the most recent record, e.g. `latest(stage="graduation")`
+        returns the subjects currently in graduation, not the ones that ever were.
+
+        Args:
+            curriculum: Name of the curriculum.
+            stage: Name of the stage.
+        """
+        conditions, parameters = _filters(curriculum=curriculum, stage=stage)
+        rows = self._connection.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM ("
+            f"SELECT *, ROW_NUMBER() OVER (PARTITION BY subject ORDER BY session_time DESC, id DESC) AS recency "
+            f"FROM trainer_states) WHERE {' AND '.join(['recency = 1', *conditions])} ORDER BY subject",
+            parameters,
+        )
+        return [_from_row(row) for row in rows]
+
+
+def _filters(**values: t.Optional[str]) -> t.Tuple[t.List[str], t.List[t.Any]]:
+    conditions = [f"{column} = ?" for column, value in values.items() if value is not None]
+    return conditions, [value for value in values.values() if value is not None]
+
+
+def _to_key(time: datetime.datetime) -> str:
+    # Fixed width, in UTC, so that times are ordered as strings
+    if time.tzinfo is None:
+        raise ValueError("Times must be timezone aware.")
+    return time.astimezone(datetime.timezone.utc).isoformat(timespec="microseconds")
+
+
+def _from_row(row: t.Tuple[t.Any, ...]) -> TrainerStateRecord:
+    values = dict(zip(_COLUMNS, row))
+    values["trainer_state"] = json.loads(values["trainer_state"])
+    values["metrics"] = json.loads(values["metrics"]) if values["metrics"] is not None else None
+    return TrainerStateRecord.model_validate(values)
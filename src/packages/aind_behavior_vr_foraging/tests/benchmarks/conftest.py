@@ -0,0 +1,247 @@
+"""Shared fixtures of the benchmarks.
+
+Benchmarks are skipped unless the ``VRFORAGING_BENCHMARK`` environment variable is set:
+
+- ``VRFORAGING_BENCHMARK=1`` times each phase of the benchmarks, and asserts the speedup of
+  optimized paths over the paths they replace, timed in the same run.
+- ``VRFORAGING_BENCHMARK=baseline`` also fails when a phase regresses beyond the stored
+  baseline (``baseline.json``) by more than its tolerance.
+- ``VRFORAGING_BENCHMARK=update`` rewrites the stored baseline of the benchmarks that run.
+
+Baseline timings are stored in units of a calibration loop timed in the same run, rather
+than in seconds, so that they can be compared across machines. Peak memory is stored in MiB.
+Timings are recorded as test properties (e.g. in the junit xml report) and listed in
+the terminal summary.
+
+Run from the repository root, e.g. ``VRFORAGING_BENCHMARK=1 pytest src/packages/aind_behavior_vr_foraging/tests/benchmarks``.
+"""
+
+import dataclasses
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+from aind_behavior_services.data_types import SoftwareEvent
+from aind_behavior_services.rig import water_valve
+from pydantic import TypeAdapter
+
+from aind_behavior_vr_foraging.data_mappers._utils import get_fields_of_type
+
+sys.path.append(".")
+from examples.rig import rig
+from examples.session import session
+from examples.task_patch_foraging import task_logic
+
+N_REPEATS = 5
+"""Number of times each phase is timed. The fastest time is reported, since slower ones are dominated by noise."""
+
+BENCHMARK_MODE = os.environ.get("VRFORAGING_BENCHMARK")
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+MEMORY_KEY = "peak_memory_mib"
+CALIBRATION_KEY = "calibration"
+
+SESSION_START_TIME = datetime(2023, 1, 1, 11, 0, 0, tzinfo=timezone.utc)
+
+Phases = Dict[str, Callable[[], object]]
+
+_results_key = pytest.StashKey[List[Tuple[str, Dict[str, float]]]]()
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionSize:
+    n_cameras: int
+    n_olfactometer_extensions: int
+    n_rewards: int
+
+
+SIZES: Dict[str, SessionSize] = {
+    "small": SessionSize(n_cameras=2, n_olfactometer_extensions=0, n_rewards=500),
+    "medium": SessionSize(n_cameras=8, n_olfactometer_extensions=2, n_rewards=5_000),
+    "large": SessionSize(n_cameras=32, n_olfactometer_extensions=8, n_rewards=50_000),
+}
+
+
+@pytest.fixture(params=list(SIZES))
+def session_size(request: pytest.FixtureRequest) -> SessionSize:
+    return SIZES[request.param]
+
+
+@pytest.fixture
+def synthetic_rig(session_size: SessionSize) -> dict:
+    """Returns the example rig, as json, with `session_size.n_cameras` cameras and extension olfactometers.
+
+    The instrument mapper only knows the mounting of the named triggered cameras,
+    so cameras beyond those are added as monitoring webcams. Calibrations are
+    dated, so that mapped instruments can be cached.
+    """
+    dated_rig = rig.model_copy(deep=True)
+    dated_rig.harp_treadmill.calibration.date = SESSION_START_TIME
+    for _, calibration in get_fields_of_type(dated_rig, water_valve.WaterValveCalibration):
+        calibration.date = SESSION_START_TIME
+
+    rig_json = dated_rig.model_dump(mode="json")
+    template_camera = rig_json["triggered_camera_controller"]["cameras"]["FaceCamera"]
+    triggered_names = ["FaceCamera", "SideCamera", "FrontCamera"][: session_size.n_cameras]
+    rig_json["triggered_camera_controller"]["cameras"] = {
+        name: {**template_camera, "serial_number": f"SerialNumber{i}"} for i, name in enumerate(triggered_names)
+    }
+    template_webcam = rig_json["monitoring_camera_controller"]["cameras"]["WebCam0"]
+    rig_json["monitoring_camera_controller"]["cameras"] = {
+        f"WebCam{i}": {**template_webcam, "index": i} for i in range(session_size.n_cameras - len(triggered_names))
+    }
+    template_olfactometer = rig_json["harp_olfactometer_extension"][0]
+    rig_json["harp_olfactometer_extension"] = [
+        {**template_olfactometer, "port_name": f"COM{20 + i}"} for i in range(session_size.n_olfactometer_extensions)
+    ]
+    return rig_json
+
+
+@pytest.fixture
+def synthetic_session(tmp_path: Path, session_size: SessionSize, synthetic_rig: dict) -> Path:
+    """Writes the input schemas and software events of a synthetic session, and returns its data directory."""
+    logs_dir = tmp_path / "Behavior" / "Logs"
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    (logs_dir / "session_input.json").write_text(session.model_dump_json(indent=2), encoding="utf-8")
+    (logs_dir / "rig_input.json").write_text(json.dumps(synthetic_rig, indent=2), encoding="utf-8")
+    (logs_dir / "tasklogic_input.json").write_text(task_logic.model_dump_json(indent=2), encoding="utf-8")
+
+    end_time = SESSION_START_TIME + timedelta(seconds=session_size.n_rewards)
+    events_dir = tmp_path / "behavior" / "SoftwareEvents"
+    events_dir.mkdir(parents=True, exist_ok=True)
+    time_event = TypeAdapter(SoftwareEvent[datetime])
+    reward_event = TypeAdapter(SoftwareEvent[float])
+    for name, timestamp, data in [
+        ("StartSessionTime", 0.0, SESSION_START_TIME),
+        ("EndSessionTime", session_size.n_rewards, end_time),
+    ]:
+        event = SoftwareEvent[datetime](name=name, timestamp=timestamp, timestamp_source="harp", data=data)
+        (events_dir / f"{name}.json").write_bytes(time_event.dump_json(event) + b"\n")
+    with open(events_dir / "GiveReward.json", "wb") as f:
+        for i in range(session_size.n_rewards):
+            event = SoftwareEvent[float](name="GiveReward", timestamp=float(i), timestamp_source="harp", data=5.0)
+            f.write(reward_event.dump_json(event) + b"\n")
+    return tmp_path
+
+
+def calibration_workload() -> None:
+    """A fixed workload of json serialization and python loops.
+
+    Timings divided by its time, measured alongside them, are in units of this workload,
+    which scale with the speed, and the load, of the machine.
+    """
+    data = [{"index": i, "name": f"item{i}", "values": list(range(i % 16))} for i in range(2_000)]
+    for _ in range(5):
+        sorted(json.loads(json.dumps(data)), key=lambda item: item["name"])
+
+
+def _load_baseline() -> dict:
+    if not BASELINE_PATH.exists():
+        return {"tolerance": 2.0, "min_delta": 0.25, "min_delta_mib": 1.0, "results": {}}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+class Benchmark:
+    """Times the phases of a benchmark, and checks their relative speed and their stored baseline."""
+
+    def __init__(self, name: str, record_property: Callable[[str, object], None], results: list) -> None:
+        self._name = name
+        self._record_property = record_property
+        self._results = results
+        self.measured: Dict[str, float] = {}
+
+    def measure(self, make_phases: Callable[[], Phases]) -> Dict[str, float]:
+        """Returns the wall time of each phase, in seconds, and the peak traced memory of all phases, in MiB.
+
+        Phases are run `N_REPEATS` times from a fresh `make_phases()`, and the fastest
+        time of each is kept. The `calibration_workload` is timed in each repeat too. The
+        phases are then run once more with memory tracing, which would otherwise inflate
+        the timings.
+        """
+        measured: Dict[str, float] = {}
+        for _ in range(N_REPEATS):
+            for name, phase in {CALIBRATION_KEY: calibration_workload, **make_phases()}.items():
+                start = time.perf_counter()
+                phase()
+                measured[name] = min(measured.get(name, float("inf")), time.perf_counter() - start)
+
+        phases = make_phases()
+        tracemalloc.start()
+        try:
+            for phase in phases.values():
+                phase()
+            measured[MEMORY_KEY] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+        for name, value in measured.items():
+            self._record_property(name, round(value, 6))
+        self._results.append((self._name, measured))
+        self.measured.update(measured)
+        if BENCHMARK_MODE == "update":
+            self._update_baseline(measured)
+        elif BENCHMARK_MODE == "baseline":
+            self._assert_baseline(measured)
+        return measured
+
+    def _normalized(self, measured: Dict[str, float]) -> Dict[str, float]:
+        calibration = measured[CALIBRATION_KEY]
+        return {
+            name: value if name == MEMORY_KEY else value / calibration
+            for name, value in measured.items()
+            if name != CALIBRATION_KEY
+        }
+
+    def _update_baseline(self, measured: Dict[str, float]) -> None:
+        baseline = _load_baseline()
+        entry = baseline["results"].setdefault(self._name, {})
+        entry.update({name: round(value, 3) for name, value in self._normalized(measured).items()})
+        baseline["results"] = dict(sorted(baseline["results"].items()))
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    def _assert_baseline(self, measured: Dict[str, float]) -> None:
+        baseline = _load_baseline()
+        reference = baseline["results"].get(self._name)
+        if reference is None:
+            pytest.skip(f"No baseline recorded for {self._name}. Run with VRFORAGING_BENCHMARK=update to record one.")
+        regressions = []
+        for name, value in self._normalized(measured).items():
+            if name not in reference:
+                continue
+            # Small absolute differences are dominated by noise and never count as regressions
+            min_delta = baseline["min_delta_mib"] if name == MEMORY_KEY else baseline["min_delta"]
+            limit = max(reference[name] * baseline["tolerance"], reference[name] + min_delta)
+            if value > limit:
+                regressions.append(f"{name}: {value:.3f} > {limit:.3f} (baseline {reference[name]:.3f})")
+        assert not regressions, f"{self._name} regressed beyond its baseline:\n" + "\n".join(regressions)
+
+    def assert_speedup(self, fast: str, slow: str, minimum: float) -> None:
+        """Asserts that phase `fast` runs at least `minimum` times faster than phase `slow`."""
+        speedup = self.measured[slow] / self.measured[fast]
+        self._record_property(f"speedup[{fast}/{slow}]", round(speedup, 2))
+        assert speedup >= minimum, (
+            f"{fast} is only {speedup:.2f}x faster than {slow} "
+            f"({self.measured[fast]:.4f}s vs {self.measured[slow]:.4f}s), expected at least {minimum}x."
+        )
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest, record_property: Callable[[str, object], None]) -> Benchmark:
+    # Named independently of the rootdir, so that baselines match wherever pytest is run from
+    name = f"{Path(request.node.path).stem}::{request.node.name}"
+    return Benchmark(name, record_property, request.config.stash.setdefault(_results_key, []))
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter, config: pytest.Config) -> None:
+    results = config.stash.get(_results_key, [])
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    for name, measured in results:
+        terminalreporter.write_line(name)
+        terminalreporter.write_line("    " + ", ".join(f"{phase}={value:.4f}" for phase, value in measured.items()))
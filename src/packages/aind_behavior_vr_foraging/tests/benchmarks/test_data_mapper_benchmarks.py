@@ -0,0 +1,54 @@
+"""Benchmarks for the aind-data-schema data mappers, over synthetic sessions of several sizes.
+
+Skipped unless ``VRFORAGING_BENCHMARK`` is set. See ``conftest`` for how benchmarks are run and reported.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from aind_behavior_vr_foraging.data_mappers._acquisition import AindAcquisitionDataMapper
+from aind_behavior_vr_foraging.data_mappers._instrument import AindInstrumentDataMapper, clear_instrument_cache
+from aind_behavior_vr_foraging.data_mappers._repository import clear_repository_cache
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("VRFORAGING_BENCHMARK"), reason="Set VRFORAGING_BENCHMARK to run benchmarks."
+)
+
+
+def _clear_caches() -> None:
+    clear_repository_cache()
+    clear_instrument_cache()
+
+
+def test_acquisition_mapper(benchmark, synthetic_session: Path):
+    def make_phases():
+        _clear_caches()
+        mapper = AindAcquisitionDataMapper(data_path=synthetic_session, repository_path=Path("./"))
+        # Repository metadata is shared by all mappers of the same repository
+        other_mapper = AindAcquisitionDataMapper(data_path=synthetic_session, repository_path=Path("./"))
+        return {
+            "load_session": lambda: mapper.session_model,
+            "load_rig": lambda: mapper.rig_model,
+            "load_task_logic": lambda: mapper.task_model,
+            "repository_metadata": lambda: (mapper.repository_metadata, mapper.bonsai_environment),
+            "repository_metadata_shared": lambda: (other_mapper.repository_metadata, other_mapper.bonsai_environment),
+            "stream_bounds": lambda: mapper._stream_bound_times,
+            "map": mapper.map,
+        }
+
+    benchmark.measure(make_phases)
+    benchmark.assert_speedup("repository_metadata_shared", "repository_metadata", minimum=10)
+
+
+def test_instrument_mapper(benchmark, synthetic_session: Path):
+    def make_phases():
+        _clear_caches()
+        return {
+            "map": AindInstrumentDataMapper(data_path=synthetic_session).map,
+            "map_cached": AindInstrumentDataMapper(data_path=synthetic_session).map,
+        }
+
+    benchmark.measure(make_phases)
+    benchmark.assert_speedup("map_cached", "map", minimum=2)
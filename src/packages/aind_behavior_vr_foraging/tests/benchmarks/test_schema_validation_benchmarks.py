@@ -0,0 +1,63 @@
+"""Benchmarks of batch validation of task logic documents against their json schema, compared with pydantic validation.
+
+The compiled validator is also compared with the ``jsonschema`` package, if installed,
+which it is kept in favour of.
+
+Skipped unless ``VRFORAGING_BENCHMARK`` is set. See ``conftest`` for how benchmarks are run and reported.
+"""
+
+import json
+import os
+import sys
+from typing import Callable, List
+
+import pytest
+
+from aind_behavior_vr_foraging import regenerate, schema_validation
+from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+sys.path.append(".")
+from examples.task_patch_foraging import task_logic
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("VRFORAGING_BENCHMARK"), reason="Set VRFORAGING_BENCHMARK to run benchmarks."
+)
+
+N_DOCUMENTS = 200
+
+
+def benchmark_validation(benchmark, documents: List[str], **other_phases: Callable[[], object]) -> None:
+    """Times the validation of a batch of task logic json documents by pydantic and by the compiled schema validator.
+
+    Other validators of the same documents can be timed alongside, as `other_phases`.
+    """
+
+    def make_phases():
+        schema_validation._built_schema.cache_clear()
+        schema_validation.get_validator.cache_clear()
+        return {
+            "pydantic": lambda: [AindVrForagingTaskLogic.model_validate_json(document) for document in documents],
+            "compile": lambda: schema_validation.get_validator(AindVrForagingTaskLogic),
+            "schema": lambda: schema_validation.get_validator(AindVrForagingTaskLogic).validate_many(documents),
+            **other_phases,
+        }
+
+    benchmark.measure(make_phases)
+
+
+def test_task_logic_validation(benchmark):
+    benchmark_validation(benchmark, [task_logic.model_dump_json()] * N_DOCUMENTS)
+    benchmark.assert_speedup("schema", "pydantic", minimum=1.5)
+
+
+def test_maintained_validator(benchmark):
+    jsonschema = pytest.importorskip("jsonschema")
+    # jsonschema is much slower, so fewer documents are validated
+    documents = [task_logic.model_dump_json()] * (N_DOCUMENTS // 10)
+    schema = {**json.loads(regenerate.build_schema()), "$ref": f"#/$defs/{AindVrForagingTaskLogic.__name__}"}
+    maintained = jsonschema.validators.validator_for(schema)(schema)
+
+    benchmark_validation(
+        benchmark, documents, jsonschema=lambda: [maintained.validate(json.loads(d)) for d in documents]
+    )
+    benchmark.assert_speedup("schema", "jsonschema", minimum=10)
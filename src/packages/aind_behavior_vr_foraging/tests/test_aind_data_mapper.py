@@ -8,22 +8,34 @@ from typing import Sequence
 from unittest.mock import MagicMock, patch
 
 import aind_behavior_curriculum
+import aind_behavior_services.rig as AbsRig
+import aind_behavior_services.utils
 from aind_behavior_curriculum import Metrics, Stage, Trainer, create_curriculum
 from aind_behavior_services.data_types import SoftwareEvent
+from aind_behavior_services.rig import cameras, water_valve
 from aind_data_schema.core import acquisition, instrument
 from aind_data_schema.utils import compatibility_check
 from clabe.apps import CurriculumSuggestion
 from pydantic import TypeAdapter
 
 from aind_behavior_vr_foraging.data_mappers._acquisition import AindAcquisitionDataMapper
-from aind_behavior_vr_foraging.data_mappers._instrument import AindInstrumentDataMapper
+from aind_behavior_vr_foraging.data_mappers._batch import format_summary, map_session, map_sessions
+from aind_behavior_vr_foraging.data_mappers._instrument import (
+    AindInstrumentDataMapper,
+    clear_instrument_cache,
+    instrument_cache_key,
+)
+from aind_behavior_vr_foraging.data_mappers._repository import clear_repository_cache, get_repository_metadata
+from aind_behavior_vr_foraging.data_mappers._utils import _traversal_plan, get_fields_of_type
+from aind_behavior_vr_foraging.rig import AindVrForagingRig
+from aind_behavior_vr_foraging.trainer_history import TrainerStateHistory
 
 sys.path.append(".")
 from examples.rig import rig
 from examples.session import session
 from examples.task_patch_foraging import task_logic
 
-from aind_behavior_vr_foraging.cli import DataMapperCli
+from aind_behavior_vr_foraging.cli import DataMapperBatchCli, DataMapperCli
 
 MOCK_SESSION_START_TIME = datetime(2023, 1, 1, 11, 0, 0, tzinfo=timezone.utc)
 MOCK_SESSION_END_TIME = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
@@ -179,6 +191,209 @@ class TestAindDataMappers(unittest.TestCase):
         self.assertTrue(instrument_path.exists())
         self.assertTrue(acquisition_path.exists())
 
+    def test_mapper_cli_reads_session_end_time_from_software_events(self):
+        DataMapperCli(data_path=self.data_path, repository_path=self.repo_path).cli_cmd()
+        with open(self.data_path / "acquisition_vrforaging.json", "r", encoding="utf-8") as f:
+            end_time = datetime.fromisoformat(json.load(f)["acquisition_end_time"])
+        self.assertEqual(end_time, self.session_end_time)
+
+
+def write_mock_session(data_path: Path) -> None:
+    """Write the input schemas and software events of a mock session into ``data_path``."""
+    logs_dir = data_path / "Behavior" / "Logs"
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    (logs_dir / "session_input.json").write_text(session.model_dump_json(indent=2), encoding="utf-8")
+    (logs_dir / "rig_input.json").write_text(rig.model_dump_json(indent=2), encoding="utf-8")
+    (logs_dir / "tasklogic_input.json").write_text(task_logic.model_dump_json(indent=2), encoding="utf-8")
+    write_mock_software_events(data_path)
+
+
+def dated_rig(date: datetime = MOCK_SESSION_START_TIME) -> AindVrForagingRig:
+    """Returns a copy of the example rig whose calibrations are all dated."""
+    dated = rig.model_copy(deep=True)
+    dated.harp_treadmill.calibration.date = date
+    for _, calibration in get_fields_of_type(dated, water_valve.WaterValveCalibration):
+        calibration.date = date
+    return dated
+
+
+class TestBatchDataMapper(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.good_sessions = [root / "session_a", root / "session_b"]
+        for data_path in self.good_sessions:
+            write_mock_session(data_path)
+        self.bad_session = root / "session_missing_rig"
+        write_mock_session(self.bad_session)
+        (self.bad_session / "Behavior" / "Logs" / "rig_input.json").unlink()
+        self.repo_path = Path("./")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _assert_results(self, results):
+        self.assertEqual([r.data_path for r in results], self.good_sessions + [self.bad_session])
+        for result, data_path in zip(results[:2], self.good_sessions):
+            self.assertTrue(result.succeeded, result.error)
+            self.assertTrue((data_path / "acquisition_vrforaging.json").exists())
+            self.assertTrue((data_path / "instrument_vrforaging.json").exists())
+        self.assertFalse(results[2].succeeded)
+        self.assertIn("FileNotFoundError", results[2].error)
+        self.assertIn("2 of 3 sessions mapped successfully.", format_summary(results))
+
+    def test_map_sessions_in_process(self):
+        results = map_sessions(self.good_sessions + [self.bad_session], self.repo_path, max_workers=1)
+        self._assert_results(results)
+
+    def test_rig_is_parsed_once_per_session(self):
+        with patch.object(
+            AindVrForagingRig, "model_validate_json", wraps=AindVrForagingRig.model_validate_json
+        ) as mock_validate:
+            map_session(self.good_sessions[0], self.repo_path)
+        mock_validate.assert_called_once()
+
+    def test_map_sessions_in_pool(self):
+        results = map_sessions(self.good_sessions + [self.bad_session], self.repo_path, max_workers=2)
+        self._assert_results(results)
+
+    def test_batch_cli_reports_failures(self):
+        summary_path = Path(self.temp_dir.name) / "summary.json"
+        cli = DataMapperBatchCli(
+            data_paths=self.good_sessions + [self.bad_session],
+            repository_path=self.repo_path,
+            max_workers=1,
+            summary_path=summary_path,
+        )
+        with self.assertRaises(RuntimeError):
+            cli.cli_cmd()
+        summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        self.assertEqual([entry["error"] is None for entry in summary], [True, True, False])
+
+
+class TestInstrumentCache(unittest.TestCase):
+    def setUp(self):
+        clear_instrument_cache()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.cache_dir = root / "cache"
+        self.sessions = [root / "session_a", root / "session_b"]
+        for data_path in self.sessions:
+            write_mock_session(data_path)
+            self._rig_path(data_path).write_text(dated_rig().model_dump_json(indent=2), encoding="utf-8")
+
+    def tearDown(self):
+        clear_instrument_cache()
+        self.temp_dir.cleanup()
+
+    def _rig_path(self, data_path: Path) -> Path:
+        return data_path / "Behavior" / "Logs" / "rig_input.json"
+
+    def test_key_ignores_formatting(self):
+        rig_path = self._rig_path(self.sessions[1])
+        content = json.loads(rig_path.read_text(encoding="utf-8"))
+        rig_path.write_text(json.dumps(content, sort_keys=True), encoding="utf-8")
+        self.assertEqual(instrument_cache_key(self._rig_path(self.sessions[0])), instrument_cache_key(rig_path))
+
+    def test_key_changes_with_rig(self):
+        rig_path = self._rig_path(self.sessions[1])
+        rig_path.write_text(rig.model_copy(update={"rig_name": "another_rig"}).model_dump_json(), encoding="utf-8")
+        self.assertNotEqual(instrument_cache_key(self._rig_path(self.sessions[0])), instrument_cache_key(rig_path))
+
+    def test_repeat_rig_is_not_remapped(self):
+        first = AindInstrumentDataMapper(self.sessions[0], cache_dir=self.cache_dir).map()
+        with patch.object(AindInstrumentDataMapper, "_map") as mock_map:
+            second = AindInstrumentDataMapper(self.sessions[1], cache_dir=self.cache_dir).map()
+            mock_map.assert_not_called()
+        self.assertEqual(first.model_dump(), second.model_dump())
+        self.assertIsNot(first, second)
+
+    def test_cached_instrument_is_not_shared(self):
+        first = AindInstrumentDataMapper(self.sessions[0], cache_dir=self.cache_dir).map()
+        expected = first.model_dump()
+        first.components.clear()
+        second = AindInstrumentDataMapper(self.sessions[1], cache_dir=self.cache_dir).map()
+        self.assertEqual(second.model_dump(), expected)
+
+    def test_rig_with_undated_calibrations_is_not_cached(self):
+        for data_path in self.sessions:
+            self._rig_path(data_path).write_text(rig.model_dump_json(indent=2), encoding="utf-8")
+        AindInstrumentDataMapper(self.sessions[0], cache_dir=self.cache_dir).map()
+        self.assertFalse(self.cache_dir.exists())
+        with patch.object(AindInstrumentDataMapper, "_map") as mock_map:
+            AindInstrumentDataMapper(self.sessions[1], cache_dir=self.cache_dir).map()
+            mock_map.assert_called_once()
+
+    def test_cache_is_persisted_to_disk(self):
+        expected = AindInstrumentDataMapper(self.sessions[0], cache_dir=self.cache_dir).map()
+        self.assertEqual(len(list(self.cache_dir.glob("*.json"))), 1)
+        clear_instrument_cache()
+        with patch.object(AindInstrumentDataMapper, "_map") as mock_map:
+            cached = AindInstrumentDataMapper(self.sessions[1], cache_dir=self.cache_dir).map()
+            mock_map.assert_not_called()
+        self.assertEqual(expected.model_dump(), cached.model_dump())
+
+
+class TestGetFieldsOfType(unittest.TestCase):
+    def test_matches_unplanned_traversal(self):
+        for target_type, stop_recursion_on_type in [
+            (water_valve.WaterValveCalibration, True),
+            (AbsRig.Device, False),
+            (AbsRig.Device, True),
+            (cameras.CameraController, True),
+            (str, False),
+        ]:
+            with self.subTest(target_type=target_type.__name__, stop_recursion_on_type=stop_recursion_on_type):
+                expected = aind_behavior_services.utils.get_fields_of_type(
+                    rig, target_type, stop_recursion_on_type=stop_recursion_on_type
+                )
+                actual = get_fields_of_type(rig, target_type, stop_recursion_on_type=stop_recursion_on_type)
+                self.assertEqual([(name, id(value)) for name, value in actual], [(n, id(v)) for n, v in expected])
+
+    def test_plan_skips_unrelated_fields(self):
+        plan = _traversal_plan(type(rig), water_valve.WaterValveCalibration)
+        self.assertIn("calibration", plan)
+        self.assertNotIn("rig_name", plan)
+        self.assertNotIn("harp_treadmill", plan)
+        self.assertNotIn("screen", plan)
+
+
+class TestLazyRepositoryMetadata(unittest.TestCase):
+    def setUp(self):
+        clear_repository_cache()
+        self.repo_path = Path("./")
+
+    def tearDown(self):
+        clear_repository_cache()
+
+    def test_constructor_does_not_read_inputs(self):
+        """Constructing a mapper must not touch the session folder or the repository."""
+        mapper = AindAcquisitionDataMapper(
+            data_path=Path("does/not/exist"),
+            repository_path=Path("does/not/exist/either"),
+            session_end_time=MOCK_SESSION_END_TIME,
+        )
+        with self.assertRaises(FileNotFoundError):
+            _ = mapper.session_model
+
+    def test_metadata_is_shared_across_mappers(self):
+        """Mappers pointing at the same checkout reuse the same resolved metadata."""
+        mappers = [
+            AindAcquisitionDataMapper(
+                data_path=Path(f"session_{i}"), repository_path=self.repo_path, session_end_time=MOCK_SESSION_END_TIME
+            )
+            for i in range(2)
+        ]
+        self.assertIs(mappers[0].repository_metadata, mappers[1].repository_metadata)
+        self.assertIs(mappers[0].repository_metadata, get_repository_metadata(self.repo_path.resolve()))
+
+    def test_metadata_matches_repository_head(self):
+        metadata = get_repository_metadata(self.repo_path)
+        mapper = AindAcquisitionDataMapper(
+            data_path=Path("session"), repository_path=self.repo_path, session_end_time=MOCK_SESSION_END_TIME
+        )
+        self.assertEqual(metadata.commit_hash, mapper.repository.head.commit.hexsha)
+
 
 def _make_curriculum_suggestion() -> CurriculumSuggestion:
     """Create a minimal CurriculumSuggestion using aind_behavior_curriculum primitives.
@@ -317,6 +532,22 @@ class TestCurriculumIntegrationInDataMapper(unittest.TestCase):
         mapped = self._make_mapper(self.curriculum_suggestion).map()
         acquisition.Acquisition.model_validate_json(mapped.model_dump_json())
 
+    def test_suggestion_is_appended_to_trainer_state_history(self):
+        """Mapping a session records its suggestion once, however many times it is mapped."""
+        history_path = self.data_path / "trainer_states.db"
+        for _ in range(2):
+            map_session(
+                self.data_path,
+                self.repo_path,
+                session_end_time=self.session_end_time,
+                curriculum_suggestion=self.curriculum_suggestion,
+                trainer_state_history=history_path,
+            )
+        with TrainerStateHistory(history_path) as history:
+            records = history.stage_history(session.subject)
+        self.assertEqual([(record.stage, record.session_time) for record in records], [("demo_stage", session.date)])
+        self.assertEqual(records[0].metrics, self.curriculum_suggestion.metrics.model_dump(mode="json"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for the CTMC transition matrix helpers."""
+
+import math
+import unittest
+
+from pydantic import ValidationError
+
+from aind_behavior_vr_foraging import ctmc
+from aind_behavior_vr_foraging.task_logic import CtcmFunction
+
+
+class TestReplenishmentTransitionMatrix(unittest.TestCase):
+    def test_rows_are_stochastic(self):
+        matrix = ctmc.replenishment_transition_matrix(5, 0.3, 0.1)
+        self.assertEqual(len(matrix), 5)
+        for row in matrix:
+            self.assertEqual(len(row), 5)
+            self.assertAlmostEqual(sum(row), 1.0, places=12)
+            self.assertTrue(all(value >= 0 for value in row))
+
+    def test_matches_poisson_closed_form(self):
+        rate, dt = 2.0, 0.5
+        matrix = ctmc.replenishment_transition_matrix(4, rate, dt)
+        expected = [math.exp(-rate * dt) * (rate * dt) ** k / math.factorial(k) for k in range(3)]
+        for k, value in enumerate(expected):
+            self.assertAlmostEqual(matrix[0][k], value, places=14)
+        self.assertAlmostEqual(matrix[0][3], 1 - sum(expected), places=14)
+        self.assertAlmostEqual(matrix[1][1], expected[0], places=14)
+        self.assertAlmostEqual(matrix[1][3], 1 - sum(expected[:2]), places=14)
+        self.assertEqual(matrix[1][0], 0.0)
+        self.assertEqual(matrix[-1], [0.0, 0.0, 0.0, 1.0])
+
+    def test_zero_rate_is_identity(self):
+        self.assertEqual(
+            ctmc.replenishment_transition_matrix(3, 0.0), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        )
+
+    def test_returns_independent_copies(self):
+        first = ctmc.replenishment_transition_matrix(3, 0.5)
+        first[0][0] = -1
+        second = ctmc.replenishment_transition_matrix(3, 0.5)
+        self.assertNotEqual(second[0][0], -1)
+
+    def test_invalid_arguments_raise(self):
+        with self.assertRaises(ValueError):
+            ctmc.replenishment_transition_matrix(0, 0.5)
+        with self.assertRaises(ValueError):
+            ctmc.replenishment_transition_matrix(3, -0.5)
+
+
+class TestNormalizeTransitionMatrix(unittest.TestCase):
+    def test_rows_are_normalized(self):
+        self.assertEqual(ctmc.normalize_transition_matrix([[1, 3], [0, 2]]), [[0.25, 0.75], [0.0, 1.0]])
+
+    def test_invalid_matrices_raise(self):
+        for matrix in ([], [[1, 0]], [[1, -1], [0, 1]], [[0, 0], [0, 1]]):
+            with self.subTest(matrix=matrix), self.assertRaises(ValueError):
+                ctmc.normalize_transition_matrix(matrix)
+
+
+class TestCtcmFunction(unittest.TestCase):
+    def test_transition_matrix_is_normalized(self):
+        function = CtcmFunction(transition_matrix=[[2, 2], [0, 1]], rho=0.5, minimum=0.1, maximum=1)
+        self.assertEqual(function.transition_matrix, [[0.5, 0.5], [0.0, 1.0]])
+
+    def test_rejects_non_square_matrix(self):
+        with self.assertRaises(ValidationError):
+            CtcmFunction(transition_matrix=[[1, 0]], rho=0.5, minimum=0.1, maximum=1)
+
+    def test_from_replenishment_rate(self):
+        function = CtcmFunction.from_replenishment_rate(4, 0.2, rho=0.3, minimum=0.1, maximum=0.9)
+        self.assertEqual(function.transition_matrix, ctmc.replenishment_transition_matrix(4, 0.2, 0.1))
+        self.assertEqual(function.rate, 0.2)
+        self.assertEqual(function.maximum, 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import sys
+import unittest
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from aind_behavior_vr_foraging import task_logic as vr_task_logic
+from aind_behavior_vr_foraging.hashing import canonical_digest, canonical_json, canonicalize
+
+sys.path.append(".")
+from examples.rig import rig
+from examples.task_patch_foraging import task_logic
+
+
+class TestCanonicalHashing(unittest.TestCase):
+    def test_canonicalize(self):
+        document = {"b": [1.0, 0.1 + 0.2, -0.0], "description": "x", "a": {"description": "y", "value": 2.5}}
+        self.assertEqual(
+            canonicalize(document), {"b": [1, 0.3, 0], "description": "x", "a": {"description": "y", "value": 2.5}}
+        )
+        self.assertIs(canonicalize(document, exact=True), document)
+        self.assertEqual(canonical_json({"b": 1, "a": 2}), '{"a":2,"b":1}')
+
+    def test_models_and_documents_share_digests(self):
+        for model in (task_logic, rig, task_logic.task_parameters.environment.blocks[0]):
+            with self.subTest(model=type(model).__name__):
+                document = json.loads(model.model_dump_json())
+                self.assertEqual(canonical_digest(model, exact=True), canonical_digest(document, exact=True))
+                self.assertEqual(
+                    canonical_digest(model), canonical_digest(type(model).model_validate_json(json.dumps(document)))
+                )
+
+    def test_digest_ignores_non_semantic_differences(self):
+        changed = task_logic.model_copy(update={"description": "Another description"}, deep=True)
+        self.assertEqual(canonical_digest(changed), canonical_digest(task_logic))
+        self.assertNotEqual(canonical_digest(changed, exact=True), canonical_digest(task_logic, exact=True))
+
+        document = task_logic.model_dump(mode="json")
+        document["task_parameters"]["rng_seed"] = 1
+        self.assertNotEqual(canonical_digest(document), canonical_digest(task_logic))
+
+    def test_only_descriptions_of_models_are_ignored(self):
+        class Item(BaseModel):
+            description: str = ""
+            value: int
+
+        class Payload(BaseModel):
+            description: str = ""
+            items: List[Item]
+            data: Dict[str, Any]
+
+        first, second = ({"description": text, "values": [1, 2]} for text in ("first", "second"))
+        self.assertEqual(
+            canonical_digest(Payload(description="a", items=[Item(description="a", value=1)], data=first)),
+            canonical_digest(Payload(description="b", items=[Item(description="b", value=1)], data=first)),
+        )
+        self.assertNotEqual(
+            canonical_digest(Payload(items=[], data=first)), canonical_digest(Payload(items=[], data=second))
+        )
+        self.assertNotEqual(canonical_digest(first), canonical_digest(second))
+
+    def test_digest_ignores_float_noise(self):
+        def with_amount(amount: float) -> vr_task_logic.AindVrForagingTaskLogic:
+            task = task_logic.model_copy(deep=True)
+            patch = task.task_parameters.environment.blocks[0].environment.patches[0]
+            patch.reward_specification.amount = vr_task_logic.scalar_value(amount)
+            return task
+
+        self.assertEqual(canonical_digest(with_amount(0.3)), canonical_digest(with_amount(0.1 + 0.2)))
+        self.assertNotEqual(canonical_digest(with_amount(0.3)), canonical_digest(with_amount(0.31)))
+
+
+if __name__ == "__main__":
+    unittest.main()
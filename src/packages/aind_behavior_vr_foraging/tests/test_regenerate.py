@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from aind_behavior_vr_foraging import regenerate
+
+
+class TestRegenerate(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.schema_root = Path(tmp.name) / "schema"
+        self.extensions_root = Path(tmp.name) / "Extensions"
+        self.extensions_root.mkdir()
+        for name, value in (("SCHEMA_ROOT", self.schema_root), ("EXTENSIONS_ROOT", self.extensions_root)):
+            patcher = patch.object(regenerate, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.schema_path = self.schema_root / "aind_behavior_vr_foraging.json"
+        self.extensions_path = self.extensions_root / "AindBehaviorVrForaging.Generated.cs"
+
+    def _regenerate(self, check: bool = False):
+        def sgen(*, output_path, **kwargs):
+            Path(output_path).write_text("// generated", encoding="utf-8")
+
+        with (
+            patch.object(regenerate, "bonsai_sgen", side_effect=sgen) as bonsai_sgen,
+            patch.object(regenerate, "build_schema", wraps=regenerate.build_schema) as build_schema,
+        ):
+            outdated = regenerate.main(check=check)
+        self.builds = build_schema.call_count
+        return outdated, bonsai_sgen.call_count
+
+    def test_regenerates_missing_outputs(self):
+        self.assertEqual(self._regenerate(check=True), ([self.schema_path, self.extensions_path], 0))
+        self.assertFalse(self.schema_path.exists())
+        self.assertEqual(self._regenerate(), ([self.schema_path, self.extensions_path], 1))
+        self.assertTrue(self.schema_path.exists())
+
+    def test_skips_up_to_date_outputs(self):
+        self._regenerate()
+        modified = self.schema_path.stat().st_mtime_ns
+        self.assertEqual(self._regenerate(check=True), ([], 0))
+        self.assertEqual(self.builds, 0)
+        self.assertEqual(self._regenerate(), ([], 0))
+        self.assertEqual(self.builds, 0)
+        self.assertEqual(self.schema_path.stat().st_mtime_ns, modified)
+
+    def test_builds_schema_when_inputs_change(self):
+        self._regenerate()
+        with patch.object(regenerate, "input_fingerprint", return_value="changed"):
+            self.assertEqual(self._regenerate(check=True), ([], 0))
+            self.assertEqual(self.builds, 1)
+            self.assertEqual(self._regenerate(), ([], 0))
+        self.assertEqual(self._regenerate(check=True), ([], 0))
+        self.assertEqual(self.builds, 1)
+
+    def test_regenerates_changed_schema(self):
+        self._regenerate()
+        self.schema_path.write_text("{}", encoding="utf-8")
+        self.assertEqual(self._regenerate(), ([self.schema_path, self.extensions_path], 1))
+        self.extensions_path.unlink()
+        self.assertEqual(self._regenerate(), ([self.extensions_path], 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import unittest
+
+from aind_behavior_vr_foraging import task_logic as vr_task_logic
+from aind_behavior_vr_foraging.revisions import PatchOperation, RevisionStore, apply_patch, diff
+
+sys.path.append(".")
+from examples.task_patch_foraging import task_logic
+
+
+class TestDiff(unittest.TestCase):
+    def test_round_trip(self):
+        parent = {"a": 1, "b": {"c": [1, 2, 3], "d": "x"}, "e/f": None, "g": True}
+        child = {"a": 1.0, "b": {"c": [1, 5], "d": "x", "h": {}}, "e/f": 0, "g": 1}
+        operations = diff(parent, child)
+        self.assertEqual(apply_patch(parent, operations), child)
+        self.assertEqual(parent["b"]["c"], [1, 2, 3])
+
+    def test_minimal_operations(self):
+        operations = diff({"a": {"b": [1, 2]}, "c": 0}, {"a": {"b": [1, 3]}, "c": 0})
+        self.assertEqual(operations, [PatchOperation(op="replace", path="/a/b/1", value=3)])
+        self.assertEqual(diff({"a": 1}, {"a": 1}), [])
+
+    def test_pointer_escaping(self):
+        operations = diff({}, {"a/b": {"c~d": 1}})
+        self.assertEqual(operations[0].path, "/a~1b")
+        self.assertEqual(apply_patch({"x~y/z": 1}, [PatchOperation(op="remove", path="/x~0y~1z")]), {})
+
+    def test_array_append_and_insert(self):
+        self.assertEqual(apply_patch([1], [PatchOperation(op="add", path="/-", value=2)]), [1, 2])
+        self.assertEqual(apply_patch([1], [PatchOperation(op="add", path="/0", value=0)]), [0, 1])
+
+    def test_invalid_paths_raise(self):
+        for operation in (
+            PatchOperation(op="replace", path="/missing", value=1),
+            PatchOperation(op="remove", path="/a/5"),
+            PatchOperation(op="replace", path="/a/01", value=1),
+            PatchOperation(op="remove", path="a"),
+        ):
+            with self.subTest(path=operation.path), self.assertRaises(ValueError):
+                apply_patch({"a": [1, 2]}, [operation])
+
+
+class TestRevisionStore(unittest.TestCase):
+    def setUp(self):
+        self.store = RevisionStore()
+        self.root = self.store.add(task_logic)
+
+    def _with_reward_amount(self, amount: float) -> vr_task_logic.AindVrForagingTaskLogic:
+        task = task_logic.model_copy(deep=True)
+        for block in task.task_parameters.environment.blocks:
+            for patch in block.environment.patches:
+                patch.reward_specification.amount = vr_task_logic.scalar_value(amount)
+        return task
+
+    def test_materializes_revisions(self):
+        child = self._with_reward_amount(7.0)
+        child_id = self.store.add(child, parent=self.root)
+        grandchild = self._with_reward_amount(8.0)
+        grandchild_id = self.store.add(grandchild, parent=child_id)
+
+        restored = RevisionStore.model_validate_json(self.store.model_dump_json())
+        self.assertEqual(restored.get(self.root), task_logic)
+        self.assertEqual(restored.get(child_id), child)
+        self.assertEqual(restored.get(grandchild_id), grandchild)
+        self.assertIsNone(restored.revisions[grandchild_id].document)
+        self.assertEqual(restored.history(grandchild_id), [self.root, child_id, grandchild_id])
+
+    def test_changes(self):
+        child_id = self.store.add(self._with_reward_amount(7.0), parent=self.root)
+        changes = self.store.changes(child_id)
+        self.assertTrue(changes)
+        self.assertTrue(
+            all(op.op == "replace" and op.path.endswith("/amount/distribution_parameters/value") for op in changes)
+        )
+        self.assertEqual({op.value for op in changes}, {7.0})
+        self.assertEqual(
+            self.store.changes(self.root, since=child_id),
+            diff(self.store.document(child_id), self.store.document(self.root)),
+        )
+
+    def test_adding_same_content_returns_existing_revision(self):
+        self.assertEqual(self.store.add(task_logic.model_copy(deep=True), parent=self.root), self.root)
+        self.assertEqual(len(self.store.revisions), 1)
+
+    def test_snapshot_interval_bounds_delta_chains(self):
+        store = RevisionStore(snapshot_interval=2)
+        parent = store.add(task_logic)
+        for amount in (1.0, 2.0, 3.0):
+            parent = store.add(self._with_reward_amount(amount), parent=parent)
+        depths = [store.revisions[revision_id].depth for revision_id in store.history(parent)]
+        self.assertEqual(depths, [0, 1, 0, 1])
+        self.assertEqual(store.get(parent), self._with_reward_amount(3.0))
+
+    def test_unknown_revision_raises(self):
+        with self.assertRaises(KeyError):
+            self.store.get("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
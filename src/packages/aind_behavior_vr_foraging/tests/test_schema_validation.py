@@ -0,0 +1,119 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from aind_behavior_vr_foraging import regenerate, schema_validation
+from aind_behavior_vr_foraging.rig import AindVrForagingRig
+from aind_behavior_vr_foraging.schema_validation import SchemaValidationError, SchemaValidator, get_validator
+from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+
+sys.path.append(".")
+from examples.rig import rig
+from examples.task_patch_foraging import task_logic
+
+
+class TestSchemaValidator(unittest.TestCase):
+    def test_keywords(self):
+        validator = SchemaValidator(
+            {
+                "type": "object",
+                "properties": {
+                    "count": {"type": "integer", "minimum": 0},
+                    "flag": {"const": True},
+                    "tags": {"type": "array", "items": {"type": "string", "pattern": "^[a-z]+$"}, "maxItems": 2},
+                    "ratio": {"type": "number", "exclusiveMaximum": 1},
+                },
+                "required": ["count"],
+                "additionalProperties": False,
+            }
+        )
+        self.assertTrue(validator.is_valid({"count": 2.0, "flag": True, "tags": ["a"], "ratio": 0.5}))
+        for document, path in (
+            ({}, "/"),
+            ({"count": True}, "/count"),
+            ({"count": -1}, "/count"),
+            ({"count": 1, "flag": 1}, "/flag"),
+            ({"count": 1, "tags": ["A"]}, "/tags/0"),
+            ({"count": 1, "tags": ["a", "b", "c"]}, "/tags"),
+            ({"count": 1, "ratio": 1}, "/ratio"),
+            ({"count": 1, "other": 1}, "/"),
+        ):
+            with self.subTest(document=document):
+                with self.assertRaises(SchemaValidationError) as context:
+                    validator.validate(document)
+                self.assertEqual(context.exception.path or "/", path)
+
+    def test_recursive_references(self):
+        validator = SchemaValidator(
+            {
+                "$defs": {
+                    "Node": {
+                        "type": "object",
+                        "properties": {"children": {"type": "array", "items": {"$ref": "#/$defs/Node"}}},
+                    }
+                }
+            },
+            ref="#/$defs/Node",
+        )
+        self.assertTrue(validator.is_valid({"children": [{"children": []}]}))
+        self.assertEqual(validator.first_error({"children": [{"children": [1]}]}).path, "/children/0/children/0")
+
+    def test_one_of(self):
+        validator = SchemaValidator({"oneOf": [{"type": "integer"}, {"type": "number", "minimum": 0}]})
+        self.assertTrue(validator.is_valid(-1))
+        self.assertTrue(validator.is_valid(0.5))
+        self.assertFalse(validator.is_valid(1))
+        self.assertFalse(validator.is_valid("1"))
+
+    def test_unsupported_keywords_raise(self):
+        with self.assertRaises(ValueError):
+            SchemaValidator({"patternProperties": {"^a": {"type": "string"}}})
+
+
+class TestPublishedSchemaValidation(unittest.TestCase):
+    def test_examples_are_valid(self):
+        documents = [task_logic.model_dump_json(), task_logic.model_dump(mode="json")]
+        self.assertEqual(get_validator(AindVrForagingTaskLogic).validate_many(documents), [None, None])
+
+    def test_invalid_documents(self):
+        document = task_logic.model_dump(mode="json")
+        patch = document["task_parameters"]["environment"]["blocks"][0]["environment"]["patches"][0]
+        patch["reward_specification"]["amount"]["family"] = "Unknown"
+        errors = get_validator(AindVrForagingTaskLogic).validate_many([document, rig.model_dump(mode="json")])
+        self.assertEqual(
+            errors[0].path,
+            "/task_parameters/environment/blocks/0/environment/patches/0/reward_specification/amount/family",
+        )
+        self.assertIsNotNone(errors[1])
+
+    def test_validator_is_cached(self):
+        self.assertIs(get_validator(AindVrForagingTaskLogic), get_validator(AindVrForagingTaskLogic))
+        for model_type in (type(task_logic.task_parameters), AindVrForagingRig):
+            with self.assertRaises(ValueError):
+                get_validator(model_type)
+
+    def test_default_schema_is_built_from_models(self):
+        get_validator.cache_clear()
+        schema_validation._built_schema.cache_clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            # A schema file in the working directory, which may be outdated, is not read
+            (Path(tmp) / f"{regenerate.MODEL_NAME}.json").write_text('{"$defs": {}}', encoding="utf-8")
+            with patch.object(regenerate, "SCHEMA_ROOT", Path(tmp)):
+                validator = get_validator(AindVrForagingTaskLogic)
+        self.assertIsNone(validator.first_error(task_logic.model_dump(mode="json")))
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "schema.json"
+            path.write_text(regenerate.build_schema(), encoding="utf-8")
+            validator = SchemaValidator.from_file(path, ref="#/$defs/AindVrForagingRig")
+            self.assertIsNot(get_validator(AindVrForagingTaskLogic, path), get_validator(AindVrForagingTaskLogic))
+            self.assertTrue(get_validator(AindVrForagingTaskLogic, path).is_valid(task_logic.model_dump(mode="json")))
+        self.assertTrue(validator.is_valid(json.loads(rig.model_dump_json())))
+
+
+if __name__ == "__main__":
+    unittest.main()
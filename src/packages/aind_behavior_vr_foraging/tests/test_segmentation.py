@@ -0,0 +1,64 @@
+"""Tests for the patch visit segmentation of software events."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from aind_behavior_vr_foraging.data_contract.segmentation import PATCH_VISIT_COLUMNS, segment_patch_visits
+
+
+def _events(timestamps, data):
+    return pd.DataFrame({"data": data}, index=pd.Index(timestamps, dtype=float, name="timestamp"))
+
+
+class TestSegmentPatchVisits(unittest.TestCase):
+    def setUp(self):
+        self.active_patch = _events([1.0, 5.0, 9.0], [{"state_index": 0}, {"state_index": 1}, {"state_index": 0}])
+
+    def test_events_are_assigned_to_visits(self):
+        visits = segment_patch_visits(
+            self.active_patch,
+            choices=_events([0.5, 2.0, 3.0, 9.5], [True] * 4),
+            rewards=_events([2.1, 3.1, 9.6], [5.0, np.nan, 3.0]),
+            sites=_events(
+                [1.0, 2.0, 5.0, 6.0],
+                [
+                    {"label": "InterSite", "length": 10.0},
+                    {"label": "RewardSite", "length": 20.0},
+                    {"label": "RewardSite", "length": 20.0},
+                    {"label": "InterPatch", "length": 50.0},
+                ],
+            ),
+            stops=_events([4.0, 6.0, 7.0], [None] * 3),
+            end_time=12.0,
+        )
+        self.assertEqual(tuple(visits.columns), PATCH_VISIT_COLUMNS)
+        self.assertEqual(visits.index.name, "visit")
+        self.assertEqual(visits["state_index"].tolist(), [0, 1, 0])
+        self.assertEqual(visits["duration"].tolist(), [4.0, 4.0, 3.0])
+        self.assertEqual(visits["n_choices"].tolist(), [2, 0, 1])
+        self.assertEqual(visits["n_rewards"].tolist(), [1, 0, 1])
+        self.assertEqual(visits["water"].tolist(), [5.0, 0.0, 3.0])
+        self.assertEqual(visits["n_sites"].tolist(), [1, 1, 0])
+        self.assertEqual(visits["distance"].tolist(), [30.0, 70.0, 0.0])
+        self.assertEqual(visits["n_stops"].tolist(), [1, 2, 0])
+
+    def test_missing_streams(self):
+        visits = segment_patch_visits(self.active_patch)
+        self.assertEqual(len(visits), 3)
+        self.assertTrue(np.isnan(visits["duration"].iloc[-1]))
+        self.assertEqual(visits[["n_sites", "n_choices", "n_rewards", "n_stops"]].to_numpy().sum(), 0)
+
+    def test_no_visits(self):
+        visits = segment_patch_visits(_events([], []), choices=_events([1.0], [True]))
+        self.assertTrue(visits.empty)
+        self.assertEqual(tuple(visits.columns), PATCH_VISIT_COLUMNS)
+
+    def test_unsorted_visits_raise(self):
+        with self.assertRaises(ValueError):
+            segment_patch_visits(self.active_patch.iloc[::-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,439 @@
+"""Tests for the Monte Carlo task simulator."""
+
+import unittest
+
+import aind_behavior_services.task.distributions as distributions
+import numpy as np
+
+from aind_behavior_vr_foraging import task_logic as vr_task_logic
+from aind_behavior_vr_foraging.simulation import (
+    ConsecutiveFailuresAgent,
+    RandomAgent,
+    StatePreferenceAgent,
+    analyze_markov_environment,
+    analyze_task,
+    apply_update_function,
+    compile_corridor,
+    compile_distribution,
+    diff_visual_corridors,
+    mixing_time,
+    sample,
+    simulate,
+    stationary_distribution,
+)
+
+
+def _site(label: vr_task_logic.VirtualSiteLabels, length: float = 30.0) -> vr_task_logic.VirtualSiteGenerator:
+    return vr_task_logic.VirtualSiteGenerator(label=label, length_distribution=vr_task_logic.scalar_value(length))
+
+
+def _patch(
+    state_index: int = 0,
+    amount: float = 5,
+    available: float = 1000,
+    probability: float = 1,
+    reward_function=(),
+    patch_terminators=(),
+    post_patch: bool = False,
+) -> vr_task_logic.Patch:
+    return vr_task_logic.Patch(
+        state_index=state_index,
+        reward_specification=vr_task_logic.RewardSpecification(
+            amount=vr_task_logic.scalar_value(amount),
+            probability=vr_task_logic.scalar_value(probability),
+            available=vr_task_logic.scalar_value(available),
+            operant_logic=vr_task_logic.OperantLogic(stop_duration=vr_task_logic.scalar_value(0)),
+            reward_function=list(reward_function),
+        ),
+        patch_virtual_sites_generator=vr_task_logic.PatchVirtualSitesGenerator(
+            inter_patch=_site(vr_task_logic.VirtualSiteLabels.INTERPATCH),
+            inter_site=_site(vr_task_logic.VirtualSiteLabels.INTERSITE),
+            reward_site=_site(vr_task_logic.VirtualSiteLabels.REWARDSITE),
+            post_patch=_site(vr_task_logic.VirtualSiteLabels.POSTPATCH) if post_patch else None,
+        ),
+        patch_terminators=list(patch_terminators)
+        or [vr_task_logic.PatchTerminatorOnReward(count=vr_task_logic.scalar_value(3))],
+    )
+
+
+def _task(*blocks: vr_task_logic.Block, sampling_mode: str = "Sequential") -> vr_task_logic.AindVrForagingTaskLogic:
+    return vr_task_logic.AindVrForagingTaskLogic(
+        task_parameters=vr_task_logic.AindVrForagingTaskParameters(
+            environment=vr_task_logic.BlockStructure(blocks=list(blocks), sampling_mode=sampling_mode)
+        )
+    )
+
+
+def _block(*patches: vr_task_logic.Patch, end_conditions=(), **environment) -> vr_task_logic.Block:
+    if "patch_indices" in environment:
+        environment = vr_task_logic.SequenceEnvironment(patches=list(patches), **environment)
+    else:
+        environment = vr_task_logic.MarkovEnvironment(
+            patches=list(patches), transition_matrix=environment.get("transition_matrix", [[1]])
+        )
+    return vr_task_logic.Block(environment=environment, end_conditions=list(end_conditions))
+
+
+class TestSimulate(unittest.TestCase):
+    def test_deterministic_patch(self):
+        # Each site takes 1 s: 1 inter-patch + 3 x (inter-site + reward site) + 1 inter-site = 8 s per patch.
+        result = simulate(_task(_block(_patch())), StatePreferenceAgent({0: 1.0}), 4, max_duration=80, seed=0)
+        np.testing.assert_allclose(result.duration, 80)
+        np.testing.assert_array_equal(result.patches, 10)
+        np.testing.assert_array_equal(result.rewards, 30)
+        np.testing.assert_allclose(result.water, 150)
+        self.assertEqual(len(result.patch_visits), 40)
+        np.testing.assert_array_equal(result.patch_visits["rewards"], 3)
+        np.testing.assert_allclose(result.patch_visits["duration"], 7)
+
+    def test_available_reward_is_depleted(self):
+        result = simulate(
+            _task(_block(_patch(available=12))), StatePreferenceAgent({0: 1.0}), 2, max_duration=8, seed=0
+        )
+        np.testing.assert_allclose(result.water, 12)
+        np.testing.assert_array_equal(result.rewards, 3)
+
+    def test_patch_reward_function_on_reward(self):
+        depletion = vr_task_logic.PatchRewardFunction(
+            amount=vr_task_logic.ClampedRateFunction(rate=vr_task_logic.scalar_value(-1), minimum=0, maximum=5),
+            rule=vr_task_logic.RewardFunctionRule.ON_REWARD,
+        )
+        result = simulate(
+            _task(_block(_patch(reward_function=[depletion]))),
+            StatePreferenceAgent({0: 1.0}),
+            1,
+            max_duration=8,
+            seed=0,
+        )
+        np.testing.assert_allclose(result.water, 5 + 4 + 3)
+
+    def test_outside_reward_function_on_time(self):
+        # Patches are left after a single reward site, having been replenished for the 1 s inter-patch site.
+        replenish = vr_task_logic.OutsideRewardFunction(
+            available=vr_task_logic.ClampedRateFunction(rate=vr_task_logic.scalar_value(5), maximum=100),
+            rule=vr_task_logic.RewardFunctionRule.ON_TIME,
+        )
+        patch = _patch(
+            available=0,
+            reward_function=[replenish],
+            patch_terminators=[vr_task_logic.PatchTerminatorOnRewardSite(count=vr_task_logic.scalar_value(1))],
+        )
+        result = simulate(_task(_block(patch)), StatePreferenceAgent({0: 1.0}), 2, max_duration=40, seed=0)
+        np.testing.assert_array_equal(result.patches, 10)
+        np.testing.assert_allclose(result.water, 50)
+
+    def test_rejections_terminate_patches(self):
+        patch = _patch(patch_terminators=[vr_task_logic.PatchTerminatorOnRejection()])
+        result = simulate(_task(_block(patch)), StatePreferenceAgent({}), 3, max_duration=30, seed=0)
+        np.testing.assert_array_equal(result.choices, 0)
+        np.testing.assert_array_equal(result.patch_visits["reward_sites"][result.patch_visits["duration"] > 2], 1)
+
+    def test_markov_transitions(self):
+        block = _block(_patch(0), _patch(1), transition_matrix=[[0, 1], [1, 0]])
+        result = simulate(_task(block), StatePreferenceAgent({0: 1.0, 1: 1.0}), 5, max_duration=200, seed=0)
+        for session in range(5):
+            states = result.patch_visits["state_index"][result.patch_visits["session"] == session]
+            self.assertTrue(np.all(np.diff(states) != 0))
+
+    def test_sequence_and_block_end_conditions(self):
+        blocks = [
+            _block(
+                _patch(i),
+                patch_indices=[i],
+                end_conditions=[vr_task_logic.BlockEndConditionPatchCount(value=vr_task_logic.scalar_value(2))],
+            )
+            for i in range(2)
+        ]
+        result = simulate(_task(*blocks), StatePreferenceAgent({0: 1.0, 1: 1.0}), 2, max_duration=64, seed=0)
+        states = result.patch_visits["state_index"][result.patch_visits["session"] == 0]
+        np.testing.assert_array_equal(states[:8], [0, 0, 1, 1, 0, 0, 1, 1])
+
+    def test_post_patch_is_traversed(self):
+        result = simulate(
+            _task(_block(_patch(post_patch=True))), StatePreferenceAgent({0: 1.0}), 1, max_duration=90, seed=0
+        )
+        self.assertEqual(result.patches[0], 10)
+
+    def test_max_water_ends_sessions(self):
+        result = simulate(
+            _task(_block(_patch())), StatePreferenceAgent({0: 1.0}), 3, max_duration=1000, max_water=20, seed=0
+        )
+        np.testing.assert_allclose(result.water, 20)
+        self.assertTrue(np.all(result.duration < 1000))
+
+    def test_sessions_without_progress_fail(self):
+        patch = _patch()
+        for site in ("inter_patch", "inter_site", "reward_site"):
+            getattr(patch.patch_virtual_sites_generator, site).length_distribution = vr_task_logic.scalar_value(0)
+        with self.assertRaises(RuntimeError):
+            simulate(_task(_block(patch)), StatePreferenceAgent({0: 0.0}), 2, max_duration=10, seed=0)
+
+    def test_seed_is_reproducible(self):
+        task = _task(_block(_patch(probability=0.5)))
+        first = simulate(task, RandomAgent(0.7), 20, max_duration=100, seed=3)
+        second = simulate(task, RandomAgent(0.7), 20, max_duration=100, seed=3)
+        np.testing.assert_array_equal(first.water, second.water)
+        np.testing.assert_array_equal(first.patch_visits, second.patch_visits)
+
+    def test_example_task_logic(self):
+        import sys
+
+        sys.path.append(".")
+        from examples.task_patch_foraging import task_logic
+
+        result = simulate(task_logic, ConsecutiveFailuresAgent(), 10, max_duration=60, seed=0)
+        summary = result.summary()
+        self.assertIn("water", summary)
+        self.assertIn("patch_0", summary)
+        self.assertTrue(np.all(result.duration >= 60))
+
+
+class TestCompileCorridor(unittest.TestCase):
+    def setUp(self):
+        self.task = _task(_block(_patch(post_patch=True)))
+        self.layout = compile_corridor(self.task, StatePreferenceAgent({0: 1.0}), max_distance=600)
+
+    def test_sites(self):
+        sites = self.layout.sites
+        self.assertEqual(len(sites), 20)
+        np.testing.assert_allclose(sites["start_position"][1:], sites["start_position"][:-1] + sites["length"][:-1])
+        np.testing.assert_array_equal(sites["id"], np.floor(sites["start_position"]))
+        self.assertEqual(
+            list(sites["label"][:9]),
+            ["InterPatch"] + ["InterSite", "RewardSite"] * 3 + ["InterSite", "PostPatch"],
+        )
+        is_reward_site = sites["generator"] == "reward_site"
+        np.testing.assert_array_equal(self.layout.odors[is_reward_site], [[1, 0, 0]] * int(is_reward_site.sum()))
+        self.assertTrue(np.all(np.isnan(self.layout.odors[~is_reward_site])))
+
+        virtual_sites = self.layout.virtual_sites()
+        self.assertEqual(virtual_sites[2].label, vr_task_logic.VirtualSiteLabels.REWARDSITE)
+        self.assertIsNotNone(virtual_sites[2].reward_specification)
+        self.assertIsNone(virtual_sites[1].odor_specification)
+
+    def test_visual_corridors(self):
+        corridors = self.layout.visual_corridors()
+        self.assertEqual(len(corridors), int((600 + 1000) // 120) + 1)
+        self.assertEqual(corridors[2].start_position, 240)
+        self.assertEqual(corridors[2].size, vr_task_logic.Size(width=40, height=30))
+
+    def test_seed_is_reproducible(self):
+        task = _task(_block(_patch(probability=0.5)))
+        first = compile_corridor(task, RandomAgent(0.5), seed=7, max_distance=2000)
+        second = compile_corridor(task, RandomAgent(0.5), seed=7, max_distance=2000)
+        for field in ("label", "start_position", "length"):
+            np.testing.assert_array_equal(first.sites[field], second.sites[field])
+
+    def test_diff_visual_corridors(self):
+        logged = [corridor.model_dump() for corridor in self.layout.visual_corridors()[:5]]
+        self.assertEqual(diff_visual_corridors(self.layout, logged), [])
+
+        logged[1]["start_position"] = 100
+        del logged[3]
+        differences = diff_visual_corridors(self.layout, logged)
+        self.assertEqual([(d.id, d.field) for d in differences], [(1, "start_position"), (3, "missing")])
+
+
+class TestUpdateFunctions(unittest.TestCase):
+    rng = np.random.default_rng(0)
+
+    def test_clamped_rate(self):
+        function = vr_task_logic.ClampedRateFunction(rate=vr_task_logic.scalar_value(2), minimum=0, maximum=5)
+        updated = apply_update_function(function, np.array([1.0, 4.0]), np.array([1.0, 1.0]), self.rng)
+        np.testing.assert_allclose(updated, [3, 5])
+
+    def test_saturating_multiplicative_rate(self):
+        function = vr_task_logic.SaturatingMultiplicativeRateFunction(
+            rate=vr_task_logic.scalar_value(0.5), minimum=1, below_minimum_to=0, maximum=10
+        )
+        updated = apply_update_function(function, np.array([8.0, 1.5, 40.0]), np.ones(3), self.rng)
+        np.testing.assert_allclose(updated, [4, 0, 10])
+
+    def test_lookup_table(self):
+        function = vr_task_logic.LookupTableFunction(lut_keys=[0, 10], lut_values=[0, 1])
+        updated = apply_update_function(function, np.zeros(3), np.array([-1.0, 5.0, 20.0]), self.rng)
+        np.testing.assert_allclose(updated, [0, 0.5, 1])
+
+    def test_set_value(self):
+        function = vr_task_logic.SetValueFunction(value=vr_task_logic.scalar_value(7))
+        np.testing.assert_allclose(apply_update_function(function, np.zeros(2), np.ones(2), self.rng), 7)
+
+
+class TestSample(unittest.TestCase):
+    def test_truncation(self):
+        rng = np.random.default_rng(0)
+        for mode in ("clamp", "exclude"):
+            with self.subTest(mode=mode):
+                distribution = distributions.NormalDistribution(
+                    distribution_parameters=distributions.NormalDistributionParameters(mean=0, std=1),
+                    truncation_parameters=distributions.TruncationParameters(min=-0.5, max=0.5, truncation_mode=mode),
+                )
+                values = sample(distribution, 1000, rng)
+                self.assertTrue(np.all((values >= -0.5) & (values <= 0.5)))
+
+    def test_scaling(self):
+        distribution = distributions.UniformDistribution(
+            distribution_parameters=distributions.UniformDistributionParameters(min=0, max=1),
+            scaling_parameters=distributions.ScalingParameters(scale=10, offset=5),
+        )
+        values = sample(distribution, 1000, np.random.default_rng(0))
+        self.assertTrue(np.all((values >= 5) & (values <= 15)))
+
+    def test_exclude_falls_back_to_closest_bound(self):
+        distribution = distributions.NormalDistribution(
+            distribution_parameters=distributions.NormalDistributionParameters(mean=100, std=1),
+            truncation_parameters=distributions.TruncationParameters(min=0, max=1),
+        )
+        np.testing.assert_array_equal(sample(distribution, 10, np.random.default_rng(0)), 1)
+
+    def test_pdf(self):
+        distribution = distributions.PdfDistribution(
+            distribution_parameters=distributions.PdfDistributionParameters(pdf=[1, 3], index=[2, 7])
+        )
+        values = sample(distribution, 100_000, np.random.default_rng(0))
+        self.assertEqual(set(np.unique(values)), {2, 7})
+        self.assertAlmostEqual(np.mean(values == 7), 0.75, places=2)
+
+    def test_compile_distribution_is_cached_by_content(self):
+        first = vr_task_logic.scalar_value(3)
+        second = vr_task_logic.scalar_value(3)
+        self.assertIs(compile_distribution(first), compile_distribution(second))
+        self.assertIsNot(compile_distribution(first), compile_distribution(vr_task_logic.scalar_value(4)))
+        np.testing.assert_array_equal(compile_distribution(2.5)(3), 2.5)
+
+    def test_seed_is_reproducible(self):
+        sampler = compile_distribution(
+            distributions.ExponentialDistribution(
+                distribution_parameters=distributions.ExponentialDistributionParameters(rate=1),
+                truncation_parameters=distributions.TruncationParameters(min=0, max=2),
+            )
+        )
+        first = sampler(1_000_000, np.random.default_rng(1))
+        self.assertEqual(first.shape, (1_000_000,))
+        np.testing.assert_array_equal(first, sampler(1_000_000, np.random.default_rng(1)))
+
+
+class TestMarkovAnalysis(unittest.TestCase):
+    @staticmethod
+    def _reset(probability: float, available: float) -> vr_task_logic.OnThisPatchEntryRewardFunction:
+        return vr_task_logic.OnThisPatchEntryRewardFunction(
+            probability=vr_task_logic.SetValueFunction(value=vr_task_logic.scalar_value(probability)),
+            available=vr_task_logic.SetValueFunction(value=vr_task_logic.scalar_value(available)),
+        )
+
+    def _task(self) -> vr_task_logic.AindVrForagingTaskLogic:
+        depletion = vr_task_logic.PatchRewardFunction(
+            probability=vr_task_logic.ClampedMultiplicativeRateFunction(
+                rate=vr_task_logic.scalar_value(0.7), minimum=0, maximum=1
+            ),
+            rule=vr_task_logic.RewardFunctionRule.ON_REWARD,
+        )
+        depleting = _patch(
+            0,
+            probability=0.9,
+            reward_function=[depletion, self._reset(0.9, 1000)],
+            patch_terminators=[
+                vr_task_logic.PatchTerminatorOnReward(count=vr_task_logic.scalar_value(3)),
+                vr_task_logic.PatchTerminatorOnRejection(count=vr_task_logic.scalar_value(2)),
+            ],
+        )
+        limited = _patch(
+            1,
+            probability=0.5,
+            available=12,
+            reward_function=[self._reset(0.5, 12)],
+            patch_terminators=[
+                vr_task_logic.PatchTerminatorOnChoice(count=vr_task_logic.scalar_value(4)),
+                vr_task_logic.PatchTerminatorOnRewardSite(count=vr_task_logic.scalar_value(6)),
+            ],
+        )
+        return _task(_block(depleting, limited, transition_matrix=[[0.2, 0.8], [0.6, 0.4]]))
+
+    def test_deterministic_patch(self):
+        # Always stopping with certain rewards: 3 rewards over 3 reward sites and 4 inter-sites of 30 cm.
+        analysis = analyze_markov_environment(_block(_patch()).environment)
+        patch = analysis.patches[0]
+        self.assertEqual((patch.reward_sites, patch.rewards, patch.water), (3, 3, 15))
+        self.assertAlmostEqual(patch.distance, 30 * 8)
+        self.assertAlmostEqual(analysis.water_per_distance, 15 / 240)
+
+    def test_matches_simulation(self):
+        task = self._task()
+        analysis = analyze_task(task, stop_probability=0.7)[0]
+        np.testing.assert_allclose(analysis.stationary_distribution, [3 / 7, 4 / 7])
+        self.assertEqual(analysis.mixing_time, 1)
+        self.assertAlmostEqual(analysis.second_eigenvalue_modulus, 0.4)
+
+        result = simulate(task, RandomAgent(0.7), 100, max_duration=3600, seed=0)
+        summary = result.summary()
+        for patch in analysis.patches:
+            simulated = summary[f"patch_{patch.state_index}"]
+            self.assertAlmostEqual(patch.rewards, simulated["rewards_per_visit"], delta=0.05)
+            self.assertAlmostEqual(patch.water, simulated["water_per_visit"], delta=0.25)
+            self.assertAlmostEqual(patch.reward_sites, simulated["reward_sites_per_visit"], delta=0.1)
+        self.assertAlmostEqual(analysis.water_per_distance, result.water.sum() / result.distance.sum(), delta=5e-4)
+
+    def test_visits_beyond_max_sites_are_truncated(self):
+        never_ending = _patch(patch_terminators=[vr_task_logic.PatchTerminatorOnRejection()])
+        patch = analyze_markov_environment(_block(never_ending).environment, max_sites=10).patches[0]
+        self.assertEqual(patch.reward_sites, 10)
+        self.assertEqual(patch.truncated, 1)
+
+    def test_expected_lengths_are_exact(self):
+        def distance(length: distributions.Distribution) -> float:
+            patch = _patch()
+            for site in ("inter_patch", "inter_site", "reward_site"):
+                getattr(patch.patch_virtual_sites_generator, site).length_distribution = length
+            # 3 rewards over 3 reward sites, 4 inter-sites and 1 inter-patch site
+            return analyze_markov_environment(_block(patch).environment).patches[0].distance / 8
+
+        normal = distributions.NormalDistributionParameters(mean=0, std=1)
+        clamped = distributions.NormalDistribution(
+            distribution_parameters=normal,
+            truncation_parameters=distributions.TruncationParameters(min=-1, max=100, truncation_mode="clamp"),
+        )
+        self.assertAlmostEqual(distance(clamped), 1 / np.sqrt(2 * np.pi), places=12)
+
+        scaling = distributions.ScalingParameters(scale=-2, offset=3)
+        truncation = distributions.TruncationParameters(min=-1, max=4, truncation_mode="exclude")
+        for length in (
+            distributions.NormalDistribution(distribution_parameters=normal, scaling_parameters=scaling),
+            distributions.LogNormalDistribution(
+                distribution_parameters=distributions.LogNormalDistributionParameters(mean=0, std=0.5),
+                truncation_parameters=truncation,
+            ),
+            distributions.UniformDistribution(
+                distribution_parameters=distributions.UniformDistributionParameters(min=-1, max=3),
+                scaling_parameters=scaling,
+                truncation_parameters=truncation,
+            ),
+            distributions.ExponentialDistribution(
+                distribution_parameters=distributions.ExponentialDistributionParameters(rate=0.5),
+                scaling_parameters=scaling,
+            ),
+            distributions.GammaDistribution(
+                distribution_parameters=distributions.GammaDistributionParameters(shape=2.5, rate=1.5),
+                scaling_parameters=scaling,
+                truncation_parameters=truncation,
+            ),
+        ):
+            with self.subTest(length=type(length).__name__):
+                sampled = np.mean(np.maximum(sample(length, 1_000_000, np.random.default_rng(0)), 0))
+                self.assertAlmostEqual(distance(length), sampled, delta=5e-3)
+
+    def test_time_terminators_are_rejected(self):
+        patch = _patch(patch_terminators=[vr_task_logic.PatchTerminatorOnTime(count=vr_task_logic.scalar_value(5))])
+        with self.assertRaises(ValueError):
+            analyze_markov_environment(_block(patch).environment)
+
+    def test_chain_statistics(self):
+        identity = np.eye(2)
+        np.testing.assert_allclose(stationary_distribution(identity, np.array([0.25, 0.75])), [0.25, 0.75])
+        periodic = np.array([[0.0, 1.0], [1.0, 0.0]])
+        np.testing.assert_allclose(stationary_distribution(periodic, np.array([1.0, 0.0])), [0.5, 0.5])
+        self.assertEqual(mixing_time(periodic), float("inf"))
+        self.assertEqual(mixing_time(np.full((3, 3), 1 / 3)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
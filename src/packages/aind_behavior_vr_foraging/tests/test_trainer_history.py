@@ -0,0 +1,110 @@
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from aind_behavior_curriculum import Metrics, Stage, Trainer, create_curriculum
+
+from aind_behavior_vr_foraging.trainer_history import TrainerStateHistory, TrainerStateRecord
+
+sys.path.append(".")
+from examples.session import session
+from examples.task_patch_foraging import task_logic
+
+START = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+class _Metrics(Metrics):
+    n_sessions: int = 0
+
+
+def _record(subject: str, day: int, stage: str, curriculum: str = "Curriculum") -> TrainerStateRecord:
+    return TrainerStateRecord(
+        subject=subject,
+        session_time=START + timedelta(days=day),
+        curriculum=curriculum,
+        stage=stage,
+        is_on_curriculum=True,
+        trainer_state={"stage": {"name": stage}},
+        metrics={"day": day},
+    )
+
+
+class TestTrainerStateHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = TrainerStateHistory(":memory:")
+        for record in (
+            _record("mouse_a", 0, "stage_a"),
+            _record("mouse_a", 2, "graduation"),
+            _record("mouse_a", 1, "stage_b"),
+            _record("mouse_b", 0, "stage_a"),
+            _record("mouse_b", 1, "graduation"),
+            _record("mouse_b", 2, "stage_b"),
+            _record("mouse_c", 0, "stage_a", curriculum="Other"),
+        ):
+            self.assertTrue(self.history.append(record))
+
+    def tearDown(self):
+        self.history.close()
+
+    def test_stage_history_is_ordered_by_session(self):
+        history = self.history.stage_history("mouse_a")
+        self.assertEqual([record.stage for record in history], ["stage_a", "stage_b", "graduation"])
+        self.assertEqual(history[0], _record("mouse_a", 0, "stage_a"))
+        self.assertEqual(self.history.stage_history("mouse_d"), [])
+
+    def test_latest_filters_current_stage(self):
+        self.assertEqual([record.subject for record in self.history.latest()], ["mouse_a", "mouse_b", "mouse_c"])
+        self.assertEqual([record.subject for record in self.history.latest(stage="graduation")], ["mouse_a"])
+        self.assertEqual([record.subject for record in self.history.latest(curriculum="Other")], ["mouse_c"])
+
+    def test_query(self):
+        records = self.history.query(stage="stage_a", curriculum="Curriculum")
+        self.assertEqual([record.subject for record in records], ["mouse_a", "mouse_b"])
+        records = self.history.query(since=START + timedelta(days=1), until=START + timedelta(days=2))
+        self.assertEqual(
+            [(record.subject, record.stage) for record in records], [("mouse_a", "stage_b"), ("mouse_b", "graduation")]
+        )
+        later = START.astimezone(timezone(timedelta(hours=-8))) + timedelta(days=2)
+        self.assertEqual(len(self.history.query(since=later)), 2)
+        with self.assertRaises(ValueError):
+            self.history.query(since=datetime(2024, 1, 1))
+
+    def test_is_append_only(self):
+        self.assertFalse(self.history.append(_record("mouse_a", 0, "stage_a")))
+        self.assertEqual(len(self.history), 7)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.history._connection.execute("UPDATE trainer_states SET stage = 'stage_b'")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.history._connection.execute("DELETE FROM trainer_states")
+
+    def test_persists_across_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "history.db"
+            with TrainerStateHistory(path) as history:
+                history.append(_record("mouse_a", 0, "stage_a"))
+            with TrainerStateHistory(path) as history:
+                self.assertEqual(history.stage_history("mouse_a"), [_record("mouse_a", 0, "stage_a")])
+
+
+class TestTrainerStateRecord(unittest.TestCase):
+    def test_from_suggestion(self):
+        curriculum = create_curriculum("DemoCurriculum", "0.0.0", (task_logic.__class__,))()
+        stage = Stage(name="demo_stage", task=task_logic)
+        curriculum.add_stage(stage)
+        trainer_state = Trainer(curriculum).create_trainer_state(stage=stage, is_on_curriculum=True)
+
+        record = TrainerStateRecord.from_suggestion(session, trainer_state, _Metrics(n_sessions=2), "session")
+
+        self.assertEqual(
+            (record.subject, record.session_time, record.curriculum, record.stage, record.data_directory),
+            (session.subject, session.date, "DemoCurriculum", "demo_stage", str(Path("session").resolve())),
+        )
+        self.assertEqual(record.metrics, {"n_sessions": 2})
+        self.assertEqual(record.trainer_state["stage"]["name"], "demo_stage")
+
+
+if __name__ == "__main__":
+    unittest.main()
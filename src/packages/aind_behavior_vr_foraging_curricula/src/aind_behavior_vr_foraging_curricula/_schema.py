@@ -1,32 +1,201 @@
+import hashlib
 import importlib
+import json
 import pathlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
 
 from aind_behavior_curriculum import Curriculum
+from aind_behavior_vr_foraging import regenerate
+from aind_behavior_vr_foraging.regenerate import fingerprint, is_up_to_date
 
 from aind_behavior_vr_foraging_curricula.cli import _KNOWN_CURRICULA
 
+FINGERPRINTS_FILE = "curricula.fingerprints.json"
+"""Fingerprints of the inputs and outputs, and the distribution versions, of the last export of each curriculum.
 
-def main(root: str = "./schema", dry_run: bool = False) -> None:
-    pathlib.Path(root).mkdir(parents=True, exist_ok=True)
-    for curriculum in _KNOWN_CURRICULA:
-        module = importlib.import_module(f"aind_behavior_vr_foraging_curricula.{curriculum}")
-        curriculum_instance: Curriculum | None = getattr(module, "CURRICULUM", None)
-        if curriculum_instance is None:
-            raise ValueError(f"Curriculum not found in module {module}")
-        serialized_schema = curriculum_instance.model_dump_json(indent=4)
-        if not dry_run:
-            with open(pathlib.Path(root) / f"{curriculum}.json", "w", encoding="utf-8") as f:
-                f.write(serialized_schema)
+Saved next to the schema files.
+"""
+
+SOURCE_PACKAGES = ("aind_behavior_vr_foraging_curricula", "aind_behavior_vr_foraging")
+"""Packages whose source files are fingerprinted as inputs of the curricula that import them."""
+
+DISTRIBUTIONS = (
+    "aind-behavior-vr-foraging-curricula",
+    "aind-behavior-vr-foraging",
+    "aind-behavior-curriculum",
+    "aind-behavior-services",
+    "pydantic",
+)
+"""Distributions whose versions are recorded as inputs of all curricula, e.g. since the version of a curriculum is serialized."""
+
+
+def load_curriculum(curriculum: str) -> Curriculum:
+    """Returns the `CURRICULUM` of a known curriculum module."""
+    module = importlib.import_module(f"aind_behavior_vr_foraging_curricula.{curriculum}")
+    curriculum_instance: Curriculum | None = getattr(module, "CURRICULUM", None)
+    if curriculum_instance is None:
+        raise ValueError(f"Curriculum not found in module {module}")
+    return curriculum_instance
+
+
+def input_fingerprint(curriculum: str, seed: Optional[int] = None) -> str:
+    """Returns the fingerprint of the sources the schema of a curriculum is generated from, without importing it.
+
+    These are the source files the curriculum imports at module level, from `SOURCE_PACKAGES`,
+    and the seed of the random number generator. The versions of the installed distributions
+    are recorded separately, see `distribution_versions`.
+
+    Args:
+        curriculum: Name of the curriculum.
+        seed: Seed of the random number generator the schema is generated with.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"seed={seed}\n".encode("utf-8"))
+    for module, path in sorted(source_files(f"aind_behavior_vr_foraging_curricula.{curriculum}").items()):
+        digest.update(f"{module}\n".encode("utf-8"))
+        digest.update(path.read_bytes().replace(b"\r\n", b"\n"))
+    return digest.hexdigest()
+
+
+def distribution_versions() -> Dict[str, Optional[str]]:
+    """Returns the installed version of each of `DISTRIBUTIONS`, or None for those not installed."""
+    return regenerate.distribution_versions(DISTRIBUTIONS)
+
+
+def source_files(module: str) -> Dict[str, pathlib.Path]:
+    """Returns the source files of a module and of the modules it imports at module level, from `SOURCE_PACKAGES`.
+
+    See `aind_behavior_vr_foraging.regenerate.source_files`.
+    """
+    return regenerate.source_files(module, SOURCE_PACKAGES)
+
+
+def stale_curricula(root: str = "./schema", seed: Optional[int] = None, compare_versions: bool = True) -> List[str]:
+    """Returns the curricula whose inputs or schema file changed since they were last exported.
+
+    Only fingerprints are compared, so no curriculum is imported or serialized.
+
+    Args:
+        root: Directory of the schema files.
+        seed: Seed of the random number generator the schemas are generated with.
+        compare_versions: Whether curricula exported with other versions of `DISTRIBUTIONS`
+            than the installed ones are stale.
+    """
+    fingerprints = _read_fingerprints(pathlib.Path(root))
+    versions = distribution_versions()
+    stale = []
+    for name in _KNOWN_CURRICULA:
+        entry = fingerprints.get(name, {})
+        if (
+            entry.get("inputs") != input_fingerprint(name, seed)
+            or (compare_versions and entry.get("versions") != versions)
+            or not _has_fingerprint(pathlib.Path(root) / f"{name}.json", entry.get("output"))
+        ):
+            stale.append(name)
+    return stale
+
+
+def main(
+    root: str = "./schema",
+    dry_run: bool = False,
+    check: bool = False,
+    seed: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> List[pathlib.Path]:
+    """Generates the schema of all known curricula.
+
+    Curricula whose inputs and schema file did not change since their last export,
+    according to their fingerprints, are skipped. The others are exported in parallel
+    worker processes, and a schema file is only rewritten when its fingerprint
+    differs from the newly generated schema.
+
+    In check mode, e.g. in CI, only the curricula whose sources changed are serialized.
+    The installed versions of `DISTRIBUTIONS` are not compared, so environments that
+    resolved other versions than the one the schemas were exported from can check them.
+    Without a fingerprints file, every curriculum is serialized.
+
+    Args:
+        root: Directory to save the schema files to.
+        dry_run: If True, the schemas are generated but not written.
+        check: If True, no schema is written and the outdated schema files are only reported.
+        seed: Seed of the random number generator each curriculum is generated with.
+        max_workers: Maximum number of worker processes. Defaults to the number of processors.
+
+    Returns:
+        The schema files that were, or in dry run and check mode would be, rewritten.
+    """
+    root_path = pathlib.Path(root)
+    stale = stale_curricula(root, seed, compare_versions=not check)
+    if not stale:
+        return []
+    write = not (dry_run or check)
+    if write:
+        root_path.mkdir(parents=True, exist_ok=True)
+
+    paths = [root_path / f"{name}.json" for name in stale]
+    # Each curriculum is imported in a new process, so its schema does not depend on which
+    # curricula were imported, and consumed random numbers, before it.
+    with ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1) as executor:
+        results = list(executor.map(_export, stale, paths, repeat(seed), repeat(write)))
+
+    if write:
+        fingerprints = _read_fingerprints(root_path)
+        versions = distribution_versions()
+        for name, (_, output) in zip(stale, results):
+            fingerprints[name] = {"inputs": input_fingerprint(name, seed), "versions": versions, "output": output}
+        with open(root_path / FINGERPRINTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(fingerprints.items())), f, indent=4)
+            f.write("\n")
+    return [path for path, (is_outdated, _) in zip(paths, results) if is_outdated]
+
+
+def _export(curriculum: str, path: pathlib.Path, seed: Optional[int], write: bool) -> Tuple[bool, str]:
+    """Serializes a curriculum, and writes it to `path` if outdated. Returns whether it was and its fingerprint."""
+    if seed is not None:
+        random.seed(seed)
+    serialized_schema = load_curriculum(curriculum).model_dump_json(indent=4)
+    is_outdated = not is_up_to_date(path, serialized_schema)
+    if is_outdated and write:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(serialized_schema)
+    return is_outdated, fingerprint(serialized_schema)
+
+
+def _read_fingerprints(root: pathlib.Path) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(root / FINGERPRINTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _has_fingerprint(path: pathlib.Path, expected: Optional[str]) -> bool:
+    try:
+        return expected is not None and fingerprint(path.read_text(encoding="utf-8")) == expected
+    except FileNotFoundError:
+        return False
 
 
 if __name__ == "__main__":
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(description="Generate JSON schema for curricula")
     parser.add_argument(
         "--root", type=pathlib.Path, default=pathlib.Path("./schema"), help="Root directory to save the schema files"
     )
     parser.add_argument("--dry-run", action="store_true", help="If set, do not write schema files to disk.")
+    parser.add_argument(
+        "--check", action="store_true", help="If set, exit with an error if any schema file is outdated."
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random number generator.")
+    parser.add_argument("--max-workers", type=int, default=None, help="Maximum number of worker processes.")
 
     args = parser.parse_args()
-    main(args.root, args.dry_run)
+    outdated = main(args.root, args.dry_run, args.check, args.seed, args.max_workers)
+    if args.check and outdated:
+        print(f"Outdated schema files: {[str(path) for path in outdated]}")
+        sys.exit(1)
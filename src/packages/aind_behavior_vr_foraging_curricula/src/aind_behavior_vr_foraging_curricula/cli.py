@@ -1,3 +1,4 @@
+import csv
 import importlib
 import logging
 import os
@@ -5,19 +6,22 @@ import sys
 import typing as t
 from pathlib import Path
 
-import aind_behavior_curriculum
-from pydantic import BaseModel, Field, RootModel, SerializeAsAny
+from pydantic import BaseModel, Field, RootModel
 from pydantic_settings import BaseSettings, CliApp, CliImplicitFlag, CliSubCommand
 
 from . import __version__
-from .utils import model_from_json_file
+
+if t.TYPE_CHECKING:
+    import aind_behavior_curriculum
+
+    from .suggestion import CurriculumSuggestion
+
+# The cli is spawned for every session, so the curriculum library, the task logic and the
+# data loading dependencies are only imported by the subcommands that need them.
 
 logger = logging.getLogger(__name__)
 
 TModel = t.TypeVar("TModel", bound=BaseModel)
-TTrainerState = t.TypeVar("TTrainerState", bound=aind_behavior_curriculum.TrainerState)
-TMetrics = t.TypeVar("TMetrics", bound=aind_behavior_curriculum.Metrics)
-TCurriculum = t.TypeVar("TCurriculum", bound=aind_behavior_curriculum.Curriculum)
 
 
 class Version(RootModel):
@@ -31,6 +35,8 @@ class DslVersion(RootModel):
     root: t.Any
 
     def cli_cmd(self) -> None:
+        import aind_behavior_curriculum
+
         print(aind_behavior_curriculum.__version__)
 
 
@@ -54,32 +60,15 @@ class CurriculumCliArgs(BaseSettings):
     curriculum: t.Optional[str] = Field(
         default=None, description="Forces the use of a specific curriculum, bypassing any automatic detection."
     )
+    trainer_state_history: t.Optional[os.PathLike] = Field(
+        default=None,
+        description="Path to a trainer state history store to append the suggestion to. "
+        "If not provided, the suggestion will not be recorded.",
+    )
 
     def cli_cmd(self) -> None:
         try:
-            if self.curriculum:
-                curriculum_name = self.curriculum
-            else:
-                annonymous_trainer_state = model_from_json_file(
-                    self.input_trainer_state,
-                    aind_behavior_curriculum.TrainerState[aind_behavior_curriculum.Curriculum[t.Any]],
-                )
-                if (curriculum := annonymous_trainer_state.curriculum) is None:
-                    logger.error("Trainer state does not have a curriculum.")
-                    raise ValueError("Trainer state does not have a curriculum.")
-                curriculum_name = curriculum.pkg_location
-
-            curriculum_name = curriculum_name.replace(str(__package__) + ".", "")
-            if curriculum_name not in _KNOWN_CURRICULA:
-                logger.error("Unknown curriculum: %s. Available: %s", curriculum_name, list(_KNOWN_CURRICULA))
-                raise ValueError(f"Unknown curriculum: {curriculum_name}. Available: {list(_KNOWN_CURRICULA)}")
-
-            else:
-                module = importlib.import_module(f"{__package__}.{curriculum_name}")
-                runner: t.Callable[[CurriculumCliArgs], CurriculumSuggestion] = getattr(module, "run_curriculum")
-
-            suggestion = runner(self)
-            suggestion.dsl_version = aind_behavior_curriculum.__version__
+            suggestion = self.suggest()
 
             if not self.mute_suggestion:
                 print(suggestion.model_dump_json())
@@ -88,10 +77,280 @@ class CurriculumCliArgs(BaseSettings):
                 with open(Path(self.output_suggestion) / "suggestion.json", "w", encoding="utf-8") as file:
                     file.write(suggestion.model_dump_json(indent=2))
 
+            if self.trainer_state_history is not None:
+                self.record(suggestion, self.trainer_state_history)
+
         except Exception as e:
             logger.error("Error occurred while running curriculum: %s", e)
             raise e
 
+    def suggest(self) -> "CurriculumSuggestion":
+        """Evaluates the trainer state against the session with the curriculum it is enrolled in."""
+        curriculum_name = resolve_curriculum_name(self.input_trainer_state, self.curriculum)
+        module = importlib.import_module(f"{__package__}.{curriculum_name}")
+        runner: t.Callable[[CurriculumCliArgs], CurriculumSuggestion] = getattr(module, "run_curriculum")
+
+        import aind_behavior_curriculum
+
+        suggestion = runner(self)
+        suggestion.dsl_version = aind_behavior_curriculum.__version__
+        return suggestion
+
+    def record(self, suggestion: "CurriculumSuggestion", trainer_state_history: os.PathLike) -> None:
+        """Appends a suggestion to a trainer state history store, with the session it was evaluated on."""
+        from aind_behavior_services.session import Session
+        from aind_behavior_vr_foraging.trainer_history import TrainerStateHistory, TrainerStateRecord
+
+        from .utils import model_from_json_file
+
+        session = model_from_json_file(_session_input_path(self.data_directory), Session)
+        with TrainerStateHistory(trainer_state_history) as history:
+            history.append(
+                TrainerStateRecord.from_suggestion(
+                    session, suggestion.trainer_state, suggestion.metrics, self.data_directory
+                )
+            )
+
+
+def _session_input_path(data_directory: os.PathLike) -> Path:
+    return Path(data_directory) / "Behavior" / "Logs" / "session_input.json"
+
+
+def resolve_curriculum_name(input_trainer_state: os.PathLike, curriculum: t.Optional[str] = None) -> str:
+    """Returns the name of the known curriculum a trainer state is enrolled in.
+
+    Args:
+        input_trainer_state: Path to a deserialized trainer state.
+        curriculum: If provided, the name is taken from it instead of the trainer state.
+    """
+    if curriculum:
+        curriculum_name = curriculum
+    else:
+        import aind_behavior_curriculum
+
+        from .utils import model_from_json_file
+
+        annonymous_trainer_state = model_from_json_file(
+            input_trainer_state,
+            aind_behavior_curriculum.TrainerState[aind_behavior_curriculum.Curriculum[t.Any]],
+        )
+        if (enrolled := annonymous_trainer_state.curriculum) is None:
+            logger.error("Trainer state does not have a curriculum.")
+            raise ValueError("Trainer state does not have a curriculum.")
+        curriculum_name = enrolled.pkg_location
+
+    curriculum_name = curriculum_name.replace(str(__package__) + ".", "")
+    if curriculum_name not in _KNOWN_CURRICULA:
+        logger.error("Unknown curriculum: %s. Available: %s", curriculum_name, list(_KNOWN_CURRICULA))
+        raise ValueError(f"Unknown curriculum: {curriculum_name}. Available: {list(_KNOWN_CURRICULA)}")
+    return curriculum_name
+
+
+class BatchEntry(BaseModel):
+    subject: t.Optional[str] = Field(
+        default=None, description="Name of the subject. Defaults to the subject of the session of `data_directory`."
+    )
+    input_trainer_state: os.PathLike = Field(description="Path to a deserialized trainer state.")
+    data_directory: os.PathLike = Field(description="Path to the session data directory.")
+    curriculum: t.Optional[str] = Field(
+        default=None, description="Forces the use of a specific curriculum, bypassing any automatic detection."
+    )
+
+    def resolve_name(self) -> str:
+        """Returns the name of the subject, which names the directory its suggestion is saved to.
+
+        If no subject is given, the session of `data_directory` is read.
+
+        Raises:
+            ValueError: If the name is not a valid directory name.
+        """
+        if self.subject is not None:
+            name = self.subject
+        else:
+            from aind_behavior_services.session import Session
+
+            from .utils import model_from_json_file
+
+            try:
+                name = model_from_json_file(_session_input_path(self.data_directory), Session).subject
+            except OSError as e:
+                raise ValueError(f"No subject given, and the session {self.data_directory} cannot be read.") from e
+        if name in ("", ".", "..") or any(separator in name for separator in ("/", "\\")):
+            raise ValueError(f"Subject {name!r} of session {self.data_directory} is not a valid directory name.")
+        return name
+
+
+class BatchResult(BaseModel):
+    subject: str = Field(description="Name of the subject.")
+    succeeded: bool = Field(description="Whether the curriculum was evaluated.")
+    curriculum: t.Optional[str] = Field(default=None, description="Name of the evaluated curriculum.")
+    stage: t.Optional[str] = Field(default=None, description="Name of the suggested stage.")
+    is_on_curriculum: t.Optional[bool] = Field(default=None, description="Whether the suggestion is on curriculum.")
+    error: t.Optional[str] = Field(default=None, description="The error raised while evaluating the curriculum.")
+
+
+BATCH_SUMMARY_FILE = "summary.csv"
+
+
+class CurriculumBatchCliArgs(BaseSettings):
+    manifest: os.PathLike = Field(
+        description="Path to a json file with a list of entries, each with an `input_trainer_state` and a "
+        "`data_directory`, and optionally a `subject` name and a forced `curriculum`."
+    )
+    output: os.PathLike = Field(
+        description="Directory to save the suggestion of each subject (as <subject>/suggestion.json) "
+        f"and a summary table ({BATCH_SUMMARY_FILE}) to."
+    )
+    max_workers: t.Optional[int] = Field(
+        default=None, ge=1, description="Maximum number of worker processes. Defaults to the number of processors."
+    )
+
+    def cli_cmd(self) -> None:
+        results = self.run_batch()
+        for result in results:
+            if result.succeeded:
+                logger.info("%s: %s (%s)", result.subject, result.stage, result.curriculum)
+            else:
+                logger.error("%s: %s", result.subject, result.error)
+        if not all(result.succeeded for result in results):
+            sys.exit(1)
+
+    def run_batch(self) -> t.List[BatchResult]:
+        """Evaluates all entries of the manifest and saves their suggestions and the summary table.
+
+        Entries are evaluated concurrently in a process pool. An entry that fails is
+        reported in the summary table without affecting the others. Entries whose subject
+        cannot be named, e.g. since it is not given and their session cannot be read, fail
+        without being evaluated, and are named by their index in the manifest.
+
+        Returns:
+            The result of each entry, in the order of the manifest.
+
+        Raises:
+            ValueError: If subjects are not unique within the manifest.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .utils import model_from_json_file
+
+        entries = model_from_json_file(self.manifest, RootModel[t.List[BatchEntry]]).root
+        names: t.List[t.Optional[str]] = []
+        errors: t.Dict[int, str] = {}
+        for i, entry in enumerate(entries):
+            try:
+                names.append(entry.resolve_name())
+            except ValueError as e:
+                names.append(None)
+                errors[i] = repr(e)
+        resolved = [name for name in names if name is not None]
+        if duplicated := sorted({name for name in resolved if resolved.count(name) > 1}):
+            raise ValueError(f"Subjects must be unique within a manifest. Duplicated: {duplicated}")
+
+        output = Path(self.output)
+        output.mkdir(parents=True, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                i: executor.submit(_run_batch_entry, entry, name, output)
+                for i, (entry, name) in enumerate(zip(entries, names))
+                if name is not None
+            }
+            results = []
+            for i, name in enumerate(names):
+                if name is None:
+                    results.append(BatchResult(subject=f"entry_{i}", succeeded=False, error=errors[i]))
+                    continue
+                try:
+                    results.append(futures[i].result())
+                except Exception as e:  # e.g. a worker process that died
+                    results.append(BatchResult(subject=name, succeeded=False, error=repr(e)))
+
+        with open(output / BATCH_SUMMARY_FILE, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(BatchResult.model_fields))
+            writer.writeheader()
+            writer.writerows(result.model_dump() for result in results)
+        return results
+
+
+def _run_batch_entry(entry: BatchEntry, name: str, output: Path) -> BatchResult:
+    try:
+        args = CurriculumCliArgs(
+            data_directory=entry.data_directory,
+            input_trainer_state=entry.input_trainer_state,
+            curriculum=entry.curriculum,
+            mute_suggestion=True,
+        )
+        suggestion = args.suggest()
+        (output / name).mkdir(parents=True, exist_ok=True)
+        with open(output / name / "suggestion.json", "w", encoding="utf-8") as file:
+            file.write(suggestion.model_dump_json(indent=2))
+    except Exception as e:
+        return BatchResult(subject=name, succeeded=False, error=repr(e))
+
+    trainer_state = suggestion.trainer_state
+    return BatchResult(
+        subject=name,
+        succeeded=True,
+        curriculum=trainer_state.curriculum.name if trainer_state.curriculum is not None else None,
+        stage=trainer_state.stage.name if trainer_state.stage is not None else None,
+        is_on_curriculum=trainer_state.is_on_curriculum,
+    )
+
+
+class CurriculumReplayCliArgs(BaseSettings):
+    manifest: os.PathLike = Field(
+        description="Path to a json file with a list of subject histories, each with a `subject` name and the "
+        "`sessions` of the subject in order, each with a `data_directory` and the `input_trainer_state` it was run with."
+    )
+    output: os.PathLike = Field(description="Path to save a csv table comparing the actual and replayed stages to.")
+    curriculum: t.Optional[str] = Field(
+        default=None, description="Forces the use of a specific curriculum, bypassing any automatic detection."
+    )
+    max_workers: t.Optional[int] = Field(
+        default=None, ge=1, description="Maximum number of worker processes. Defaults to the number of processors."
+    )
+
+    def cli_cmd(self) -> None:
+        from .replay import SubjectHistory, replay_cohort, replay_table
+        from .utils import model_from_json_file
+
+        histories = model_from_json_file(self.manifest, RootModel[t.List[SubjectHistory]]).root
+        results = replay_cohort(histories, curriculum=self.curriculum, max_workers=self.max_workers)
+        replay_table(results).to_csv(Path(self.output), index=False)
+        for result in results:
+            if result.error is not None:
+                logger.error("%s: %s", result.subject, result.error)
+            elif (session := result.diverged_at) is not None:
+                logger.info(
+                    "%s: diverges at session %d (%s)", result.subject, session, result.steps[session].data_directory
+                )
+            else:
+                logger.info("%s: unchanged, suggests %s", result.subject, result.final_stage)
+        if any(result.error is not None for result in results):
+            sys.exit(1)
+
+
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8750
+
+
+class CurriculumServeCliArgs(BaseSettings):
+    host: str = Field(default=DEFAULT_SERVER_HOST, description="Host to listen on.")
+    port: int = Field(default=DEFAULT_SERVER_PORT, description="Port to listen on.")
+    curricula: t.Optional[t.List[str]] = Field(
+        default=None, description="Curricula to load. Defaults to all known curricula."
+    )
+
+    def cli_cmd(self) -> None:
+        from .server import CurriculumServer
+
+        curricula = self.curricula if self.curricula is not None else _KNOWN_CURRICULA
+        with CurriculumServer((self.host, self.port), curricula=curricula) as server:
+            logger.info("Serving curricula %s on %s:%d", server.curricula, self.host, self.port)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logger.info("Curriculum server stopped.")
+
 
 class CurriculumInitCliArgs(BaseSettings):
     curriculum: str = Field(description="The curriculum to enroll the model in.")
@@ -110,7 +369,7 @@ class CurriculumInitCliArgs(BaseSettings):
             raise ValueError(f"Unknown curriculum: {self.curriculum}. Available: {list(_KNOWN_CURRICULA)}")
 
         module = importlib.import_module(f"{__package__}.{self.curriculum}")
-        trainer: aind_behavior_curriculum.Trainer = getattr(module, "TRAINER")
+        trainer: "aind_behavior_curriculum.Trainer" = getattr(module, "TRAINER")
         if self.stage is None:
             init_state = trainer.create_enrollment()
         else:
@@ -132,7 +391,7 @@ class CurriculumInitCliArgs(BaseSettings):
 
         print(init_state.model_dump_json())
 
-    def _print_available_stages(self, curriculum: aind_behavior_curriculum.Curriculum) -> None:
+    def _print_available_stages(self, curriculum: "aind_behavior_curriculum.Curriculum") -> None:
         print("Available stages:")
         for stage in curriculum.see_stages():
             print(f" - {stage.name}")
@@ -140,6 +399,9 @@ class CurriculumInitCliArgs(BaseSettings):
 
 class CurriculumAppCliArgs(BaseSettings, cli_prog_name="curriculum", cli_kebab_case=True):
     run: CliSubCommand[CurriculumCliArgs]
+    run_batch: CliSubCommand[CurriculumBatchCliArgs]
+    replay: CliSubCommand[CurriculumReplayCliArgs]
+    serve: CliSubCommand[CurriculumServeCliArgs]
     init: CliSubCommand[CurriculumInitCliArgs]
     version: CliSubCommand[Version]
     dsl_version: CliSubCommand[DslVersion]
@@ -149,16 +411,31 @@ class CurriculumAppCliArgs(BaseSettings, cli_prog_name="curriculum", cli_kebab_c
         CliApp.run_subcommand(self)
 
 
-class CurriculumSuggestion(BaseModel, t.Generic[TTrainerState, TMetrics]):
-    trainer_state: SerializeAsAny[TTrainerState] = Field(description="The TrainerState suggestion.")
-    metrics: SerializeAsAny[TMetrics] = Field(description="The calculated metrics.")
-    version: str = Field(default=__version__, description="The version of the curriculum.")
-    dsl_version: str = Field(
-        default=aind_behavior_curriculum.__version__, description="The version of the curriculum library."
-    )
+_KNOWN_CURRICULA = (
+    "depletion",
+    "depletion_stops_offset",
+    "depletion_stops_rate",
+    "deterministic_reversals",
+    "deterministic_reversals_reward_capped",
+    "learning_sets",
+    "replenishment_depletion_offset",
+    "single_site",
+    "template",
+)
+"""Curricula of the package, i.e. its public subpackages. Curriculum modules are only imported when used."""
+
+
+def __getattr__(name: str) -> t.Any:
+    # Kept importable from this module without importing the curriculum library up front.
+    if name == "CurriculumSuggestion":
+        from .suggestion import CurriculumSuggestion
 
+        return CurriculumSuggestion
+    if name == "model_from_json_file":
+        from .utils import model_from_json_file
 
-_KNOWN_CURRICULA = [p.stem for p in Path(__file__).parent.iterdir() if p.is_dir() and not p.name.startswith("_")]
+        return model_from_json_file
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _setup_logging() -> None:
@@ -11,7 +11,8 @@ from aind_behavior_curriculum import (
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
 from .. import __semver__
-from ..cli import CurriculumCliArgs, CurriculumSuggestion
+from ..cli import CurriculumCliArgs
+from ..suggestion import CurriculumSuggestion
 from ..utils import metrics_from_dataset_path, trainer_state_from_file
 from .metrics import DepletionCurriculumMetrics
 from .stages import (
@@ -1,10 +1,13 @@
 import os
+from typing import TYPE_CHECKING
 
+import numpy as np
 from aind_behavior_curriculum import Metrics
-from aind_behavior_vr_foraging.data_contract import dataset as vr_foraging_dataset
-from contraqctor.contract.json import SoftwareEvents
 from pydantic import Field, NonNegativeFloat, NonNegativeInt
 
+if TYPE_CHECKING:
+    from ..session_events import SessionEvents
+
 
 class DepletionCurriculumMetrics(Metrics):
     total_water_consumed: NonNegativeFloat = Field(description="Total water (in milliliters) consumed in the session.")
@@ -35,69 +38,49 @@ class DepletionCurriculumMetrics(Metrics):
 
 
 def metrics_from_dataset(data_directory: os.PathLike) -> DepletionCurriculumMetrics:
-    dataset = vr_foraging_dataset(data_directory)
+    # Imported here so enrolling in the curriculum does not import the data loading dependencies
+    from ..session_events import load_session_events
 
-    software_events = dataset["Behavior"]["SoftwareEvents"]
-    software_events.load_all()
+    return metrics_from_session_events(load_session_events(data_directory))
 
-    # Get last reward delay offset duration
-    if _has_error_or_empty(software_events["UpdaterRewardDelayOffset"]):
-        last_reward_delay_offset = None
-    else:
-        last_reward_delay_offset = software_events["UpdaterRewardDelayOffset"].data["data"].iloc[-1]
-
-    # Calculate water consumed
-    if _has_error_or_empty(software_events["GiveReward"]):
-        total_water_consumed = 0
-    else:
-        total_water_consumed = software_events["GiveReward"].data["data"].sum()
 
+def metrics_from_session_events(events: "SessionEvents") -> DepletionCurriculumMetrics:
     # Compute patch related metrics
-    choice_events = software_events["ChoiceFeedback"]
-    patches = software_events["ActivePatch"]
-
-    if _has_error_or_empty(choice_events) or _has_error_or_empty(patches):
+    visits = events.patch_visits
+    if events.choice_feedback is None or visits is None:
         n_patches_visited_per_patch = {0: 0}
         n_choices = 0
     else:
-        n_choices = len(choice_events.data)
-        unique_patches = patches.data["data"].apply(lambda x: x["state_index"]).unique()
-        n_patches_visited_per_patch = {int(patch): 0 for patch in unique_patches}
-        for i in range(len(patches.data) - 1):
-            choices_between_patches = choice_events.data[
-                (choice_events.data.index > patches.data.index[i])
-                & (choice_events.data.index < patches.data.index[i + 1])
-            ]
-            if len(choices_between_patches) > 0:
-                n_patches_visited_per_patch[int(patches.data["data"].iloc[i]["state_index"])] += 1
+        n_choices = len(events.choice_feedback)
+        # Choices made at the exact time a patch became active belong to neither visit
+        start_times = visits["start_time"].to_numpy()
+        choice_times = events.choice_feedback.index.to_numpy(dtype=float)
+        choice_times = choice_times[~np.isin(choice_times, start_times)]
+        visit = np.searchsorted(start_times, choice_times, side="right") - 1
+        has_choices = np.bincount(visit[visit >= 0], minlength=len(visits)) > 0
+        # The last visit is still ongoing when the session ends, so it is not counted
+        has_choices[-1] = False
+        visited = visits.loc[has_choices, "state_index"].value_counts()
+        n_patches_visited_per_patch = {
+            int(patch): int(visited.get(patch, 0)) for patch in visits["state_index"].unique()
+        }
 
     # Get reward site related metrics
-    if _has_error_or_empty(software_events["ActiveSite"]):
-        last_reward_site_length = None
-        n_reward_sites_traveled = 0
-    else:
-        sites_visited = software_events["ActiveSite"].data
-        reward_sites = sites_visited[sites_visited["data"].apply(lambda x: x["label"] == "RewardSite")]
-        if len(reward_sites) == 0:
-            last_reward_site_length = None
-            n_reward_sites_traveled = 0
-        else:
+    last_reward_site_length = None
+    n_reward_sites_traveled = 0
+    if events.active_site is not None:
+        reward_sites = events.active_site[events.active_site["data"].apply(lambda x: x["label"] == "RewardSite")]
+        if len(reward_sites) > 0:
             last_reward_site_length = reward_sites["data"].iloc[-1]["length"]
             n_reward_sites_traveled = len(reward_sites)
 
-    last_stop_duration_offset_updater = software_events["UpdaterStopDurationOffset"].data["data"].iloc[-1]
-
     return DepletionCurriculumMetrics(
-        total_water_consumed=total_water_consumed / 1000,
-        last_delay_duration=last_reward_delay_offset,
-        last_stop_duration_offset_updater=last_stop_duration_offset_updater,
+        total_water_consumed=events.total_water_consumed,
+        last_delay_duration=events.last_value(events.updater_reward_delay_offset),
+        last_stop_duration_offset_updater=events.last_value(events.updater_stop_duration_offset),
         last_reward_site_length=last_reward_site_length,
         n_patches_visited=sum(n_patches_visited_per_patch.values()),
         n_patches_visited_per_patch=n_patches_visited_per_patch,
         n_choices=n_choices,
         n_reward_sites_traveled=n_reward_sites_traveled,
     )
-
-
-def _has_error_or_empty(datastream: SoftwareEvents) -> bool:
-    return datastream.has_error or datastream.data.empty
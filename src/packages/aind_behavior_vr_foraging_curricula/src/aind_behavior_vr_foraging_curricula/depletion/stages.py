@@ -2,6 +2,7 @@ from aind_behavior_curriculum import MetricsProvider, Policy, Stage
 from aind_behavior_vr_foraging import task_logic
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic, AindVrForagingTaskParameters
 
+from ..utils import stage_factory
 from . import helpers
 from .metrics import metrics_from_dataset
 from .policies import p_learn_to_run, p_learn_to_stop, p_stochastic_reward
@@ -11,6 +12,7 @@ from .policies import p_learn_to_run, p_learn_to_stop, p_stochastic_reward
 # ============================================================
 
 
+@stage_factory
 def make_s_stage_one_odor_no_depletion() -> Stage:
     _updaters = {
         task_logic.UpdaterTarget.STOP_DURATION_OFFSET: task_logic.NumericalUpdater(
@@ -147,6 +149,7 @@ def _make_s_stage_one_odor_w_depletion_parameters() -> AindVrForagingTaskParamet
     )
 
 
+@stage_factory
 def make_s_stage_one_odor_w_depletion_day_0() -> Stage:
     return Stage(
         name="one_odor_w_depletion_day_0",
@@ -158,6 +161,7 @@ def make_s_stage_one_odor_w_depletion_day_0() -> Stage:
     )
 
 
+@stage_factory
 def make_s_stage_one_odor_w_depletion_day_1() -> Stage:
     return Stage(
         name="one_odor_w_depletion_day_1",
@@ -169,6 +173,7 @@ def make_s_stage_one_odor_w_depletion_day_1() -> Stage:
     )
 
 
+@stage_factory
 def make_s_stage_all_odors_rewarded() -> Stage:
     return Stage(
         name="all_odors_rewarded",
@@ -201,6 +206,7 @@ def make_s_stage_all_odors_rewarded() -> Stage:
     )
 
 
+@stage_factory
 def make_s_stage_graduation() -> Stage:
     return Stage(
         name="graduation",
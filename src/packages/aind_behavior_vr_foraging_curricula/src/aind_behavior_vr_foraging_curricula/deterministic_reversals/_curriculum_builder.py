@@ -5,7 +5,7 @@ from aind_behavior_curriculum import Stage, StageTransition, Trainer, TrainerSta
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
 from .. import __semver__
-from ..cli import CurriculumCliArgs, CurriculumSuggestion
+from ..cli import CurriculumCliArgs
 from ..depletion.curriculum import (
     metrics_from_dataset_path,
     st_s_stage_all_odors_rewarded_s_stage_graduation,
@@ -21,6 +21,7 @@ from ..depletion.stages import (
     make_s_stage_one_odor_w_depletion_day_0,
     make_s_stage_one_odor_w_depletion_day_1,
 )
+from ..suggestion import CurriculumSuggestion
 
 
 def build_deterministic_reversal_curriculum(
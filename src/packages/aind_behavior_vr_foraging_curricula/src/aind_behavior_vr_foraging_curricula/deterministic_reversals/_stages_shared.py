@@ -7,6 +7,7 @@ from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic, AindVr
 
 from ..depletion import helpers
 from ..depletion.metrics import metrics_from_dataset
+from ..utils import stage_factory
 
 
 def deterministic_curves(
@@ -112,6 +113,7 @@ def make_patch(
     )
 
 
+@stage_factory
 def make_s_stage_all_odors_rewarded(
     delayed_reward_available: float = 100,
     cap_delayed_rewards: bool = False,
@@ -161,6 +163,7 @@ def make_s_stage_all_odors_rewarded(
     )
 
 
+@stage_factory
 def make_s_stage_graduation(
     delayed_reward_available: float = 100,
     cap_delayed_rewards: bool = False,
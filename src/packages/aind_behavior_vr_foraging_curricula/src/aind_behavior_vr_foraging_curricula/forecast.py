@@ -0,0 +1,195 @@
+import dataclasses
+import typing as t
+from collections import defaultdict
+
+import numpy as np
+from aind_behavior_curriculum import Curriculum, Metrics, Stage, Trainer
+
+from .suggestion import CurriculumSuggestion
+
+StageObservation = t.Tuple[str, Metrics]
+"""The name of the stage a session was run with, and the metrics computed from that session."""
+
+
+@dataclasses.dataclass(frozen=True)
+class GraduationForecast:
+    """Simulated trajectories of subjects starting from the same stage."""
+
+    start_stage: str
+    sessions_to_graduation: np.ndarray
+    """Number of sessions each trajectory took to graduate, or NaN if it did not graduate within the horizon."""
+    stage_occupancy: t.Dict[str, float]
+    """Average number of sessions a trajectory spent in each stage."""
+
+    @property
+    def p_graduated(self) -> float:
+        """Fraction of trajectories that graduated within the horizon."""
+        return float(np.mean(~np.isnan(self.sessions_to_graduation)))
+
+    def quantiles(self, q: t.Sequence[float] = (0.1, 0.5, 0.9)) -> t.List[float]:
+        """Quantiles of the number of sessions to graduation of the trajectories that graduated."""
+        graduated = self.sessions_to_graduation[~np.isnan(self.sessions_to_graduation)]
+        if graduated.size == 0:
+            return [float("nan")] * len(q)
+        return [float(value) for value in np.quantile(graduated, q)]
+
+
+def observations_from_suggestions(suggestions: t.Sequence[CurriculumSuggestion]) -> t.List[StageObservation]:
+    """Pairs the metrics of each suggestion of a subject with the stage its session was run with.
+
+    The metrics of a suggestion are computed from a session run with the stage suggested
+    by the previous suggestion, so the first suggestion of the sequence is not used.
+
+    Args:
+        suggestions: The suggestions of a single subject, in chronological order.
+    """
+    observations = []
+    for previous, suggestion in zip(suggestions, suggestions[1:]):
+        stage = previous.trainer_state.stage
+        if stage is not None and previous.trainer_state.is_on_curriculum:
+            observations.append((stage.name, suggestion.metrics))
+    return observations
+
+
+class GraduationForecaster:
+    """Forecasts the number of sessions subjects take to graduate from a curriculum.
+
+    The metrics of each stage are modeled by their empirical distribution over
+    historical sessions. Each stage transition is evaluated once per observed metrics
+    sample, so trajectories are then simulated by resampling these outcomes, for all
+    trajectories at once. Policies, and trends of the metrics within a stage, are not
+    modeled.
+
+    Examples:
+        ```python
+        forecaster = GraduationForecaster(TRAINER, observations_from_suggestions(suggestions))
+        forecast = forecaster.forecast("one_odor_no_depletion")
+        print(forecast.p_graduated, forecast.quantiles())
+        ```
+    """
+
+    def __init__(
+        self,
+        trainer: Trainer,
+        observations: t.Iterable[StageObservation],
+        graduation_stages: t.Optional[t.Iterable[str]] = None,
+    ) -> None:
+        """Initializes the forecaster.
+
+        Args:
+            trainer: Trainer of the curriculum.
+            observations: Metrics observed in each stage, e.g. from `observations_from_suggestions`.
+            graduation_stages: Names of the stages that count as graduated. Defaults to the
+                stages without outgoing transitions.
+        """
+        curriculum = trainer.curriculum
+        self._stages: t.List[Stage] = curriculum.see_stages()
+        self._index = {stage.name: i for i, stage in enumerate(self._stages)}
+        if graduation_stages is None:
+            graduation_stages = [stage.name for stage in self._stages if not curriculum.see_stage_transitions(stage)]
+        self._graduation = np.array([self._stage_index(name) for name in graduation_stages], dtype=np.intp)
+
+        samples: t.Dict[str, t.List[Metrics]] = defaultdict(list)
+        for stage_name, metrics in observations:
+            samples[stage_name].append(metrics)
+        unknown = set(samples) - set(self._index)
+        if unknown:
+            raise ValueError(f"Observations of stages not in the curriculum: {sorted(unknown)}")
+
+        self._n_samples = {stage.name: len(samples[stage.name]) for stage in self._stages}
+        self._outcomes = [self._evaluate_transitions(curriculum, stage, samples[stage.name]) for stage in self._stages]
+
+    @property
+    def n_samples(self) -> t.Dict[str, int]:
+        """Number of metrics samples of each stage. Trajectories never leave stages without samples."""
+        return dict(self._n_samples)
+
+    def forecast(
+        self, start_stage: str, n_trajectories: int = 10_000, max_sessions: int = 200, seed: t.Optional[int] = None
+    ) -> GraduationForecast:
+        """Simulates trajectories of a subject starting a session in `start_stage`.
+
+        Args:
+            start_stage: Name of the stage of the subject.
+            n_trajectories: Number of trajectories to simulate.
+            max_sessions: Number of sessions after which trajectories are stopped.
+            seed: Seed of the random number generator.
+        """
+        rng = np.random.default_rng(seed)
+        n_stages = len(self._stages)
+        state = np.full(n_trajectories, self._stage_index(start_stage), dtype=np.intp)
+        sessions = np.full(n_trajectories, np.nan)
+        occupancy = np.zeros(n_stages)
+        active = ~np.isin(state, self._graduation)
+        sessions[~active] = 0
+
+        for session in range(1, max_sessions + 1):
+            running = np.flatnonzero(active)
+            if running.size == 0:
+                break
+            current = state[running]
+            occupancy += np.bincount(current, minlength=n_stages)
+            for stage in np.unique(current):
+                outcomes = self._outcomes[stage]
+                if outcomes.size == 0:
+                    continue
+                members = running[current == stage]
+                state[members] = outcomes[rng.integers(outcomes.size, size=members.size)]
+            graduated = running[np.isin(state[running], self._graduation)]
+            sessions[graduated] = session
+            active[graduated] = False
+
+        return GraduationForecast(
+            start_stage=start_stage,
+            sessions_to_graduation=sessions,
+            stage_occupancy={stage.name: float(occupancy[i] / n_trajectories) for i, stage in enumerate(self._stages)},
+        )
+
+    def forecast_cohort(
+        self,
+        start_stages: t.Mapping[str, str],
+        n_trajectories: int = 10_000,
+        max_sessions: int = 200,
+        seed: t.Optional[int] = None,
+    ) -> t.Dict[str, GraduationForecast]:
+        """Forecasts each subject of a cohort. Subjects in the same stage share the same forecast.
+
+        Args:
+            start_stages: Name of the stage of each subject, by subject.
+            n_trajectories: Number of trajectories to simulate per stage.
+            max_sessions: Number of sessions after which trajectories are stopped.
+            seed: Seed of the random number generator.
+        """
+        by_stage = {
+            stage: self.forecast(stage, n_trajectories=n_trajectories, max_sessions=max_sessions, seed=seed)
+            for stage in set(start_stages.values())
+        }
+        return {subject: by_stage[stage] for subject, stage in start_stages.items()}
+
+    def _stage_index(self, name: str) -> int:
+        try:
+            return self._index[name]
+        except KeyError:
+            raise ValueError(f"Unknown stage: {name}. Available: {list(self._index)}") from None
+
+    def _evaluate_transitions(self, curriculum: Curriculum, stage: Stage, samples: t.List[Metrics]) -> np.ndarray:
+        """Returns the index of the stage each metrics sample transitions to, which is the same stage if none."""
+        transitions = curriculum.see_stage_transitions(stage)
+        metrics_type = _metrics_type(stage)
+        outcomes = np.full(len(samples), self._index[stage.name], dtype=np.intp)
+        for i, metrics in enumerate(samples):
+            if metrics_type is not None and not isinstance(metrics, metrics_type):
+                # e.g. deserialized as generic metrics, whose dictionary keys are all strings
+                metrics = metrics_type.model_validate_json(metrics.model_dump_json())
+            for rule, destination in transitions:
+                if rule.invoke(metrics):
+                    outcomes[i] = self._index[destination.name]
+                    break
+        return outcomes
+
+
+def _metrics_type(stage: Stage) -> t.Optional[t.Type[Metrics]]:
+    if stage.metrics_provider is None:
+        return None
+    metrics_type = t.get_type_hints(stage.metrics_provider.callable).get("return")
+    return metrics_type if isinstance(metrics_type, type) and issubclass(metrics_type, Metrics) else None
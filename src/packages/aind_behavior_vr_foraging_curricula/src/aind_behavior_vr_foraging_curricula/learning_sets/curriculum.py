@@ -6,7 +6,8 @@ from aind_behavior_curriculum import StageTransition, Trainer, TrainerState, cre
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
 from .. import __semver__
-from ..cli import CurriculumCliArgs, CurriculumSuggestion
+from ..cli import CurriculumCliArgs
+from ..suggestion import CurriculumSuggestion
 from ..utils import metrics_from_dataset_path, trainer_state_from_file
 from .helpers import N_SITES_EACH, VELOCITY_THRESHOLD_FLOOR
 from .metrics import LearningSetsMetrics
@@ -1,14 +1,12 @@
 import logging
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import pandas as pd
 from aind_behavior_curriculum import Metrics
-from aind_behavior_vr_foraging.data_contract import dataset as vr_foraging_dataset
-from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
-from contraqctor.contract.json import SoftwareEvents
 from pydantic import Field, NonNegativeFloat, NonNegativeInt
 
+if TYPE_CHECKING:
+    from ..session_events import SessionEvents
 from .helpers import N_PAIRS, ODOR_COUNT
 
 logger = logging.getLogger(__name__)
@@ -32,14 +30,6 @@ class LearningSetsMetrics(Metrics):
     )
 
 
-def _try_get_datastream_as_dataframe(datastream: SoftwareEvents) -> pd.DataFrame | None:
-    try:
-        datastream.load()
-        return datastream.data
-    except FileNotFoundError:
-        return None
-
-
 def _scalar(value) -> Optional[float]:
     """Best-effort extraction of a scalar from a (possibly ``Scalar``-distribution) field."""
     try:
@@ -49,11 +39,15 @@ def _scalar(value) -> Optional[float]:
 
 
 def metrics_from_dataset(data_directory: os.PathLike) -> LearningSetsMetrics:
-    dataset = vr_foraging_dataset(data_directory)
+    from ..session_events import load_session_events
+
+    return metrics_from_session_events(load_session_events(data_directory))
 
-    task_logic = dataset["Behavior"]["InputSchemas"]["TaskLogic"].load().data
-    if isinstance(task_logic, dict):
-        task_logic = AindVrForagingTaskLogic.model_validate(task_logic)
+
+def metrics_from_session_events(events: "SessionEvents") -> LearningSetsMetrics:
+    task_logic = events.task_logic
+    if task_logic is None:
+        raise ValueError("The session does not have a task logic.")
 
     patches = task_logic.task_parameters.environment.blocks[0].environment.patches
     patch_indices = task_logic.task_parameters.environment.blocks[0].environment.patch_indices
@@ -62,27 +56,12 @@ def metrics_from_dataset(data_directory: os.PathLike) -> LearningSetsMetrics:
     last_n_neg_sites_per_pair = n_neg_total // N_PAIRS if patch_indices else None
     last_reward_amount = _scalar(patches[0].reward_specification.amount) if patches else None
 
-    total_water_consumed = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["GiveReward"])
-    choices = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["ChoiceFeedback"])
-    visited_patches = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["ActivePatch"])
-    stop_duration_offset = _try_get_datastream_as_dataframe(
-        dataset["Behavior"]["SoftwareEvents"]["UpdaterStopDurationOffset"]
-    )
-    stop_velocity_threshold = _try_get_datastream_as_dataframe(
-        dataset["Behavior"]["SoftwareEvents"]["UpdaterStopVelocityThreshold"]
-    )
-
     return LearningSetsMetrics(
-        total_water_consumed=(total_water_consumed["data"].sum() if total_water_consumed is not None else 0.0)
-        * 1e-3,  # uL -> mL
-        n_patches_visited=len(choices) if choices is not None else 0,
-        n_patches_seen=len(visited_patches) if visited_patches is not None else 0,
-        last_stop_duration_offset_updater=stop_duration_offset["data"].iloc[-1]
-        if stop_duration_offset is not None
-        else None,
-        last_stop_velocity_threshold_updater=stop_velocity_threshold["data"].iloc[-1]
-        if stop_velocity_threshold is not None
-        else None,
+        total_water_consumed=events.total_water_consumed,
+        n_patches_visited=len(events.choice_feedback) if events.choice_feedback is not None else 0,
+        n_patches_seen=len(events.active_patch) if events.active_patch is not None else 0,
+        last_stop_duration_offset_updater=events.last_value(events.updater_stop_duration_offset),
+        last_stop_velocity_threshold_updater=events.last_value(events.updater_stop_velocity_threshold),
         last_n_neg_sites_per_pair=last_n_neg_sites_per_pair,
         last_reward_amount=last_reward_amount,
     )
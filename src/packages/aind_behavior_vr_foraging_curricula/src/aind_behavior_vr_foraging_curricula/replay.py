@@ -0,0 +1,176 @@
+import importlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence
+
+import pandas as pd
+from aind_behavior_curriculum import Metrics, Trainer, TrainerState
+from pydantic import BaseModel, Field
+
+from .cli import resolve_curriculum_name
+from .utils import trainer_state_from_file
+
+logger = logging.getLogger(__name__)
+
+REPLAY_METRICS_CACHE_SIZE = 256
+"""Maximum number of (metrics provider, session) pairs whose metrics are kept in memory."""
+
+
+class SessionRecord(BaseModel):
+    data_directory: os.PathLike = Field(description="Path to the session data directory.")
+    input_trainer_state: os.PathLike = Field(description="Path to the trainer state the session was run with.")
+
+
+class SubjectHistory(BaseModel):
+    subject: str = Field(description="Name of the subject.")
+    sessions: List[SessionRecord] = Field(min_length=1, description="The sessions of the subject, in order.")
+
+
+class ReplayStep(BaseModel):
+    data_directory: str = Field(description="Path to the session data directory.")
+    actual_stage: Optional[str] = Field(description="Stage the session was run with.")
+    replayed_stage: Optional[str] = Field(description="Stage the session would have been run with.")
+
+    @property
+    def changed(self) -> bool:
+        return self.actual_stage != self.replayed_stage
+
+
+class ReplayResult(BaseModel):
+    subject: str = Field(description="Name of the subject.")
+    curriculum: Optional[str] = Field(default=None, description="Name of the replayed curriculum.")
+    steps: List[ReplayStep] = Field(default=[], description="The replayed sessions, in order.")
+    final_stage: Optional[str] = Field(
+        default=None, description="Stage suggested after the last session, if the whole history was replayed."
+    )
+    error: Optional[str] = Field(default=None, description="The error that stopped the replay, if any.")
+
+    @property
+    def diverged_at(self) -> Optional[int]:
+        """Index of the first session whose replayed stage differs from the actual one, if any."""
+        return next((i for i, step in enumerate(self.steps) if step.changed), None)
+
+
+def replay_subject(history: SubjectHistory, trainer: Trainer) -> ReplayResult:
+    """Replays the sessions of a subject through a curriculum.
+
+    The replay starts from the trainer state of the first session. The metrics of each
+    session are computed with the metrics provider of the replayed stage and evaluated
+    by the trainer, and the resulting trainer state is used for the next session. The
+    stages the sessions would have been run with are compared to the stages of the
+    trainer states they were actually run with.
+
+    Sessions are replayed from the data they produced, so metrics of sessions that
+    would have been run with a different stage are only an approximation.
+
+    Args:
+        history: The sessions of the subject.
+        trainer: Trainer of the curriculum to replay, e.g. one with a modified stage transition.
+
+    Returns:
+        The stage trajectory of the replay. If a session cannot be replayed, the
+        sessions before it are returned along with the error.
+    """
+    result = ReplayResult(subject=history.subject, curriculum=trainer.curriculum.name)
+    try:
+        trainer_state = trainer_state_from_file(history.sessions[0].input_trainer_state, trainer)
+        for session in history.sessions:
+            actual = trainer_state_from_file(session.input_trainer_state, trainer)
+            result.steps.append(
+                ReplayStep(
+                    data_directory=str(session.data_directory),
+                    actual_stage=_stage_name(actual),
+                    replayed_stage=_stage_name(trainer_state),
+                )
+            )
+            trainer_state = _evaluate(trainer, trainer_state, session.data_directory)
+        result.final_stage = _stage_name(trainer_state)
+    except Exception as e:
+        logger.error("Could not replay %s: %s", history.subject, e)
+        result.error = repr(e)
+    return result
+
+
+def replay_cohort(
+    histories: Sequence[SubjectHistory], curriculum: Optional[str] = None, max_workers: Optional[int] = None
+) -> List[ReplayResult]:
+    """Replays the sessions of many subjects through a curriculum, concurrently.
+
+    Each subject is replayed in a worker process with `replay_subject`, using the
+    trainer of the curriculum as currently implemented. Metrics are cached within each
+    worker, so sessions shared by several histories are only loaded once per worker.
+
+    Args:
+        histories: The sessions of each subject.
+        curriculum: Name of the curriculum to replay. Defaults to the curriculum the
+            first trainer state of each subject is enrolled in.
+        max_workers: Maximum number of worker processes. Defaults to the number of processors.
+
+    Returns:
+        The result of each subject, in the order of `histories`.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_replay_subject, history, curriculum) for history in histories]
+        results = []
+        for history, future in zip(histories, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # e.g. a worker process that died
+                results.append(ReplayResult(subject=history.subject, error=repr(e)))
+    return results
+
+
+def replay_table(results: Sequence[ReplayResult]) -> pd.DataFrame:
+    """Returns a table with one row per replayed session, comparing the actual and replayed stages."""
+    rows = [
+        {
+            "subject": result.subject,
+            "session": i,
+            "data_directory": step.data_directory,
+            "actual_stage": step.actual_stage,
+            "replayed_stage": step.replayed_stage,
+            "changed": step.changed,
+        }
+        for result in results
+        for i, step in enumerate(result.steps)
+    ]
+    return pd.DataFrame(
+        rows, columns=["subject", "session", "data_directory", "actual_stage", "replayed_stage", "changed"]
+    )
+
+
+def _replay_subject(history: SubjectHistory, curriculum: Optional[str]) -> ReplayResult:
+    try:
+        curriculum_name = resolve_curriculum_name(history.sessions[0].input_trainer_state, curriculum)
+        module = importlib.import_module(f"{__package__}.{curriculum_name}")
+    except Exception as e:
+        return ReplayResult(subject=history.subject, error=repr(e))
+    return replay_subject(history, getattr(module, "TRAINER"))
+
+
+def _evaluate(trainer: Trainer, trainer_state: TrainerState, data_directory: os.PathLike) -> TrainerState:
+    stage = trainer_state.stage
+    if stage is None:
+        raise ValueError("Trainer state does not have a stage")
+    if stage.metrics_provider is None:
+        raise ValueError("Stage does not have a metrics provider")
+    metrics = _cached_metrics(stage.metrics_provider.callable, str(Path(data_directory).resolve()))
+    # Trainer.evaluate updates the task of the stage in place, which may be shared with the curriculum
+    trainer_state = trainer.create_trainer_state(
+        stage=stage.model_copy(deep=True),
+        is_on_curriculum=trainer_state.is_on_curriculum,
+        active_policies=trainer_state.active_policies,
+    )
+    return trainer.evaluate(trainer_state, metrics.model_copy(deep=True))
+
+
+@lru_cache(maxsize=REPLAY_METRICS_CACHE_SIZE)
+def _cached_metrics(metrics_provider: Callable[[Any], Metrics], data_directory: str) -> Metrics:
+    return metrics_provider(data_directory)
+
+
+def _stage_name(trainer_state: TrainerState) -> Optional[str]:
+    return trainer_state.stage.name if trainer_state.stage is not None else None
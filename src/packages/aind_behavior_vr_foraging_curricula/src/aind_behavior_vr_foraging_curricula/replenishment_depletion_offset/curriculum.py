@@ -11,7 +11,7 @@ from aind_behavior_curriculum import (
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
 from .. import __semver__
-from ..cli import CurriculumCliArgs, CurriculumSuggestion
+from ..cli import CurriculumCliArgs
 from ..depletion.curriculum import (
     metrics_from_dataset_path,
     st_s_stage_one_odor_no_depletion_s_stage_one_odor_w_depletion_day_0,
@@ -26,6 +26,7 @@ from ..depletion.stages import (
     make_s_stage_one_odor_w_depletion_day_0,
     make_s_stage_one_odor_w_depletion_day_1,
 )
+from ..suggestion import CurriculumSuggestion
 from .stages import make_s_mcm_final_stage
 
 CURRICULUM_NAME = "ReplenishmentDepletionOffset"
@@ -1,8 +1,6 @@
-from typing import cast
-
 import numpy as np
+from aind_behavior_vr_foraging import ctmc
 from aind_behavior_vr_foraging import task_logic as vr_task_logic
-from scipy.linalg import expm
 
 
 def compute_cmc_transition_probability(n_states: int, rep_rate: float, dt: float = 0.1) -> np.ndarray:
@@ -26,24 +24,14 @@ def compute_cmc_transition_probability(n_states: int, rep_rate: float, dt: float
         matrix of replenishment probabilities (#states * #states)
     """
 
-    q = np.zeros((n_states, n_states))
-    np.fill_diagonal(q, -rep_rate)
-    np.fill_diagonal(q[:, 1:], rep_rate)
-    q[-1, -1] = 0
-
-    # compute replenishment probability function dependent on replenishment time (here experiment dt)
-    p_t = expm(q * dt)
-    assert p_t.ndim == 2
-    return p_t
+    return np.array(ctmc.replenishment_transition_matrix(n_states, rep_rate, dt))
 
 
 def make_patch_replenishment_function(
     n_states: int, replenishment_rate: float, p_reward_max: float, p_reward_min: float, rho: float
 ) -> vr_task_logic.CtcmFunction:
     return vr_task_logic.CtcmFunction(
-        transition_matrix=cast(
-            list[list[float]], compute_cmc_transition_probability(n_states, replenishment_rate).tolist()
-        ),
+        transition_matrix=ctmc.replenishment_transition_matrix(n_states, replenishment_rate),
         maximum=p_reward_max,
         minimum=p_reward_min,
         rho=rho,
@@ -0,0 +1,233 @@
+import http.client
+import importlib
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import typing as t
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pydantic import BaseModel, Field
+
+from . import __version__
+from .cli import _KNOWN_CURRICULA, DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, CurriculumCliArgs
+
+logger = logging.getLogger(__name__)
+
+EVALUATE_ENDPOINT = "/evaluate"
+HEALTH_ENDPOINT = "/health"
+HEALTH_TIMEOUT = 1.0
+"""Seconds to wait for a server to answer a health probe before it counts as not running."""
+
+
+class EvaluationRequest(BaseModel):
+    data_directory: str = Field(description="Path to the session data directory.")
+    input_trainer_state: str = Field(description="Path to a deserialized trainer state.")
+    curriculum: t.Optional[str] = Field(
+        default=None, description="Forces the use of a specific curriculum, bypassing any automatic detection."
+    )
+
+
+class CurriculumServerUnavailableError(ConnectionError):
+    """Raised when no curriculum server is listening at the requested address."""
+
+
+class CurriculumServer(ThreadingHTTPServer):
+    """A local server that evaluates curricula without paying the cli startup cost on every session.
+
+    Curricula are imported, and their stages built, once when the server starts. Requests
+    are evaluated one at a time, and the events of a session are reloaded on every request,
+    since a session may be evaluated again after more data is written to it. The server
+    must be restarted to pick up changes to the curricula.
+
+    Examples:
+        ```python
+        with CurriculumServer(("127.0.0.1", 0)) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            suggestion = request_suggestion("trainer_state.json", "session", port=server.server_address[1])
+        ```
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: t.Tuple[str, int] = (DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT),
+        curricula: t.Iterable[str] = _KNOWN_CURRICULA,
+    ) -> None:
+        self.curricula = preload_curricula(curricula)
+        self._lock = threading.Lock()
+        super().__init__(server_address, _CurriculumRequestHandler)
+
+    def evaluate(self, request: EvaluationRequest) -> str:
+        """Evaluates a request, and returns the serialized suggestion."""
+        from .session_events import clear_session_events_cache
+
+        args = CurriculumCliArgs(
+            data_directory=request.data_directory,
+            input_trainer_state=request.input_trainer_state,
+            curriculum=request.curriculum,
+            mute_suggestion=True,
+        )
+        with self._lock:
+            try:
+                return args.suggest().model_dump_json()
+            finally:
+                clear_session_events_cache()
+
+
+def preload_curricula(curricula: t.Iterable[str] = _KNOWN_CURRICULA) -> t.List[str]:
+    """Imports curricula, and the dependencies used to compute their metrics.
+
+    Args:
+        curricula: Names of the curricula to import.
+
+    Returns:
+        The names of the imported curricula.
+    """
+    curricula = list(curricula)
+    if unknown := [curriculum for curriculum in curricula if curriculum not in _KNOWN_CURRICULA]:
+        raise ValueError(f"Unknown curricula: {unknown}. Available: {list(_KNOWN_CURRICULA)}")
+    importlib.import_module(f"{__package__}.session_events")
+    for curriculum in curricula:
+        importlib.import_module(f"{__package__}.{curriculum}")
+        logger.debug("Loaded curriculum %s", curriculum)
+    return curricula
+
+
+class _CurriculumRequestHandler(BaseHTTPRequestHandler):
+    server: CurriculumServer
+
+    def do_GET(self) -> None:
+        if self.path != HEALTH_ENDPOINT:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        self._reply(200, {"version": __version__, "curricula": self.server.curricula})
+
+    def do_POST(self) -> None:
+        if self.path != EVALUATE_ENDPOINT:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request = EvaluationRequest.model_validate_json(body)
+        except Exception as e:
+            self._reply(400, {"error": repr(e)})
+            return
+        try:
+            suggestion = self.server.evaluate(request)
+        except Exception as e:
+            logger.error("Error occurred while running curriculum: %s", e)
+            self._reply(500, {"error": repr(e)})
+            return
+        self._send(200, suggestion.encode("utf-8"))
+
+    def _reply(self, status: int, content: t.Dict[str, t.Any]) -> None:
+        self._send(status, json.dumps(content).encode("utf-8"))
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: t.Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def request_suggestion(
+    input_trainer_state: os.PathLike,
+    data_directory: os.PathLike,
+    curriculum: t.Optional[str] = None,
+    *,
+    host: str = DEFAULT_SERVER_HOST,
+    port: int = DEFAULT_SERVER_PORT,
+    timeout: float = 300,
+    fallback_to_cli: bool = True,
+    expected_version: t.Optional[str] = __version__,
+) -> str:
+    """Evaluates a curriculum with a running curriculum server, or with the cli if there is none.
+
+    Args:
+        input_trainer_state: Path to a deserialized trainer state.
+        data_directory: Path to the session data directory.
+        curriculum: Forces the use of a specific curriculum, bypassing any automatic detection.
+        host: Host of the server.
+        port: Port of the server.
+        timeout: Seconds to wait for the evaluation.
+        fallback_to_cli: Whether to run the `curriculum run` cli in a subprocess if no server is running.
+            Otherwise, `CurriculumServerUnavailableError` is raised.
+        expected_version: Version of the curricula the server must run, e.g. that of the cli it
+            replaces. A server of another version counts as not running. Defaults to the
+            installed version. If None, servers of any version are used.
+
+    A server counts as running if it answers the health probe, within `HEALTH_TIMEOUT`
+    seconds, as a curriculum server. Any other reply, e.g. from another service on the
+    same port, counts as no server.
+
+    Returns:
+        The serialized suggestion.
+    """
+    request = EvaluationRequest(
+        data_directory=os.fspath(os.path.abspath(data_directory)),
+        input_trainer_state=os.fspath(os.path.abspath(input_trainer_state)),
+        curriculum=curriculum,
+    )
+    try:
+        version = _server_version(host, port)
+        if expected_version is not None and version != expected_version:
+            raise CurriculumServerUnavailableError(
+                f"The curriculum server at {host}:{port} runs version {version}, not {expected_version}"
+            )
+        return _post(request, host, port, timeout)
+    except CurriculumServerUnavailableError as e:
+        if not fallback_to_cli:
+            raise
+        logger.info("%s. Running the cli instead.", e)
+
+    command = [sys.executable, "-m", f"{__package__}.cli", "run"]
+    command += ["--data-directory", request.data_directory, "--input-trainer-state", request.input_trainer_state]
+    if curriculum is not None:
+        command += ["--curriculum", curriculum]
+    return subprocess.run(command, capture_output=True, check=True, text=True, timeout=timeout).stdout
+
+
+def _server_version(host: str, port: int) -> str:
+    """Returns the version of the curriculum server at `host:port`, probed with its health endpoint."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{HEALTH_ENDPOINT}", timeout=HEALTH_TIMEOUT) as response:
+            version = json.loads(response.read())["version"]
+    except (OSError, http.client.HTTPException, ValueError, KeyError, TypeError) as e:
+        # Covers refused and reset connections, timeouts, http errors and replies of other services
+        raise CurriculumServerUnavailableError(f"No curriculum server at {host}:{port}") from e
+    if not isinstance(version, str):
+        raise CurriculumServerUnavailableError(f"No curriculum server at {host}:{port}")
+    return version
+
+
+def _post(request: EvaluationRequest, host: str, port: int, timeout: float) -> str:
+    http_request = urllib.request.Request(
+        f"http://{host}:{port}{EVALUATE_ENDPOINT}",
+        data=request.model_dump_json().encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        try:
+            error = json.loads(e.read().decode("utf-8")).get("error")
+        except (ValueError, AttributeError):
+            error = f"{e.code} {e.reason}"
+        raise RuntimeError(f"Curriculum server failed to evaluate the request: {error}") from e
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, (ConnectionRefusedError, socket.gaierror)):
+            raise CurriculumServerUnavailableError(f"No curriculum server at {host}:{port}") from e
+        raise
@@ -0,0 +1,136 @@
+import dataclasses
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from aind_behavior_vr_foraging.data_contract import dataset as vr_foraging_dataset
+from aind_behavior_vr_foraging.data_contract.segmentation import segment_patch_visits
+from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
+from contraqctor.contract import DataStream
+
+logger = logging.getLogger(__name__)
+
+SESSION_EVENTS_CACHE_SIZE = 8
+"""Maximum number of sessions whose events are kept in memory."""
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionEvents:
+    """The task logic and software events of a session that curriculum metrics are computed from.
+
+    Events are loaded once per session by `load_session_events` and shared by the
+    metrics of all curricula, which must not mutate them. Streams that are missing,
+    failed to load or are empty are None.
+    """
+
+    task_logic: Optional[AindVrForagingTaskLogic]
+    give_reward: Optional[pd.DataFrame]
+    choice_feedback: Optional[pd.DataFrame]
+    active_patch: Optional[pd.DataFrame]
+    active_site: Optional[pd.DataFrame]
+    updater_reward_delay_offset: Optional[pd.DataFrame]
+    updater_stop_duration_offset: Optional[pd.DataFrame]
+    updater_stop_velocity_threshold: Optional[pd.DataFrame]
+
+    @property
+    def total_water_consumed(self) -> float:
+        """Total water (in milliliters) given during the session."""
+        return float(self.give_reward["data"].sum()) * 1e-3 if self.give_reward is not None else 0.0
+
+    @cached_property
+    def patch_visits(self) -> Optional[pd.DataFrame]:
+        """Table with one row per patch visit, or None if no patch was visited. See `segment_patch_visits`."""
+        if self.active_patch is None:
+            return None
+        return segment_patch_visits(
+            self.active_patch, choices=self.choice_feedback, rewards=self.give_reward, sites=self.active_site
+        )
+
+    @staticmethod
+    def last_value(events: Optional[pd.DataFrame]) -> Any:
+        """Returns the data of the last event of a stream, or None if there are no events."""
+        return events["data"].iloc[-1] if events is not None else None
+
+
+_SOFTWARE_EVENTS = {
+    "give_reward": "GiveReward",
+    "choice_feedback": "ChoiceFeedback",
+    "active_patch": "ActivePatch",
+    "active_site": "ActiveSite",
+    "updater_reward_delay_offset": "UpdaterRewardDelayOffset",
+    "updater_stop_duration_offset": "UpdaterStopDurationOffset",
+    "updater_stop_velocity_threshold": "UpdaterStopVelocityThreshold",
+}
+
+
+def load_session_events(data_directory: os.PathLike) -> SessionEvents:
+    """Loads the events all curricula compute their metrics from.
+
+    The streams are loaded concurrently, and the events of the most recently loaded
+    sessions are cached, so computing the metrics of several curricula for the same
+    session only loads it once. Cached events are loaded again if the file of any
+    stream was modified, created or deleted since.
+
+    Args:
+        data_directory: Path to the session data directory.
+
+    Returns:
+        The events of the session.
+    """
+    data_directory = str(Path(data_directory).resolve())
+    return _load_session_events(data_directory, _stamp(_session_streams(data_directory)))
+
+
+def clear_session_events_cache() -> None:
+    """Drops the events of all cached sessions."""
+    _load_session_events.cache_clear()
+
+
+@lru_cache(maxsize=SESSION_EVENTS_CACHE_SIZE)
+def _load_session_events(data_directory: str, stamp: Tuple[Optional[Tuple[int, int]], ...]) -> SessionEvents:
+    streams = _session_streams(data_directory)
+    with ThreadPoolExecutor() as executor:
+        loaded = dict(zip(streams, executor.map(_try_load, streams.values())))
+
+    task_logic = loaded.pop("task_logic")
+    if isinstance(task_logic, dict):
+        # Validated from json, since json mode coerces differently (e.g. enum keys of updaters).
+        task_logic = AindVrForagingTaskLogic.model_validate_json(json.dumps(task_logic))
+    return SessionEvents(task_logic=task_logic, **loaded)
+
+
+def _session_streams(data_directory: str) -> Dict[str, DataStream]:
+    dataset = vr_foraging_dataset(data_directory)
+    software_events = dataset["Behavior"]["SoftwareEvents"]
+    streams = {"task_logic": dataset["Behavior"]["InputSchemas"]["TaskLogic"]}
+    streams.update({field: software_events[name] for field, name in _SOFTWARE_EVENTS.items()})
+    return streams
+
+
+def _stamp(streams: Dict[str, DataStream]) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """Returns the modification time and size of the file of each stream, or None if it is missing."""
+    stamp = []
+    for datastream in streams.values():
+        try:
+            stat = os.stat(datastream.reader_params.path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def _try_load(datastream: DataStream) -> Any:
+    datastream.load()
+    if datastream.has_error:
+        logger.debug("Could not load %s.", datastream.name)
+        return None
+    data = datastream.data
+    if isinstance(data, pd.DataFrame) and data.empty:
+        return None
+    return data
@@ -1,14 +1,13 @@
 import logging
 import os
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
-import pandas as pd
 from aind_behavior_curriculum import Metrics
-from aind_behavior_vr_foraging.data_contract import dataset as vr_foraging_dataset
-from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
-from contraqctor.contract.json import SoftwareEvents
 from pydantic import Field, NonNegativeFloat, NonNegativeInt
 
+if TYPE_CHECKING:
+    from ..session_events import SessionEvents
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,37 +28,23 @@ class SingleSiteMetrics(Metrics):
     )
 
 
-def _try_get_datastream_as_dataframe(datastream: SoftwareEvents) -> pd.DataFrame | None:
-    try:
-        datastream.load()
-        return datastream.data
-    except FileNotFoundError:
-        return None
+def metrics_from_dataset(data_directory: os.PathLike) -> SingleSiteMetrics:
+    from ..session_events import load_session_events
 
+    return metrics_from_session_events(load_session_events(data_directory))
 
-def metrics_from_dataset(data_directory: os.PathLike) -> SingleSiteMetrics:
-    dataset = vr_foraging_dataset(data_directory)
 
-    task_logic = dataset["Behavior"]["InputSchemas"]["TaskLogic"].load().data
-    if isinstance(task_logic, dict):
-        task_logic = AindVrForagingTaskLogic.model_validate(task_logic)
+def metrics_from_session_events(events: "SessionEvents") -> SingleSiteMetrics:
+    task_logic = events.task_logic
+    if task_logic is None:
+        raise ValueError("The session does not have a task logic.")
 
     # we only care about the first block during the curriculum
     unique_patches_indices = list(
         set(cast(int, p.state_index) for p in task_logic.task_parameters.environment.blocks[0].environment.patches)
     )
 
-    total_water_consumed = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["GiveReward"])
-    choices = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["ChoiceFeedback"])
-    stop_velocity_threshold = _try_get_datastream_as_dataframe(
-        dataset["Behavior"]["SoftwareEvents"]["UpdaterStopVelocityThreshold"]
-    )
-    reward_delay_offset = _try_get_datastream_as_dataframe(
-        dataset["Behavior"]["SoftwareEvents"]["UpdaterRewardDelayOffset"]
-    )
-
-    visited_patches = _try_get_datastream_as_dataframe(dataset["Behavior"]["SoftwareEvents"]["ActivePatch"])
-
+    visited_patches = events.active_patch
     visited_patches_per_index = (
         (
             visited_patches["data"]
@@ -73,14 +58,9 @@ def metrics_from_dataset(data_directory: os.PathLike) -> SingleSiteMetrics:
     )
 
     return SingleSiteMetrics(
-        total_water_consumed=(total_water_consumed["data"].sum() if total_water_consumed is not None else 0.0)
-        * 1e-3,  # convert from uL to mL
-        n_patches_visited=len(choices) if choices is not None else 0,
+        total_water_consumed=events.total_water_consumed,
+        n_patches_visited=len(events.choice_feedback) if events.choice_feedback is not None else 0,
         n_patches_seen=sum(visited_patches_per_index.values()),
-        last_stop_threshold_updater=stop_velocity_threshold["data"].iloc[-1]
-        if stop_velocity_threshold is not None
-        else None,
-        last_reward_delay_offset_updater=reward_delay_offset["data"].iloc[-1]
-        if reward_delay_offset is not None
-        else None,
+        last_stop_threshold_updater=events.last_value(events.updater_stop_velocity_threshold),
+        last_reward_delay_offset_updater=events.last_value(events.updater_reward_delay_offset),
     )
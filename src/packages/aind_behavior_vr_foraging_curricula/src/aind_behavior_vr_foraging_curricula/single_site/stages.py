@@ -3,6 +3,7 @@ from aind_behavior_services.task import distributions
 from aind_behavior_vr_foraging import task_logic
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic, AindVrForagingTaskParameters
 
+from ..utils import stage_factory
 from . import helpers
 from .metrics import metrics_from_dataset
 from .policies import (
@@ -80,6 +81,7 @@ def _make_learn_to_stop_task() -> AindVrForagingTaskLogic:
     )
 
 
+@stage_factory
 def make_s_learn_to_stop() -> Stage:
     return Stage(
         name="learn_to_stop",
@@ -89,6 +91,7 @@ def make_s_learn_to_stop() -> Stage:
     )
 
 
+@stage_factory
 def make_s_learn_to_choose() -> Stage:
     """High-contrast discrimination stage. Two odors, alternating blocks with
     p_reward (0.9, 0.1) and (0.1, 0.9). REWARD_DELAY_OFFSET ramps 0 -> 0.3 s within
@@ -162,6 +165,7 @@ def _probability_grid_blocks(
     ]
 
 
+@stage_factory
 def make_s_probability_grid_short_delay() -> Stage:
     """First probability-grid stage; absorbs the old `three_contrast` shaping.
 
@@ -202,6 +206,7 @@ def make_s_probability_grid_short_delay() -> Stage:
     )
 
 
+@stage_factory
 def make_s_probability_grid_long_delay() -> Stage:
     """Terminal stage: the same 13-block band, but with a stationary, longer and
     heavier-tailed reward delay (0.2 s floor + Exp, mean ~2.0 s, capped at 7 s) and
@@ -0,0 +1,18 @@
+import typing as t
+
+import aind_behavior_curriculum
+from pydantic import BaseModel, Field, SerializeAsAny
+
+from . import __version__
+
+TTrainerState = t.TypeVar("TTrainerState", bound=aind_behavior_curriculum.TrainerState)
+TMetrics = t.TypeVar("TMetrics", bound=aind_behavior_curriculum.Metrics)
+
+
+class CurriculumSuggestion(BaseModel, t.Generic[TTrainerState, TMetrics]):
+    trainer_state: SerializeAsAny[TTrainerState] = Field(description="The TrainerState suggestion.")
+    metrics: SerializeAsAny[TMetrics] = Field(description="The calculated metrics.")
+    version: str = Field(default=__version__, description="The version of the curriculum.")
+    dsl_version: str = Field(
+        default=aind_behavior_curriculum.__version__, description="The version of the curriculum library."
+    )
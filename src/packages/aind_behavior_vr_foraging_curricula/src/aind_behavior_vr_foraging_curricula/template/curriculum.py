@@ -17,7 +17,9 @@ from aind_behavior_curriculum import (
 from aind_behavior_vr_foraging.task_logic import AindVrForagingTaskLogic
 
 from .. import __semver__
-from ..cli import CurriculumCliArgs, CurriculumSuggestion, model_from_json_file
+from ..cli import CurriculumCliArgs
+from ..suggestion import CurriculumSuggestion
+from ..utils import model_from_json_file
 from .metrics import VrForagingTemplateMetrics
 from .stages import s_stage_a, s_stage_b
 
@@ -1,12 +1,14 @@
+import functools
 import os
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, Callable, ParamSpec, TypeVar
 
 import pydantic
-from aind_behavior_curriculum import Curriculum, Metrics, Trainer, TrainerState
+from aind_behavior_curriculum import Curriculum, Metrics, Stage, Trainer, TrainerState
 
 TModel = TypeVar("TModel", bound=pydantic.BaseModel)
 TCurriculum = TypeVar("TCurriculum", bound=Curriculum)
+P = ParamSpec("P")
 
 
 def model_from_json_file(json_path: os.PathLike | str, model: type[TModel]) -> TModel:
@@ -26,3 +28,29 @@ def metrics_from_dataset_path(dataset_path: str | os.PathLike, trainer_state: Tr
         raise ValueError("Stage does not have a metrics provider")
     metrics_provider = stage.metrics_provider
     return metrics_provider.callable(dataset_path)
+
+
+def stage_factory(factory: Callable[P, Stage]) -> Callable[P, Stage]:
+    """Memoizes a stage factory by its arguments, so each stage is only built once per process.
+
+    Every call returns a shallow copy of the memoized stage, so curricula that share a
+    stage can each replace its task (e.g. `Trainer.evaluate` does through `Stage.set_task`)
+    without affecting the others. Factories must be deterministic and take hashable arguments.
+
+    Examples:
+        ```python
+        @stage_factory
+        def make_s_stage_a() -> Stage:
+            return Stage(name="stage_a", task=...)
+
+        assert make_s_stage_a().task is make_s_stage_a().task
+        ```
+    """
+    memoized = functools.lru_cache(maxsize=None)(factory)
+
+    @functools.wraps(factory)
+    def make_stage(*args: P.args, **kwargs: P.kwargs) -> Stage:
+        return memoized(*args, **kwargs).model_copy()
+
+    make_stage.cache_clear = memoized.cache_clear  # type: ignore[attr-defined]
+    return make_stage
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+from aind_behavior_services.data_types import SoftwareEvent
+
+from aind_behavior_vr_foraging_curricula import session_events
+from aind_behavior_vr_foraging_curricula.depletion import TRAINER
+
+
+def _write_events(path: Path, events: list[tuple[float, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    name = path.stem
+    with open(path, "w", encoding="utf-8") as f:
+        for timestamp, data in events:
+            event = SoftwareEvent(name=name, timestamp=timestamp, timestamp_source="harp", data=data)
+            f.write(event.model_dump_json() + "\n")
+
+
+@pytest.fixture
+def data_directory(tmp_path: Path) -> Path:
+    logs = tmp_path / "behavior" / "Logs"
+    logs.mkdir(parents=True)
+    task_logic = TRAINER.create_enrollment().stage.task
+    (logs / "tasklogic_output.json").write_text(task_logic.model_dump_json(), encoding="utf-8")
+
+    software_events = tmp_path / "behavior" / "SoftwareEvents"
+    _write_events(software_events / "ActivePatch.json", [(0.0, {"state_index": 0}), (10.0, {"state_index": 1})])
+    _write_events(software_events / "ChoiceFeedback.json", [(1.0, None), (2.0, None), (11.0, None)])
+    _write_events(software_events / "GiveReward.json", [(1.5, 5.0), (2.5, 5.0)])
+    _write_events(
+        software_events / "ActiveSite.json",
+        [(0.5, {"label": "InterSite", "length": 10}), (1.0, {"label": "RewardSite", "length": 40})],
+    )
+    _write_events(tmp_path / "behavior" / "UpdaterEvents" / "UpdaterStopDurationOffset.json", [(0.0, 0.1), (5.0, 0.2)])
+    session_events.clear_session_events_cache()
+    yield tmp_path
+    session_events.clear_session_events_cache()
@@ -1,13 +1,26 @@
+import csv
+import datetime
 import importlib
+import json
 import logging
 import os
 import tempfile
 
+import pytest
 from aind_behavior_curriculum import __version__ as dsl_version
+from aind_behavior_services.session import Session
+from aind_behavior_vr_foraging.trainer_history import TrainerStateHistory
 from pydantic_settings import CliApp
 
 from aind_behavior_vr_foraging_curricula import __version__ as version
-from aind_behavior_vr_foraging_curricula.cli import _KNOWN_CURRICULA, CurriculumAppCliArgs, CurriculumInitCliArgs
+from aind_behavior_vr_foraging_curricula.cli import (
+    _KNOWN_CURRICULA,
+    BATCH_SUMMARY_FILE,
+    BatchEntry,
+    CurriculumAppCliArgs,
+    CurriculumBatchCliArgs,
+    CurriculumInitCliArgs,
+)
 from aind_behavior_vr_foraging_curricula.template import TRAINER, __test_placeholder
 
 
@@ -96,3 +109,116 @@ def test_cli_enroll_with_stage(capsys):
     expected_policies = stage_b.start_policies
     assert deserialized.stage.start_policies is not None
     assert len(deserialized.stage.start_policies) == len(expected_policies)
+
+
+def _write_session(data_directory, subject: str) -> None:
+    logs = data_directory / "Behavior" / "Logs"
+    logs.mkdir(parents=True)
+    session = Session(experiment="AindVrForaging", subject=subject, date=datetime.datetime.now(datetime.timezone.utc))
+    (logs / "session_input.json").write_text(session.model_dump_json(), encoding="utf-8")
+
+
+def test_run_batch_isolates_failures(tmp_path, monkeypatch):
+    trainer_state, _ = __test_placeholder.make()
+    trainer_state_path = tmp_path / "trainer_state.json"
+    trainer_state_path.write_text(trainer_state.model_dump_json(), encoding="utf-8")
+    # The template curriculum evaluates placeholder metrics for the "demo" data directory
+    monkeypatch.chdir(tmp_path)
+    _write_session(tmp_path / "demo", "mouse_a")
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            [
+                {"input_trainer_state": str(trainer_state_path), "data_directory": "demo"},
+                {"subject": "mouse_b", "input_trainer_state": str(tmp_path / "missing.json"), "data_directory": "demo"},
+                # Without a subject nor a session, the entry cannot be named
+                {"input_trainer_state": str(trainer_state_path), "data_directory": "missing"},
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    results = CurriculumBatchCliArgs(manifest=manifest, output=tmp_path / "out", max_workers=2).run_batch()
+
+    assert [(result.subject, result.succeeded) for result in results] == [
+        ("mouse_a", True),
+        ("mouse_b", False),
+        ("entry_2", False),
+    ]
+    assert results[0].stage == TRAINER.evaluate(*__test_placeholder.make()).stage.name
+    assert results[1].error is not None
+    assert "cannot be read" in results[2].error
+    suggestion = json.loads((tmp_path / "out" / "mouse_a" / "suggestion.json").read_text(encoding="utf-8"))
+    assert suggestion["dsl_version"] == dsl_version
+    assert not (tmp_path / "out" / "mouse_b").exists()
+    with open(tmp_path / "out" / BATCH_SUMMARY_FILE, encoding="utf-8") as file:
+        summary = list(csv.DictReader(file))
+    assert [row["subject"] for row in summary] == ["mouse_a", "mouse_b", "entry_2"]
+    assert [row["succeeded"] for row in summary] == ["True", "False", "False"]
+
+
+def test_batch_subjects_default_to_the_session_subject(tmp_path):
+    for subject in ("mouse_a", "mouse_b"):
+        _write_session(tmp_path / subject, subject)
+    entries = [
+        BatchEntry(input_trainer_state=tmp_path / subject / "trainer_state.json", data_directory=tmp_path / subject)
+        for subject in ("mouse_a", "mouse_b")
+    ]
+    assert [entry.resolve_name() for entry in entries] == ["mouse_a", "mouse_b"]
+    with pytest.raises(ValueError):
+        BatchEntry(input_trainer_state="trainer_state.json", data_directory=tmp_path / "missing").resolve_name()
+
+
+@pytest.mark.parametrize("subject", ["../mouse", "mice/mouse", "mice\\mouse", "..", ""])
+def test_batch_subjects_must_be_directory_names(tmp_path, subject):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps([{"subject": subject, "input_trainer_state": "mouse.json", "data_directory": "demo"}]),
+        encoding="utf-8",
+    )
+    results = CurriculumBatchCliArgs(manifest=manifest, output=tmp_path / "out").run_batch()
+    assert [(result.subject, result.succeeded) for result in results] == [("entry_0", False)]
+    assert "not a valid directory name" in results[0].error
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == [BATCH_SUMMARY_FILE]
+    assert not (tmp_path / "mouse").exists()
+
+
+def test_run_batch_rejects_duplicated_subjects(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    entry = {"subject": "mouse", "input_trainer_state": "mouse.json", "data_directory": "demo"}
+    manifest.write_text(json.dumps([entry, entry]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        CurriculumBatchCliArgs(manifest=manifest, output=tmp_path / "out").run_batch()
+
+
+def test_run_records_trainer_state_history(tmp_path):
+    trainer_state, _ = __test_placeholder.make()
+    trainer_state_path = tmp_path / "trainer_state.json"
+    trainer_state_path.write_text(trainer_state.model_dump_json(), encoding="utf-8")
+    session = Session(subject="mouse_a", date=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+    (tmp_path / "Behavior" / "Logs").mkdir(parents=True)
+    (tmp_path / "Behavior" / "Logs" / "session_input.json").write_text(session.model_dump_json(), encoding="utf-8")
+    history_path = tmp_path / "trainer_states.db"
+
+    for _ in range(2):
+        CliApp.run(
+            CurriculumAppCliArgs,
+            cli_args=[
+                "run",
+                "--data-directory",
+                str(tmp_path),
+                "--input-trainer-state",
+                str(trainer_state_path),
+                "--curriculum",
+                "template",
+                "--mute-suggestion",
+                "--trainer-state-history",
+                str(history_path),
+            ],
+        )
+
+    with TrainerStateHistory(history_path) as history:
+        records = history.stage_history("mouse_a")
+    assert [(record.curriculum, record.session_time) for record in records] == [
+        (trainer_state.curriculum.name, session.date)
+    ]
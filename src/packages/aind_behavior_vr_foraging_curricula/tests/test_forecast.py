@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from aind_behavior_curriculum import Metrics
+
+from aind_behavior_vr_foraging_curricula.depletion import TRAINER
+from aind_behavior_vr_foraging_curricula.depletion.metrics import DepletionCurriculumMetrics
+from aind_behavior_vr_foraging_curricula.forecast import GraduationForecaster, observations_from_suggestions
+from aind_behavior_vr_foraging_curricula.suggestion import CurriculumSuggestion
+
+
+def _metrics(n_reward_sites_traveled: int = 0, n_patches_visited: int = 0, per_patch: int = 0):
+    return DepletionCurriculumMetrics(
+        total_water_consumed=1.0,
+        n_reward_sites_traveled=n_reward_sites_traveled,
+        n_choices=200,
+        n_patches_visited=n_patches_visited,
+        n_patches_visited_per_patch={0: per_patch, 1: per_patch},
+        last_stop_duration_offset_updater=0.5,
+        last_reward_site_length=50,
+        last_delay_duration=0.1,
+    )
+
+
+@pytest.fixture
+def forecaster() -> GraduationForecaster:
+    observations = [
+        # Half of the sessions in the first stage meet the criteria to move on
+        ("one_odor_no_depletion", _metrics(n_reward_sites_traveled=250)),
+        ("one_odor_no_depletion", _metrics(n_reward_sites_traveled=10)),
+        ("one_odor_w_depletion_day_0", _metrics(n_patches_visited=30)),
+        ("one_odor_w_depletion_day_1", _metrics(n_patches_visited=30)),
+        # Generic metrics, as deserialized from suggestions of any curriculum
+        (
+            "all_odors_rewarded",
+            Metrics.model_validate_json(_metrics(per_patch=11).model_dump_json()),
+        ),
+    ]
+    return GraduationForecaster(TRAINER, observations)
+
+
+def test_forecast(forecaster: GraduationForecaster):
+    forecast = forecaster.forecast("one_odor_no_depletion", n_trajectories=20_000, seed=0)
+    assert forecast.p_graduated == 1
+    assert forecast.sessions_to_graduation.min() == 4
+    # A geometric number of sessions (p=0.5) in the first stage, then one session in each of the next stages
+    assert forecast.sessions_to_graduation.mean() == pytest.approx(5, abs=0.05)
+    assert forecast.stage_occupancy["one_odor_no_depletion"] == pytest.approx(2, abs=0.05)
+    assert forecast.stage_occupancy["one_odor_w_depletion_day_0"] == 1
+    assert forecast.stage_occupancy["graduation"] == 0
+    assert forecast.quantiles([0.0])[0] == 4
+
+
+def test_stages_without_samples_do_not_graduate():
+    forecaster = GraduationForecaster(TRAINER, [("one_odor_w_depletion_day_0", _metrics(n_patches_visited=30))])
+    assert forecaster.n_samples["one_odor_w_depletion_day_1"] == 0
+    forecast = forecaster.forecast("one_odor_w_depletion_day_0", n_trajectories=100, max_sessions=10, seed=0)
+    assert forecast.p_graduated == 0
+    assert np.isnan(forecast.quantiles()).all()
+    assert forecast.stage_occupancy["one_odor_w_depletion_day_1"] == 9
+
+
+def test_forecast_cohort(forecaster: GraduationForecaster):
+    forecasts = forecaster.forecast_cohort({"a": "graduation", "b": "all_odors_rewarded", "c": "graduation"}, seed=0)
+    assert forecasts["a"] is forecasts["c"]
+    assert (forecasts["a"].sessions_to_graduation == 0).all()
+    assert (forecasts["b"].sessions_to_graduation == 1).all()
+    with pytest.raises(ValueError):
+        forecaster.forecast("unknown")
+
+
+def test_observations_from_suggestions():
+    enrollment = TRAINER.create_enrollment()
+    suggestions = [
+        CurriculumSuggestion(trainer_state=enrollment, metrics=_metrics(n_reward_sites_traveled=i)) for i in range(3)
+    ]
+    observations = observations_from_suggestions(suggestions)
+    assert [stage for stage, _ in observations] == [enrollment.stage.name] * 2
+    assert [metrics.n_reward_sites_traveled for _, metrics in observations] == [1, 2]
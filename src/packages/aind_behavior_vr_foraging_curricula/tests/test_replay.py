@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from aind_behavior_vr_foraging_curricula import replay
+from aind_behavior_vr_foraging_curricula.depletion import TRAINER
+from aind_behavior_vr_foraging_curricula.depletion.metrics import DepletionCurriculumMetrics
+
+
+def _write_enrollment(path: Path) -> Path:
+    path.write_text(TRAINER.create_enrollment().model_dump_json(), encoding="utf-8")
+    return path
+
+
+def _metrics(ready: bool) -> DepletionCurriculumMetrics:
+    return DepletionCurriculumMetrics(
+        total_water_consumed=1.0,
+        n_reward_sites_traveled=250 if ready else 10,
+        n_choices=200 if ready else 10,
+        n_patches_visited=0,
+        n_patches_visited_per_patch={0: 0},
+        last_stop_duration_offset_updater=0.5,
+        last_reward_site_length=50,
+        last_delay_duration=0.1,
+    )
+
+
+def test_replay_subject_diverges(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # The subject stayed in the first stage, but its second session meets the current transition criteria
+    monkeypatch.setattr(replay, "_cached_metrics", lambda _, data_directory: _metrics(data_directory.endswith("b")))
+    trainer_state = _write_enrollment(tmp_path / "trainer_state.json")
+    task = TRAINER.create_enrollment().stage.task.model_dump_json()
+    history = replay.SubjectHistory(
+        subject="mouse",
+        sessions=[
+            replay.SessionRecord(data_directory=tmp_path / name, input_trainer_state=trainer_state)
+            for name in ("a", "b", "c")
+        ],
+    )
+
+    result = replay.replay_subject(history, TRAINER)
+
+    assert result.error is None
+    first_stage = TRAINER.create_enrollment().stage.name
+    assert [step.actual_stage for step in result.steps] == [first_stage] * 3
+    assert [step.replayed_stage for step in result.steps] == [first_stage, first_stage, "one_odor_w_depletion_day_0"]
+    assert result.diverged_at == 2
+    assert TRAINER.create_enrollment().stage.task.model_dump_json() == task
+
+
+def test_replay_cohort_isolates_failures(data_directory: Path):
+    trainer_state = _write_enrollment(data_directory / "trainer_state.json")
+    session = replay.SessionRecord(data_directory=data_directory, input_trainer_state=trainer_state)
+    histories = [
+        replay.SubjectHistory(subject="mouse_a", sessions=[session, session]),
+        replay.SubjectHistory(
+            subject="mouse_b",
+            sessions=[replay.SessionRecord(data_directory=data_directory, input_trainer_state="missing.json")],
+        ),
+    ]
+
+    results = replay.replay_cohort(histories, max_workers=2)
+
+    assert [result.subject for result in results] == ["mouse_a", "mouse_b"]
+    assert results[0].error is None
+    assert results[0].diverged_at is None
+    assert results[0].final_stage == TRAINER.create_enrollment().stage.name
+    assert results[1].error is not None
+
+    table = replay.replay_table(results)
+    assert table["subject"].tolist() == ["mouse_a", "mouse_a"]
+    assert not table["changed"].any()
@@ -0,0 +1,84 @@
+import json
+
+from aind_behavior_vr_foraging_curricula import _schema
+from aind_behavior_vr_foraging_curricula.cli import _KNOWN_CURRICULA
+
+SEED = 42
+
+
+def test_regenerates_only_outdated_schemas(tmp_path):
+    expected = {tmp_path / f"{curriculum}.json" for curriculum in _KNOWN_CURRICULA}
+    assert _schema.stale_curricula(str(tmp_path), seed=SEED) == list(_KNOWN_CURRICULA)
+
+    assert set(_schema.main(root=str(tmp_path), seed=SEED)) == expected
+    assert _schema.stale_curricula(str(tmp_path), seed=SEED) == []
+    assert _schema.main(root=str(tmp_path), check=True, seed=SEED) == []
+    assert _schema.stale_curricula(str(tmp_path), seed=SEED + 1) == list(_KNOWN_CURRICULA)
+
+    (tmp_path / "template.json").write_text("{}", encoding="utf-8")
+    assert _schema.main(root=str(tmp_path), check=True, seed=SEED) == [tmp_path / "template.json"]
+    assert _schema.main(root=str(tmp_path), dry_run=True, seed=SEED) == [tmp_path / "template.json"]
+    assert (tmp_path / "template.json").read_text(encoding="utf-8") == "{}"
+    assert _schema.main(root=str(tmp_path), seed=SEED) == [tmp_path / "template.json"]
+    assert _schema.main(root=str(tmp_path), check=True, seed=SEED) == []
+
+
+def test_changed_inputs_are_exported_again(tmp_path):
+    fingerprints_path = tmp_path / _schema.FINGERPRINTS_FILE
+    schema = _schema.load_curriculum("template").model_dump_json(indent=4)
+    (tmp_path / "template.json").write_text(schema, encoding="utf-8")
+    fingerprints = {
+        name: {
+            "inputs": _schema.input_fingerprint(name, SEED),
+            "versions": _schema.distribution_versions(),
+            "output": _schema.fingerprint(schema),
+        }
+        for name in _KNOWN_CURRICULA
+    }
+    fingerprints["template"]["inputs"] = "outdated"
+    fingerprints_path.write_text(json.dumps(fingerprints), encoding="utf-8")
+    assert "template" in _schema.stale_curricula(str(tmp_path), seed=SEED)
+
+    # The schema itself did not change, so it is not reported, but its fingerprints are updated
+    _schema.main(root=str(tmp_path), seed=SEED)
+    assert json.loads(fingerprints_path.read_text(encoding="utf-8"))["template"] == {
+        "inputs": _schema.input_fingerprint("template", SEED),
+        "versions": _schema.distribution_versions(),
+        "output": _schema.fingerprint(schema),
+    }
+    assert (tmp_path / "template.json").read_text(encoding="utf-8") == schema
+
+
+def test_check_ignores_installed_versions(tmp_path):
+    _schema.main(root=str(tmp_path), seed=SEED)
+    fingerprints_path = tmp_path / _schema.FINGERPRINTS_FILE
+    fingerprints = json.loads(fingerprints_path.read_text(encoding="utf-8"))
+    for entry in fingerprints.values():
+        entry["versions"]["pydantic"] = "0.0.0"
+    fingerprints_path.write_text(json.dumps(fingerprints), encoding="utf-8")
+
+    assert _schema.stale_curricula(str(tmp_path), seed=SEED) == list(_KNOWN_CURRICULA)
+    assert _schema.stale_curricula(str(tmp_path), seed=SEED, compare_versions=False) == []
+    assert _schema.main(root=str(tmp_path), check=True, seed=SEED) == []
+
+
+def test_source_files_follow_module_level_imports():
+    files = _schema.source_files("aind_behavior_vr_foraging_curricula.depletion_stops_offset")
+    assert {
+        "aind_behavior_vr_foraging_curricula",
+        "aind_behavior_vr_foraging_curricula.depletion.stages",
+        "aind_behavior_vr_foraging_curricula.depletion_stops_offset.stages",
+        "aind_behavior_vr_foraging.task_logic",
+    } <= set(files)
+    assert "aind_behavior_vr_foraging_curricula.server" not in files
+    assert not any(name.startswith("aind_behavior_vr_foraging_curricula.single_site") for name in files)
+
+
+def test_input_fingerprint_ignores_line_endings(tmp_path, monkeypatch):
+    source = tmp_path / "stages.py"
+    monkeypatch.setattr(_schema, "source_files", lambda module: {module: source})
+
+    source.write_bytes(b"import random\nSTAGES = []\n")
+    lf = _schema.input_fingerprint("template", SEED)
+    source.write_bytes(b"import random\r\nSTAGES = []\r\n")
+    assert _schema.input_fingerprint("template", SEED) == lf
@@ -0,0 +1,124 @@
+import json
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import pytest
+
+from aind_behavior_vr_foraging_curricula.cli import CurriculumCliArgs
+from aind_behavior_vr_foraging_curricula.depletion import TRAINER
+from aind_behavior_vr_foraging_curricula.server import (
+    HEALTH_ENDPOINT,
+    HEALTH_TIMEOUT,
+    CurriculumServer,
+    CurriculumServerUnavailableError,
+    request_suggestion,
+)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with CurriculumServer(("127.0.0.1", 0), curricula=["depletion"]) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _write_enrollment(path: Path) -> Path:
+    path.write_text(TRAINER.create_enrollment().model_dump_json(), encoding="utf-8")
+    return path
+
+
+def _loads(suggestion: str) -> dict:
+    # Active policies are not ordered, and the fallback evaluates in another process
+    content = json.loads(suggestion)
+    content["trainer_state"]["active_policies"] = sorted(content["trainer_state"]["active_policies"])
+    return content
+
+
+def test_server_matches_cli(server: CurriculumServer, data_directory: Path):
+    trainer_state = _write_enrollment(data_directory / "trainer_state.json")
+    expected = CurriculumCliArgs(data_directory=data_directory, input_trainer_state=trainer_state).suggest()
+
+    suggestion = request_suggestion(trainer_state, data_directory, port=server.server_address[1], fallback_to_cli=False)
+
+    assert _loads(suggestion) == _loads(expected.model_dump_json())
+
+
+def test_server_reports_errors(server: CurriculumServer, data_directory: Path):
+    port = server.server_address[1]
+    with pytest.raises(RuntimeError, match="Curriculum server failed"):
+        request_suggestion(data_directory / "missing.json", data_directory, port=port, fallback_to_cli=False)
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH_ENDPOINT}") as response:
+        assert json.loads(response.read())["curricula"] == ["depletion"]
+
+
+def test_client_skips_servers_of_other_versions(server: CurriculumServer, data_directory: Path):
+    trainer_state = _write_enrollment(data_directory / "trainer_state.json")
+    port = server.server_address[1]
+    with pytest.raises(CurriculumServerUnavailableError, match="runs version"):
+        request_suggestion(trainer_state, data_directory, port=port, fallback_to_cli=False, expected_version="0.0.1")
+
+    suggestion = request_suggestion(trainer_state, data_directory, port=port, expected_version=None)
+
+    expected = CurriculumCliArgs(data_directory=data_directory, input_trainer_state=trainer_state).suggest()
+    assert _loads(suggestion) == _loads(expected.model_dump_json())
+
+
+def test_server_rejects_unknown_curricula():
+    with pytest.raises(ValueError, match="Unknown curricula"):
+        CurriculumServer(("127.0.0.1", 0), curricula=["not_a_curriculum"])
+
+
+def test_client_falls_back_to_cli(data_directory: Path):
+    trainer_state = _write_enrollment(data_directory / "trainer_state.json")
+    port = _free_port()
+    with pytest.raises(CurriculumServerUnavailableError):
+        request_suggestion(trainer_state, data_directory, port=port, fallback_to_cli=False)
+
+    suggestion = request_suggestion(trainer_state, data_directory, port=port)
+
+    expected = CurriculumCliArgs(data_directory=data_directory, input_trainer_state=trainer_state).suggest()
+    assert _loads(suggestion) == _loads(expected.model_dump_json())
+
+
+class _OtherServiceHandler(BaseHTTPRequestHandler):
+    """Replies to every request like a service that is not a curriculum server."""
+
+    replies = {"/missing": (404, b"Not found"), "/text": (200, b"<html></html>"), "/json": (200, b"[1, 2]")}
+
+    def do_GET(self) -> None:
+        if self.server.reply == "silent":
+            time.sleep(HEALTH_TIMEOUT * 3)
+            return
+        status, body = self.replies[self.server.reply]
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.mark.parametrize("reply", ["/missing", "/text", "/json", "silent"])
+def test_other_services_are_not_curriculum_servers(reply: str, data_directory: Path):
+    trainer_state = _write_enrollment(data_directory / "trainer_state.json")
+    with HTTPServer(("127.0.0.1", 0), _OtherServiceHandler) as other:
+        other.reply = reply
+        threading.Thread(target=other.handle_request, daemon=True).start()
+        start = time.perf_counter()
+        with pytest.raises(CurriculumServerUnavailableError):
+            request_suggestion(trainer_state, data_directory, port=other.server_address[1], fallback_to_cli=False)
+        assert time.perf_counter() - start < HEALTH_TIMEOUT * 2
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from aind_behavior_services.data_types import SoftwareEvent
+
+from aind_behavior_vr_foraging_curricula import session_events
+from aind_behavior_vr_foraging_curricula.depletion.metrics import metrics_from_dataset as depletion_metrics
+from aind_behavior_vr_foraging_curricula.depletion.metrics import (
+    metrics_from_session_events as depletion_metrics_from_session_events,
+)
+from aind_behavior_vr_foraging_curricula.single_site.metrics import metrics_from_dataset as single_site_metrics
+
+
+def test_load_session_events(data_directory: Path):
+    events = session_events.load_session_events(data_directory)
+    assert events.task_logic is not None
+    assert len(events.choice_feedback) == 3
+    assert events.updater_reward_delay_offset is None
+    assert events.last_value(events.updater_stop_duration_offset) == 0.2
+    assert events.total_water_consumed == pytest.approx(0.01)
+    assert session_events.load_session_events(data_directory / ".") is events
+
+
+def test_modified_sessions_are_loaded_again(data_directory: Path):
+    events = session_events.load_session_events(data_directory)
+    with open(data_directory / "behavior" / "SoftwareEvents" / "GiveReward.json", "a", encoding="utf-8") as f:
+        f.write(SoftwareEvent(name="GiveReward", timestamp=3.5, timestamp_source="harp", data=5.0).model_dump_json())
+        f.write("\n")
+    reloaded = session_events.load_session_events(data_directory)
+    assert reloaded is not events
+    assert reloaded.total_water_consumed == pytest.approx(0.015)
+    assert session_events.load_session_events(data_directory) is reloaded
+
+
+def test_metrics_share_one_load(data_directory: Path, monkeypatch: pytest.MonkeyPatch):
+    loads = []
+    load = session_events._try_load
+    monkeypatch.setattr(
+        session_events, "_try_load", lambda datastream: loads.append(datastream.name) or load(datastream)
+    )
+
+    depletion = depletion_metrics(data_directory)
+    single_site = single_site_metrics(data_directory)
+    assert len(loads) == len(set(loads)) == 8
+
+    assert depletion.n_choices == 3
+    assert depletion.n_patches_visited_per_patch == {0: 1, 1: 0}
+    assert depletion.n_reward_sites_traveled == 1
+    assert depletion.last_stop_duration_offset_updater == 0.2
+    assert single_site.n_patches_visited == 3
+    assert single_site.total_water_consumed == pytest.approx(0.01)
+    assert single_site.n_patches_seen == 1  # patch 1 is not part of the task logic
+
+
+def test_choices_at_patch_boundaries_are_not_counted():
+    def events(*timestamps_and_data) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"data": [data for _, data in timestamps_and_data]}, index=[t for t, _ in timestamps_and_data]
+        )
+
+    patches = events((0.0, {"state_index": 0}), (10.0, {"state_index": 1}), (20.0, {"state_index": 0}))
+    choices = events((10.0, None), (20.0, None), (25.0, None))
+    metrics = depletion_metrics_from_session_events(
+        session_events.SessionEvents(
+            task_logic=None,
+            give_reward=None,
+            choice_feedback=choices,
+            active_patch=patches,
+            active_site=None,
+            updater_reward_delay_offset=None,
+            updater_stop_duration_offset=events((0.0, 0.1)),
+            updater_stop_velocity_threshold=None,
+        )
+    )
+    assert metrics.n_choices == 3
+    assert metrics.n_patches_visited_per_patch == {0: 0, 1: 0}
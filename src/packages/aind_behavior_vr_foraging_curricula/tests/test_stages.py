@@ -0,0 +1,38 @@
+from aind_behavior_vr_foraging_curricula.depletion import TRAINER as DEPLETION_TRAINER
+from aind_behavior_vr_foraging_curricula.depletion.stages import make_s_stage_one_odor_w_depletion_day_0
+from aind_behavior_vr_foraging_curricula.deterministic_reversals import TRAINER as REVERSALS_TRAINER
+from aind_behavior_vr_foraging_curricula.deterministic_reversals._stages_shared import make_s_stage_graduation
+from aind_behavior_vr_foraging_curricula.utils import stage_factory
+
+
+def test_stage_factory_builds_once_per_arguments():
+    calls = []
+
+    @stage_factory
+    def make_stage(value: int = 0):
+        calls.append(value)
+        return make_s_stage_one_odor_w_depletion_day_0()
+
+    assert make_stage() is not make_stage()
+    make_stage(value=1)
+    assert calls == [0, 1]
+
+
+def test_memoized_stages_are_independent():
+    stage, other = make_s_stage_one_odor_w_depletion_day_0(), make_s_stage_one_odor_w_depletion_day_0()
+    assert stage.task is other.task
+    task = stage.get_task()
+    task.stage_name = "modified"
+    stage.set_task(task)
+    assert other.task.stage_name == "one_odor_w_depletion_day_0"
+
+    assert make_s_stage_graduation() is not make_s_stage_graduation()
+    assert make_s_stage_graduation().task is not make_s_stage_graduation(delayed_reward_available=15).task
+
+
+def test_curricula_do_not_share_stages():
+    depletion = {stage.name: stage for stage in DEPLETION_TRAINER.curriculum.see_stages()}
+    reversals = {stage.name: stage for stage in REVERSALS_TRAINER.curriculum.see_stages()}
+    name = "one_odor_w_depletion_day_0"
+    assert depletion[name] is not reversals[name]
+    assert depletion[name].task is reversals[name].task
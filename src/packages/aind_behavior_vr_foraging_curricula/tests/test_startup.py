@@ -0,0 +1,62 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import aind_behavior_vr_foraging_curricula
+from aind_behavior_vr_foraging_curricula.cli import _KNOWN_CURRICULA
+
+HEAVY_MODULES = ("aind_behavior_curriculum", "aind_behavior_vr_foraging", "contraqctor", "pandas", "numpy", "scipy")
+
+STARTUP_BUDGET_SECONDS = 0.4
+"""Maximum time the cli may add to the interpreter startup for commands that do not run a curriculum."""
+
+
+def _run_cli(*args: str) -> str:
+    script = (
+        "import sys\n"
+        "from pydantic_settings import CliApp\n"
+        "from aind_behavior_vr_foraging_curricula.cli import CurriculumAppCliArgs\n"
+        f"CliApp.run(CurriculumAppCliArgs, cli_args={list(args)!r})\n"
+        f"print(*sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+    )
+    return subprocess.run([sys.executable, "-c", script], capture_output=True, check=True, text=True).stderr
+
+
+def _median_wall_time(command: list, repeats: int = 5) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def test_registry_matches_package():
+    package = Path(aind_behavior_vr_foraging_curricula.__file__).parent
+    curricula = sorted(p.name for p in package.iterdir() if (p / "__init__.py").exists() and not p.name.startswith("_"))
+    assert list(_KNOWN_CURRICULA) == curricula
+
+
+@pytest.mark.parametrize("command", ["version", "list"])
+def test_light_commands_do_not_import_heavy_dependencies(command: str):
+    assert _run_cli(command).strip() == ""
+
+
+def test_enrollment_does_not_import_data_dependencies():
+    loaded = _run_cli("init", "--curriculum", "depletion").split()
+    assert "contraqctor" not in loaded and "pandas" not in loaded
+
+
+@pytest.mark.skipif(not os.environ.get("VRFORAGING_BENCHMARK"), reason="Set VRFORAGING_BENCHMARK to run benchmarks.")
+def test_startup_time_budget():
+    interpreter = _median_wall_time([sys.executable, "-c", "pass"])
+    for command in ("version", "list"):
+        overhead = _median_wall_time([sys.executable, "-m", "aind_behavior_vr_foraging_curricula.cli", command])
+        overhead -= interpreter
+        print(f"\ncurriculum {command}: {overhead:.3f} s over interpreter startup")
+        assert overhead < STARTUP_BUDGET_SECONDS, f"curriculum {command} takes {overhead:.3f} s to start"